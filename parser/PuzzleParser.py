@@ -39,12 +39,14 @@ is an integer. The "problem" property is an integer grid. The "moves" property
 is a multiple line string where each matches r";$" (use re.findall).
 '''
 
+import hashlib
+import json
 import re
 import sys
 import tqdm
-from typing import Any, Callable, Dict, Iterator, List, Pattern, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Pattern, Set, Tuple, Union
 
-from PeekableIterator import PeekableIterator
+from grid_codecs import C_ROWS
 
 # property types
 P_NONE = 0 # property only, no value
@@ -59,6 +61,85 @@ GridParamType = Union[str,int]
 class ParseException(Exception):
     ''' Thrown for parsing exceptions that should be fixed. '''
 
+def _specValue(x: Any) -> Any:
+    ''' JSON representable form of a property parameter (for fingerprint). '''
+    if isinstance(x,Pattern):
+        return [x.pattern,x.flags]
+    if callable(x): # row/col functions, compared by their bytecode and constants
+        code = x.__code__
+        return [code.co_code.hex(),[c for c in code.co_consts if isinstance(c,(int,float,str))]]
+    return x
+
+# line span of a lazily parsed property: (type,start,end,cols,flags)
+Span = Tuple[int,int,int,int,str]
+
+class LazyResult(Mapping[str,PropType]):
+    '''
+    Result of PuzzleParser.parseLazy. Single line properties are parsed during
+    the scan, grids and long strings only record which lines they span and are
+    converted the first time they are accessed (which may raise a
+    ParseException for grids with invalid rows). It is a read only mapping with
+    the same keys, order and values as the result of PuzzleParser.parse.
+    '''
+    _lines: List[str]
+    _order: List[str]
+    _values: Dict[str,PropType]
+    _spans: Dict[str,Span]
+    _deferred: Set[str] # props with a span during the scan (loaded or not)
+    _intern: bool
+    def __init__(self, lines: List[str], intern: bool = False):
+        self._lines = lines
+        self._order = []
+        self._values = dict()
+        self._spans = dict()
+        self._deferred = set()
+        self._intern = intern
+    def _set(self, prop: str, value: PropType):
+        self._order.append(prop)
+        self._values[prop] = value
+    def _setSpan(self, prop: str, span: Span):
+        self._order.append(prop)
+        self._spans[prop] = span
+        self._deferred.add(prop)
+    def _load(self, prop: str, span: Span) -> PropType:
+        typenum,start,end,cols,flags = span
+        if typenum == P_STR_LONG:
+            return ''.join(self._lines[start:end])
+        assert typenum == P_GRID
+        grid: List[List[str]] = []
+        for r,line in enumerate(self._lines[start:end]):
+            row = line.split()
+            if 's' not in flags and len(row) != cols:
+                raise ParseException('row with invalid length (prop = %s, row = %d)'%(prop,r))
+            if 's' in flags and len(row) > cols:
+                raise ParseException('row >= col length (prop = %s, row = %d)'%(prop,r))
+            if self._intern:
+                row = list(map(sys.intern,row))
+            grid.append(row)
+        return grid
+    def __getitem__(self, prop: str) -> PropType:
+        if prop in self._values:
+            return self._values[prop]
+        span = self._spans.pop(prop) # KeyError if missing
+        value = self._load(prop,span)
+        self._values[prop] = value
+        return value
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+    def __len__(self) -> int:
+        return len(self._order)
+    def __contains__(self, prop: object) -> bool:
+        return prop in self._values or prop in self._spans
+    def metadata(self) -> Dict[str,PropType]:
+        ''' The properties parsed during the scan (no grids or long strings). '''
+        return {prop:self._values[prop] for prop in self._order
+                if prop not in self._deferred}
+    def materialize(self) -> Dict[str,PropType]:
+        ''' Convert all properties, giving the same dict as PuzzleParser.parse. '''
+        result = {prop:self[prop] for prop in self._order}
+        self._lines = []
+        return result
+
 class PuzzleParser:
     '''
     Object representing the properties and types to expect when parsing a puzzle
@@ -69,18 +150,30 @@ class PuzzleParser:
     _use_beg_end: bool
     _print: Callable[[str],Any] = sys.stderr.write # for printing errors
     _comment_chars: str # lines starting with these chars are considered comments
+    _codecs: Dict[str,str] # grid property -> codec for compact output (grid_codecs)
+    _intern: bool # intern strings and grid cells so results share them
     def __init__(self, use_beg_end: bool = True, err = tqdm.tqdm.write, comment_chars: str = ''):
         ''' Initialize a new PuzzleParser '''
         self._props = dict()
         self._use_beg_end = use_beg_end
         self._print = err
         self._comment_chars = comment_chars
+        self._codecs = dict()
+        self._intern = False
     def setUseBegEnd(self, use_beg_end: bool):
         self._use_beg_end = use_beg_end
     def setErrPrint(self, err: Callable[[str],Any]):
         self._print = err
     def setCommentChars(self, comment_chars: str = ''):
         self._comment_chars = comment_chars
+    def setIntern(self, intern: bool = True):
+        '''
+        Use sys.intern for property names, string values and grid cells, so the
+        results of many puzzles share one object for each distinct string.
+        '''
+        self._intern = intern
+    def _internStr(self, s: str) -> str:
+        return sys.intern(s) if self._intern else s
     def addNone(self, prop: str):
         assert prop != "" and prop not in self._props
         self._props[prop] = (P_NONE,None,None,None,None,None)
@@ -92,116 +185,114 @@ class PuzzleParser:
         self._props[prop] = (P_INT,None,None,None,None,None)
     # flags is characters to modify behavior, supported is:
     # s: allow shorter rows, resulting in jagged array
+    # codec is the preferred encoding for compact output (see grid_codecs)
     def addGrid(self, prop: str, rows: GridParamType, cols: GridParamType,
-            rowfunc: Callable[[int],int] = lambda x:x, colfunc: Callable[[int],int] = lambda x:x, flags: str = ''):
+            rowfunc: Callable[[int],int] = lambda x:x, colfunc: Callable[[int],int] = lambda x:x, flags: str = '',
+            codec: str = C_ROWS):
         assert prop != "" and prop not in self._props
         if isinstance(rows,str):
             assert rows in self._props
         if isinstance(cols,str):
             assert cols in self._props
         self._props[prop] = (P_GRID,rows,cols,rowfunc,colfunc,flags)
+        self._codecs[prop] = codec
     def addStrLong(self, prop: str, regex: Pattern):
         assert prop != "" and prop not in self._props
         self._props[prop] = (P_STR_LONG,regex,None,None,None,None)
     def removeProp(self, prop: str):
         del self._props[prop]
+        self._codecs.pop(prop,None)
+    def gridCodecs(self) -> Dict[str,str]:
+        ''' Codec declared for each grid property. '''
+        return self._codecs
+    def fingerprint(self) -> str:
+        '''
+        Hash of the properties the parser expects (with their types and
+        parameters) and its options, which changes when the output for some
+        input could change. It is the same in other processes and machines with
+        the same code and Python version.
+        '''
+        props = [[prop]+[_specValue(x) for x in spec] for prop,spec in self._props.items()]
+        text = json.dumps([self._use_beg_end,self._comment_chars,props,self._codecs],
+                          separators=(',',':'))
+        return hashlib.blake2b(text.encode(),digest_size=16).hexdigest()
     def parse(self, input_lines: Iterator[str]) -> Dict[str,PropType]:
-        lines = PeekableIterator(line.strip() for line in input_lines
-                if line.strip() != '' and line.strip()[0] not in self._comment_chars)
-        result: Dict[str,PropType] = dict()
+        ''' Parse the lines of a puzzle file into a dict of its properties. '''
+        return self.parseLazy(input_lines).materialize()
+
+    def parseLazy(self, input_lines: Iterator[str]) -> LazyResult:
+        '''
+        Like parse, but only scans the lines. Grids and long strings are kept
+        as line spans and converted when they are accessed, so reading just the
+        single line properties (puzzle, author, size, ...) is much cheaper.
+        Errors in the rows of a grid are raised when the grid is accessed.
+        '''
+        lines = [line.strip() for line in input_lines]
+        lines = [line for line in lines if line != '' and line[0] not in self._comment_chars]
+        result = LazyResult(lines,self._intern)
+        i = 0
         if self._use_beg_end:
-            try:
-                assert lines.peek() == 'begin'
-                next(lines)
-            except:
+            if i < len(lines) and lines[i] == 'begin':
+                i += 1
+            else:
                 self._print('WARNING: no "begin" line\n')
         found_end = False
-        while True:
-            try:
-                line = next(lines).split()
-            except StopIteration:
-                break
+        while i < len(lines):
+            line = lines[i].split()
+            i += 1
             if line == ['end'] or line == ['send'] or line == ['eend'] or line == ['endend'] \
                     or line == ['ends'] or line == ['ssend']:
                 found_end = True
                 break
-            prop = line[0].lower()
+            prop = self._internStr(line[0].lower())
             if prop not in self._props:
                 raise ParseException('unknown property: '+prop)
             typenum,param1,param2,param3,param4,param5 = self._props[prop]
             if prop in result:
                 self._print('WARNING: duplicate property: '+prop+'\n')
-                # pick a new name to avoid data loss
                 while prop in result:
                     prop += '_'
             if typenum == P_NONE:
-                result[prop] = None
+                result._set(prop,None)
                 if len(line) > 1:
                     self._print('WARNING: extra data for none property: '+prop+'\n')
             elif typenum == P_STR:
-                result[prop] = ' '.join(line[1:])
-                if result[prop] == '':
+                value = self._internStr(' '.join(line[1:]))
+                result._set(prop,value)
+                if value == '':
                     self._print('WARNING: string property value empty: '+prop+'\n')
             elif typenum == P_INT:
-                result[prop] = int(line[1])
+                result._set(prop,int(line[1]))
                 if len(line) > 2:
                     self._print('WARNING: extra data for int property: '+prop+'\n')
             elif typenum == P_GRID:
                 assert isinstance(param5,str)
-                # parse a grid, possibly convert to ints
-                rows = 0
-                cols = 0
-                if isinstance(param1,str):
-                    if param1 not in result:
-                        raise ParseException('row length not specified before grid')
-                    rows = result[param1]
-                    assert isinstance(rows,int)
-                else:
-                    assert isinstance(param1,int)
-                    rows = param1
-                if isinstance(param2,str):
-                    if param2 not in result:
-                        raise ParseException('col length not specified before grid')
-                    cols = result[param2]
-                    assert isinstance(cols,int)
-                else:
-                    assert isinstance(param2,int)
-                    cols = param2
-                # apply functions to dimensions
+                dims: List[int] = []
+                for param,name in ((param1,'row'),(param2,'col')):
+                    if isinstance(param,str):
+                        if param not in result:
+                            raise ParseException(name+' length not specified before grid')
+                        param = result[param]
+                    assert isinstance(param,int)
+                    dims.append(param)
                 assert callable(param3)
                 assert callable(param4)
-                rows = param3(rows)
-                cols = param4(cols)
-                # parse grid
-                grid: List[List[str]] = []
-                for r in range(rows):
-                    row = next(lines).split()
-                    if 's' not in param5 and len(row) != cols:
-                        raise ParseException('row with invalid length (prop = %s, row = %d)'%(prop,r))
-                    if 's' in param5 and len(row) > cols:
-                        raise ParseException('row >= col length (prop = %s, row = %d)'%(prop,r))
-                    grid.append(row)
-                result[prop] = grid
+                rows = param3(dims[0])
+                cols = param4(dims[1])
+                if i+rows > len(lines):
+                    raise ParseException('grid past end of file (prop = %s)'%prop)
+                result._setSpan(prop,(P_GRID,i,i+rows,cols,param5))
+                i += rows
             elif typenum == P_STR_LONG:
-                longstr = ''
                 assert isinstance(param1,Pattern)
-                while True:
-                    try:
-                        if re.findall(param1,lines.peek()):
-                            longstr += next(lines)
-                        else:
-                            break
-                    except StopIteration:
-                        break
-                result[prop] = longstr
+                start = i
+                while i < len(lines) and re.findall(param1,lines[i]):
+                    i += 1
+                result._setSpan(prop,(P_STR_LONG,start,i,0,''))
             else:
                 assert 0
         if self._use_beg_end and not found_end:
             self._print('WARNING: no "end" line\n')
-        try:
-            next(lines)
+        if i < len(lines):
             self._print('WARNING: extra data not read\n')
-        except StopIteration:
-            pass
         return result
-
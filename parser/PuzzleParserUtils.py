@@ -6,6 +6,7 @@ import re
 from typing import Type, Union
 
 from PuzzleParser import PuzzleParser
+from grid_codecs import C_INT
 
 TypeIntOrStr = Union[Type[int],Type[str]]
 
@@ -36,26 +37,26 @@ def addParamsRCGrid(p: PuzzleParser, areas: bool = False):
     p.addGrid('problem','rows','cols')
     p.addGrid('solution','rows','cols')
     if areas:
-        p.addGrid('areas','rows','cols')
+        p.addGrid('areas','rows','cols',codec=C_INT)
 
 def addParamsSizeGrid(p: PuzzleParser, areas: bool = False):
     p.addInt('size')
     p.addGrid('problem','size','size')
     p.addGrid('solution','size','size')
     if areas:
-        p.addGrid('areas','size','size')
+        p.addGrid('areas','size','size',codec=C_INT)
 
 def addParamsLabelsRC(p: PuzzleParser, count: int = 1):
-    p.addGrid('rlabels',count,'rows')
-    p.addGrid('clabels',count,'cols')
+    p.addGrid('rlabels',count,'rows',codec=C_INT)
+    p.addGrid('clabels',count,'cols',codec=C_INT)
 
 def addParamsLabelsSize(p: PuzzleParser, count: int = 1):
-    p.addGrid('rlabels',count,'size')
-    p.addGrid('clabels',count,'size')
+    p.addGrid('rlabels',count,'size',codec=C_INT)
+    p.addGrid('clabels',count,'size',codec=C_INT)
 
 def addParamsLabelsRCDepth(p: PuzzleParser):
-    p.addGrid('rlabels','depth','rows')
-    p.addGrid('clabels','depth','cols')
+    p.addGrid('rlabels','depth','rows',codec=C_INT)
+    p.addGrid('clabels','depth','cols',codec=C_INT)
 
 def addParamsPattern(p: PuzzleParser):
     p.addInt('pattern')
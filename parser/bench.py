@@ -0,0 +1,189 @@
+'''
+Benchmarks of the parsing, extraction and serialization hot paths, to compare
+the speed of changes to PuzzleParser.py, PeekableIterator.py, extract_data.py
+and the JSON writing of parse_data.py.
+
+Usage: bench.py [--case NAME ...] [--repeat N] [--min-time SECONDS]
+           [--out FILE] [--compare FILE] [--data-dir DIR]
+
+The inputs are fixed and made from /data, so no downloaded pages are needed:
+.x-janko files are written back from the parsed puzzles (xjankoText) and htm
+pages are made by putting them in a script tag (htmlPage).
+Parsing is done by parse_data.parseFile (reading the file, trying the parsers of
+the type in order) on the texts written to a temporary directory, a text that
+no parser accepts is an error. Cases:
+sudoku4: parse the 4x4 Sudoku (small puzzles)
+nonograms: parse NONOGRAMS_LIMIT Nonograms (large puzzles with label grids)
+akari, araf: parse /Akari and /Araf, which try several parsers per file
+extract: extract_data.extractData on htm pages of EXTRACT_LIMIT Sudoku
+jsonl_encode: parse_data.writeJsonl of the Nonograms objects (to os.devnull)
+jsonl_decode: json.loads of the Nonograms objects as written by parse_data.py
+
+Each case is timed repeat times (after a warmup run), where each run repeats
+the workload until it takes at least min-time seconds. The median time per
+workload gives the throughput in puzzles/s and MB/s (of the input text, or of
+the JSON for encoding). Results are printed and saved as JSON with --out, and
+--compare prints the speedup over a saved result.
+'''
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import corpus
+
+NONOGRAMS_LIMIT = 500
+EXTRACT_LIMIT = 200
+
+# name -> (puzzles,input bytes,workload)
+Case = Tuple[int,int,Callable[[],Any]]
+
+def xjankoText(data: Dict[str,Any]) -> str:
+    ''' .x-janko file contents for a parse result (as extracted from a page). '''
+    lines = ['begin']
+    for prop,value in data.items():
+        prop = prop.rstrip('_') # renamed duplicate properties
+        if value is None:
+            lines.append(prop)
+        elif isinstance(value,list):
+            lines.append(prop)
+            lines += [' '.join(row) for row in value]
+        elif prop == 'moves':
+            lines += [prop,value]
+        else:
+            lines.append('%s %s'%(prop,value))
+    lines.append('end')
+    return '\n'.join(lines)+'\n'
+
+def htmlPage(text: str) -> str:
+    ''' Minimal htm page with the puzzle data like the ones on janko.at. '''
+    return '<!DOCTYPE html>\n<html>\n<head>\n<title>Puzzle</title>\n</head>\n<body>\n' \
+        '<div id="puzzle"></div>\n<script id="data" type="application/x-janko">\n' \
+        +text+'</script>\n</body>\n</html>\n'
+
+def _parseCase(puzzle: str, texts: List[str]) -> Case:
+    '''
+    Parse the texts with parse_data.parseFile, from files in a temporary
+    directory (which is removed when the case is no longer used).
+    '''
+    import parse_data
+    # the texts are made from parsed puzzles, which already have the edits
+    parse_data.setEditsFile(None)
+    for parser in parse_data.parsermap[puzzle]:
+        parser.setErrPrint(lambda s: None)
+    tmp_dir = tempfile.TemporaryDirectory()
+    files = []
+    for i,text in enumerate(texts):
+        files.append(os.path.join(tmp_dir.name,'%05d.x-janko'%i))
+        outf = open(files[-1],'w')
+        outf.write(text)
+        outf.close()
+    def run():
+        assert tmp_dir # keeps the files until the case is freed
+        for file in files:
+            result,_,errors = parse_data.parseFile(puzzle,file)
+            if result is None:
+                raise ValueError('not parsed: %s (%s)'%(file,'; '.join(errors)))
+    return len(texts),sum(len(t.encode()) for t in texts),run
+
+def makeCases(names: List[str], data_dir: str = corpus.data_dir) -> Dict[str,Case]:
+    ''' Build the inputs of the benchmark cases. '''
+    cases: Dict[str,Case] = dict()
+    objs: Dict[str,List[Dict[str,Any]]] = dict()
+    def load(puzzle: str) -> List[Dict[str,Any]]:
+        if puzzle not in objs:
+            objs[puzzle] = list(corpus.iterPuzzles(puzzle,data_dir))
+        return objs[puzzle]
+    for name in names:
+        if name == 'sudoku4':
+            texts = [xjankoText(o['data']) for o in load('/Sudoku') if o['data'].get('size') == 4]
+            cases[name] = _parseCase('/Sudoku',texts)
+        elif name == 'nonograms':
+            texts = [xjankoText(o['data']) for o in load('/Nonograms')[:NONOGRAMS_LIMIT]]
+            cases[name] = _parseCase('/Nonograms',texts)
+        elif name in ('akari','araf'):
+            puzzle = '/'+name.capitalize()
+            cases[name] = _parseCase(puzzle,[xjankoText(o['data']) for o in load(puzzle)])
+        elif name == 'extract':
+            import extract_data
+            pages = [htmlPage(xjankoText(o['data'])) for o in load('/Sudoku')[:EXTRACT_LIMIT]]
+            cases[name] = (len(pages),sum(len(p.encode()) for p in pages),
+                           lambda: [extract_data.extractData(p) for p in pages])
+        elif name == 'jsonl_encode':
+            nono = load('/Nonograms')[:NONOGRAMS_LIMIT]
+            size = sum(len(json.dumps(o,separators=(',',':')))+1 for o in nono)
+            import parse_data
+            cases[name] = (len(nono),size,lambda: parse_data.writeJsonl(os.devnull,nono))
+        elif name == 'jsonl_decode':
+            lines = [json.dumps(o,separators=(',',':')) for o in load('/Nonograms')[:NONOGRAMS_LIMIT]]
+            cases[name] = (len(lines),sum(len(l)+1 for l in lines),
+                           lambda: [json.loads(l) for l in lines])
+        else:
+            raise ValueError('unknown case: '+name)
+    return cases
+
+CASES = ['sudoku4','nonograms','akari','araf','extract','jsonl_encode','jsonl_decode']
+
+def timeCase(case: Case, repeat: int = 7, min_time: float = 0.2) -> Dict[str,Any]:
+    ''' Statistics of the time per workload run (see module docstring). '''
+    puzzles,size,run = case
+    run() # warmup
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter()-start
+        if elapsed >= min_time:
+            break
+        loops = max(loops*2,int(loops*min_time/max(elapsed,1e-9)))
+    times = [elapsed/loops]
+    for _ in range(repeat-1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        times.append((time.perf_counter()-start)/loops)
+    median = statistics.median(times)
+    return {'puzzles':puzzles,'bytes':size,'repeat':repeat,'loops':loops,
+            'median':median,'min':min(times),'mean':statistics.mean(times),
+            'stdev':statistics.stdev(times) if len(times) > 1 else 0.0,
+            'puzzles_per_s':puzzles/median,'mb_per_s':size/median/2**20}
+
+def runBenchmarks(names: List[str], repeat: int = 7, min_time: float = 0.2,
+        data_dir: str = corpus.data_dir) -> Dict[str,Any]:
+    cases = makeCases(names,data_dir)
+    results = {'python':sys.version.split()[0],'platform':platform.platform(),
+               'time':time.strftime('%Y-%m-%dT%H:%M:%S'),'cases':dict()}
+    for name in names:
+        results['cases'][name] = timeCase(cases[name],repeat,min_time)
+    return results
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='benchmark parsing and serialization')
+    ap.add_argument('--case',action='append',choices=CASES,help='cases to run (default all)')
+    ap.add_argument('--repeat',type=int,default=7)
+    ap.add_argument('--min-time',type=float,default=0.2)
+    ap.add_argument('--out',help='save the results to this JSON file')
+    ap.add_argument('--compare',help='results JSON file to compare with')
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    results = runBenchmarks(args.case or CASES,args.repeat,args.min_time,args.data_dir)
+    old: Optional[Dict[str,Any]] = None
+    if args.compare is not None:
+        old = json.load(open(args.compare,'r'))['cases']
+    for name,r in results['cases'].items():
+        line = '%-13s %9.1f puzzles/s %8.2f MB/s  median %.4fs +- %.4fs (%d x %d loops)'%(
+            name,r['puzzles_per_s'],r['mb_per_s'],r['median'],r['stdev'],r['repeat'],r['loops'])
+        if old is not None and name in old:
+            line += '  %.2fx'%(old[name]['median']/r['median'])
+        print(line)
+    if args.out is not None:
+        outf = open(args.out,'w')
+        outf.write(json.dumps(results,indent=1)+'\n')
+        outf.close()
@@ -0,0 +1,330 @@
+'''
+Block compressed JSONL files with a sidecar index. The lines of a JSONL file are
+split into blocks of a fixed number of puzzles and each block is compressed as
+an independent bz2 stream (or zstd frame). The streams are concatenated into one
+file, which is still a valid multi-stream bz2 file (readable by bzcat or
+bz2.open) or multi-frame zstd file (readable by zstdcat). The index is written
+next to it as <file>.index.json and looks like:
+
+{
+  "codec": "bz2",
+  "block_size": 256,
+  "blocks": [[offset,length,first,count], ...],
+  "files": ["/Sudoku/0001.a.x-janko", ...]
+}
+
+Each block is [byte offset, byte length, index of first line, line count] and
+"files" has the "file" key of every line in order. A single puzzle can be read
+by decompressing only its block, and blocks can be compressed or decompressed
+in parallel.
+
+The codec is chosen by the file extension (.bz2 or .zst). Zstandard needs the
+zstandard module and can use a dictionary trained on the corpus, which makes
+small blocks compress much better. Dictionaries are stored as .zdict files in
+the same directory as the data files (one per type or a single global one) and
+are found by the dictionary ID in the frame header when reading.
+
+Usage:
+block_jsonl.py convert <in_file> <out_file> [--block-size N] [--processes N]
+    [--dict FILE]
+block_jsonl.py get <file> <puzzle>
+block_jsonl.py train <dict_file> <in_files...> [--size N] [--samples N]
+The puzzle for get is either the file key (/Sudoku/0375.a.x-janko) or a number.
+'''
+
+import argparse
+import bz2
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError: # only needed for .zst files
+    zstandard = None
+
+BLOCK_SIZE = 256 # default number of puzzles per block
+ZSTD_LEVEL = 19
+ZDICT_SIZE = 112640 # default trained dictionary size (same as zstd --train)
+ZDICT_EXT = '.zdict'
+
+codecs = ['bz2','zst']
+
+# dictionary file -> (mtime,size,ZstdCompressionDict)
+_zdicts: Dict[str,Tuple[int,int,Any]] = dict()
+# (dictionary file,dictionary ID) -> compressor
+_zcompressors: Dict[Tuple[Optional[str],int],Any] = dict()
+
+file_key_re = re.compile(rb'^\{"file":"((?:[^"\\]|\\.)*)"')
+puzzle_num_re = re.compile(r'/(\d+)\.a\.x-janko$')
+
+def indexFileName(path: str) -> str:
+    return path+'.index.json'
+
+def codecForFile(path: str) -> Optional[str]:
+    ''' Codec implied by the file extension, None for uncompressed. '''
+    if path.endswith('.bz2'):
+        return 'bz2'
+    if path.endswith('.zst'):
+        return 'zst'
+    return None
+
+def _zstd() -> Any:
+    if zstandard is None:
+        raise ImportError('the zstandard module is required for .zst files')
+    return zstandard
+
+def loadDictionary(path: str) -> Any:
+    ''' Load (and cache) a zstd dictionary file, again if the file changed. '''
+    st = os.stat(path)
+    if path not in _zdicts or _zdicts[path][:2] != (st.st_mtime_ns,st.st_size):
+        zdict = _zstd().ZstdCompressionDict(open(path,'rb').read())
+        _zdicts[path] = (st.st_mtime_ns,st.st_size,zdict)
+    return _zdicts[path][2]
+
+def findDictionary(data_path: str, dict_id: int) -> str:
+    ''' Find the .zdict file with the given ID next to a data file. '''
+    data_dir = os.path.dirname(data_path) or '.'
+    for f in sorted(os.listdir(data_dir)):
+        if f.endswith(ZDICT_EXT):
+            path = os.path.join(data_dir,f)
+            if loadDictionary(path).dict_id() == dict_id:
+                return path
+    raise FileNotFoundError('no zstd dictionary with ID %d for: %s'%(dict_id,data_path))
+
+def _zstdDecompressor(path: str, frame: bytes) -> Any:
+    ''' Decompressor for a file given the start of its first frame. '''
+    dict_id = _zstd().get_frame_parameters(frame).dict_id if frame else 0
+    if dict_id == 0:
+        return zstandard.ZstdDecompressor()
+    zdict = loadDictionary(findDictionary(path,dict_id))
+    return zstandard.ZstdDecompressor(dict_data=zdict)
+
+def compressData(codec: str, data: bytes, zdict: Optional[str] = None) -> bytes:
+    ''' Compress data as one stream/frame, zdict is a dictionary file. '''
+    if codec == 'bz2':
+        assert zdict is None
+        return bz2.compress(data)
+    assert codec == 'zst'
+    dict_data = None if zdict is None else loadDictionary(zdict)
+    key = (zdict,0 if dict_data is None else dict_data.dict_id())
+    if key not in _zcompressors:
+        if dict_data is None:
+            _zcompressors[key] = _zstd().ZstdCompressor(level=ZSTD_LEVEL)
+        else:
+            _zcompressors[key] = _zstd().ZstdCompressor(level=ZSTD_LEVEL,dict_data=dict_data)
+    return _zcompressors[key].compress(data)
+
+def decompressData(codec: str, data: bytes, path: str) -> bytes:
+    ''' Decompress one stream/frame that was read from the file path. '''
+    if codec == 'bz2':
+        return bz2.decompress(data)
+    assert codec == 'zst'
+    return _zstdDecompressor(path,data).decompress(data)
+
+def puzzleNumber(file_key: str) -> Optional[int]:
+    ''' Puzzle number from a file key like /Sudoku/0375.a.x-janko (375). '''
+    m = puzzle_num_re.search(file_key)
+    return int(m.group(1)) if m else None
+
+def fileKey(line: bytes) -> str:
+    ''' Extract the "file" value from a JSONL line without decoding all of it. '''
+    m = file_key_re.match(line)
+    if m is None:
+        return json.loads(line)['file']
+    return json.loads(b'"'+m.group(1)+b'"')
+
+def _compressBlock(args: Tuple[str,bytes,Optional[str]]) -> bytes:
+    return compressData(*args)
+
+def _splitBlocks(lines: Iterable[bytes], block_size: int) -> Iterator[List[bytes]]:
+    block: List[bytes] = []
+    for line in lines:
+        block.append(line)
+        if len(block) == block_size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def writeBlocks(out_file: str, lines: Iterable[Union[str,bytes]],
+        block_size: int = BLOCK_SIZE, processes: int = 1, codec: str = 'bz2',
+        zdict: Optional[str] = None):
+    '''
+    Write lines (without trailing newlines) as independently compressed blocks
+    of block_size lines. A block_size of 0 writes everything as one block and
+    does not create an index (equivalent to a regular compressed file). For
+    zstd, zdict is an optional dictionary file.
+    '''
+    assert codec in codecs
+    assert zdict is None or codec == 'zst'
+    blines = (line.encode() if isinstance(line,str) else line for line in lines)
+    if block_size <= 0:
+        blocks: Iterator[List[bytes]] = iter([list(blines)])
+    else:
+        blocks = _splitBlocks(blines,block_size)
+    keys: List[str] = []
+    counts: List[int] = []
+    def blockData() -> Iterator[Tuple[str,bytes,Optional[str]]]:
+        for block in blocks:
+            keys.extend(fileKey(line) for line in block)
+            counts.append(len(block))
+            yield (codec,b''.join(line+b'\n' for line in block),zdict)
+    index_blocks: List[List[int]] = []
+    offset = 0
+    first = 0
+    outf = open(out_file,'wb')
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        compressed: Iterator[bytes] = pool.imap(_compressBlock,blockData())
+    else:
+        pool = None
+        compressed = map(_compressBlock,blockData())
+    for i,data in enumerate(compressed):
+        outf.write(data)
+        index_blocks.append([offset,len(data),first,counts[i]])
+        offset += len(data)
+        first += counts[i]
+    outf.close()
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if block_size > 0:
+        index = {'codec':codec,'block_size':block_size,
+                 'blocks':index_blocks,'files':keys}
+        outf = open(indexFileName(out_file),'w')
+        outf.write(json.dumps(index,separators=(',',':'))+'\n')
+        outf.close()
+    elif os.path.isfile(indexFileName(out_file)): # stale index
+        os.remove(indexFileName(out_file))
+
+def readIndex(path: str) -> Optional[Dict[str,Any]]:
+    ''' Load the index for a block file, None if it does not have one. '''
+    if not os.path.isfile(indexFileName(path)):
+        return None
+    return json.load(open(indexFileName(path),'r'))
+
+def readBlock(path: str, block: List[int], codec: str = 'bz2') -> List[bytes]:
+    ''' Decompress one block (an entry of the index "blocks") into lines. '''
+    offset,length = block[0],block[1]
+    with open(path,'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    return decompressData(codec,data,path).splitlines()
+
+def _readBlock(args: Tuple[str,List[int],str]) -> List[bytes]:
+    return readBlock(*args)
+
+def iterBlocks(path: str, index: Dict[str,Any], processes: int = 1) -> Iterator[List[bytes]]:
+    ''' Iterate over the lines of each block in order. '''
+    tasks = [(path,block,index['codec']) for block in index['blocks']]
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            yield from pool.imap(_readBlock,tasks)
+    else:
+        yield from map(_readBlock,tasks)
+
+def findPuzzle(index: Dict[str,Any], puzzle: Union[int,str]) -> Tuple[int,int]:
+    '''
+    Find the (block number, line in block) for a puzzle given by its file key or
+    its puzzle number. Raises KeyError if it is not in the index.
+    '''
+    files: List[str] = index['files']
+    if isinstance(puzzle,int):
+        pos = next((i for i,key in enumerate(files) if puzzleNumber(key) == puzzle),-1)
+    else:
+        pos = files.index(puzzle) if puzzle in files else -1
+    if pos < 0:
+        raise KeyError(puzzle)
+    lo,hi = 0,len(index['blocks'])
+    while hi-lo > 1: # last block with first <= pos
+        mid = (lo+hi)//2
+        if index['blocks'][mid][2] <= pos:
+            lo = mid
+        else:
+            hi = mid
+    return lo,pos-index['blocks'][lo][2]
+
+def getPuzzle(path: str, puzzle: Union[int,str],
+        index: Optional[Dict[str,Any]] = None) -> Dict[str,Any]:
+    ''' Read a single puzzle object by decompressing only its block. '''
+    if index is None:
+        index = readIndex(path)
+        if index is None:
+            raise ValueError('no block index for: '+path)
+    block,line = findPuzzle(index,puzzle)
+    return json.loads(readBlock(path,index['blocks'][block],index['codec'])[line])
+
+def readLines(path: str) -> Iterator[bytes]:
+    ''' Read lines from a plain or compressed (possibly multi-stream) file. '''
+    codec = codecForFile(path)
+    f: BinaryIO
+    if codec == 'bz2':
+        f = bz2.open(path,'rb')
+    elif codec == 'zst':
+        raw = open(path,'rb')
+        dctx = _zstdDecompressor(path,raw.read(18)) # max frame header size
+        raw.seek(0)
+        f = io.BufferedReader(dctx.stream_reader(raw,read_across_frames=True,
+                                                 closefd=True))
+    else:
+        f = open(path,'rb')
+    with f:
+        for line in f:
+            line = line.rstrip(b'\n')
+            if line:
+                yield line
+
+def trainDictionary(paths: List[str], dict_size: int = ZDICT_SIZE,
+        max_samples: int = 20000) -> bytes:
+    '''
+    Train a zstd dictionary using the lines of the given files as samples, using
+    a random subset of at most max_samples lines.
+    '''
+    samples = [line+b'\n' for path in paths for line in readLines(path)]
+    if len(samples) > max_samples:
+        samples = random.Random(0).sample(samples,max_samples)
+    return _zstd().train_dictionary(dict_size,samples).as_bytes()
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='block compressed JSONL files')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_convert = sp.add_parser('convert',help='rewrite a JSONL file as blocks')
+    ap_convert.add_argument('in_file')
+    ap_convert.add_argument('out_file')
+    ap_convert.add_argument('--block-size',type=int,default=BLOCK_SIZE)
+    ap_convert.add_argument('--processes',type=int,default=os.cpu_count() or 1)
+    ap_convert.add_argument('--dict',help='zstd dictionary file')
+    ap_get = sp.add_parser('get',help='print one puzzle from a block file')
+    ap_get.add_argument('file')
+    ap_get.add_argument('puzzle')
+    ap_train = sp.add_parser('train',help='train a zstd dictionary')
+    ap_train.add_argument('dict_file')
+    ap_train.add_argument('in_files',nargs='+')
+    ap_train.add_argument('--size',type=int,default=ZDICT_SIZE)
+    ap_train.add_argument('--samples',type=int,default=20000)
+    args = ap.parse_args()
+    if args.command == 'convert':
+        codec = codecForFile(args.out_file)
+        assert codec is not None
+        assert args.dict is None or codec == 'zst'
+        writeBlocks(args.out_file,readLines(args.in_file),args.block_size,
+                    args.processes,codec,args.dict)
+    elif args.command == 'get':
+        puzzle = int(args.puzzle) if args.puzzle.isdigit() else args.puzzle
+        try:
+            obj = getPuzzle(args.file,puzzle)
+        except KeyError:
+            print('puzzle not found: '+args.puzzle,file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(obj,separators=(',',':')))
+    elif args.command == 'train':
+        assert args.dict_file.endswith(ZDICT_EXT)
+        outf = open(args.dict_file,'wb')
+        outf.write(trainDictionary(args.in_files,args.size,args.samples))
+        outf.close()
@@ -0,0 +1,166 @@
+'''
+Consistency checks of the solutions of Latin square types (Sudoku and its
+variants, Futoshiki, Kendoku, Wolkenkratzer, ...), done for all puzzles of a
+type at once with array operations so they can run after every parse.
+
+Usage: check_latin.py [puzzle ...] [--data-dir DIR]
+Checks the given types (all types in LATIN_TYPES by default) and prints the
+files that fail a check. parse_data.py --check runs the checks on the puzzles it
+has just parsed.
+
+For a puzzle with a square n*n solution, the checks are:
+rows, cols: no value appears twice in a row or column
+symbols: all rows have the same values (so a wrong digit is found even if it
+    does not repeat), for types without blank cells
+boxes: no value appears twice in a box, the boxes are patternx columns by
+    patterny rows or, without a pattern, sqrt(n) by sqrt(n) if n is a square
+areas: no value appears twice in an area of the areas grid
+givens: cells given in the problem grid have the same value in the solution,
+    for types where the problem grid does not have other clues
+Blank cells ("-" or ".") are ignored. For types without blank cells, puzzles
+whose solution has blanks are skipped (they are combined grids like Samurai
+Sudoku). Problem cells that are not values of the solution are other kinds of
+clues and are not compared. Values are compared ignoring case
+(some problems give letters in lower case). Puzzles without a square solution
+are skipped.
+'''
+
+import argparse
+import math
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+import corpus
+from export_npz import EMPTY, Vocabulary, encodeGrids
+
+# check flags
+C_BOXES = 'b' # Sudoku boxes
+C_AREAS = 'a' # values are distinct in each area
+C_BLANKS = '-' # solutions may have blank cells
+C_CLUES = 'c' # the problem grid has clues instead of given values
+C_ZERO = '0' # 0 is a blank cell
+
+# puzzle type -> check flags (rows and columns are always checked)
+LATIN_TYPES: Dict[str,str] = {
+    '/Abc-End-View': C_BLANKS,
+    '/Factors': C_CLUES,
+    '/Futoshiki': '',
+    '/Kendoku': C_CLUES,
+    '/Mathrax': '',
+    '/Sudoku': C_BOXES+C_AREAS,
+    '/Sudoku-Kropki': C_BOXES,
+    '/Sudoku-Odd-Even': C_BOXES,
+    '/Sudoku-Randsummen': C_BOXES,
+    '/Sudoku/2D': '',
+    '/Sudoku/Chaos': C_AREAS,
+    '/Sudoku/Killer': C_BOXES+C_AREAS+C_CLUES,
+    '/Sudoku/Konsekutiv': '',
+    '/Sudoku/Kropki': C_BOXES,
+    '/Sudoku/Magic-Number': '',
+    '/Sudoku/Odd-Even': C_BOXES,
+    '/Sudoku/Randsummen': C_BOXES,
+    '/Sudoku/Vergleich': C_BOXES,
+    '/Sudoku/Wolkenkratzer': '',
+    '/Sukano': '',
+    '/Sumdoku': C_CLUES,
+    '/Wolkenkratzer': C_BLANKS+C_ZERO,
+    '/Wolkenkratzer-2': C_BLANKS,
+    '/Ziegelmauer': '',
+}
+
+def _duplicates(groups: np.ndarray, blank: int) -> np.ndarray:
+    ''' For (N,G,K) arrays, True for the puzzles with a repeated value in a group. '''
+    s = np.sort(groups,axis=2)
+    return ((s[:,:,1:] == s[:,:,:-1]) & (s[:,:,1:] != blank)).any(axis=(1,2))
+
+def _normalize(grid: Any, blanks: List[str]) -> Any:
+    if not isinstance(grid,list):
+        return None
+    return [[EMPTY if cell in blanks else cell.upper() for cell in row] for row in grid]
+
+def _boxShape(data: Dict[str,Any], n: int) -> Optional[Tuple[int,int]]:
+    ''' (rows,cols) of a box, None if the puzzle has no boxes. '''
+    px,py = data.get('patternx'),data.get('patterny')
+    if isinstance(px,int) and isinstance(py,int):
+        return (py,px) if px*py == n and n%px == 0 and n%py == 0 else None
+    root = math.isqrt(n)
+    return (root,root) if root*root == n and root > 1 else None
+
+def _checkGroup(sol: np.ndarray, prob: np.ndarray, areas: Optional[np.ndarray],
+        box: Optional[Tuple[int,int]], blank: int, flags: str) -> Dict[str,np.ndarray]:
+    ''' Failed checks for puzzles with the same size (and box shape). '''
+    N,n,_ = sol.shape
+    bad = {'rows':_duplicates(sol,blank),'cols':_duplicates(sol.transpose(0,2,1),blank)}
+    if C_BLANKS not in flags:
+        s = np.sort(sol,axis=2)
+        bad['symbols'] = (s != s[:,:1,:]).any(axis=(1,2))
+    if C_BOXES in flags and box is not None:
+        h,w = box
+        boxes = sol.reshape(N,n//h,h,n//w,w).transpose(0,1,3,2,4).reshape(N,-1,h*w)
+        bad['boxes'] = _duplicates(boxes,blank)
+    if C_AREAS in flags and areas is not None:
+        # combine area and value into one key per cell, repeated keys are
+        # repeated values within an area
+        key = areas.astype(np.int64)*(int(sol.max(initial=0))+1)+sol
+        key = np.where(sol == blank,-1-np.arange(n*n).reshape(n,n),key) # blanks never repeat
+        bad['areas'] = _duplicates(key.reshape(N,1,n*n),-1) & (areas >= 0).all(axis=(1,2))
+    if C_CLUES not in flags:
+        # problem cells that are not values of the solution are other clues
+        values = (prob[:,:,:,None] == sol.reshape(N,1,1,n*n)).any(axis=3)
+        bad['givens'] = ((prob != blank) & values & (prob != sol)).any(axis=(1,2))
+    return bad
+
+def checkObjects(puzzle: str, objs: List[Dict[str,Any]], flags: Optional[str] = None) \
+        -> Dict[str,List[str]]:
+    ''' File -> names of the failed checks, for the puzzles that fail any. '''
+    if flags is None:
+        flags = LATIN_TYPES.get(puzzle,'')
+    groups: Dict[Tuple[int,Optional[Tuple[int,int]]],List[int]] = dict()
+    for i,obj in enumerate(objs):
+        data = obj['data']
+        sol = data.get('solution')
+        if not isinstance(sol,list) or not sol or any(len(row) != len(sol) for row in sol):
+            continue
+        if C_BLANKS not in flags and any(cell in (EMPTY,'.') for row in sol for cell in row):
+            continue # not a single Latin square, such as a Samurai grid
+        groups.setdefault((len(sol),_boxShape(data,len(sol))),[]).append(i)
+    failed: Dict[str,List[str]] = dict()
+    for (n,box),indices in groups.items():
+        datas = [objs[i]['data'] for i in indices]
+        blanks = ['.','0'] if C_ZERO in flags else ['.']
+        sols = [_normalize(d['solution'],blanks) for d in datas]
+        probs = [_normalize(d.get('problem'),blanks) for d in datas]
+        probs = [p if p is not None and len(p) == n and all(len(r) == n for r in p) else None
+                 for p in probs]
+        vocab = Vocabulary()
+        vocab.addTokens(cell for grid in sols+probs for row in grid or [] for cell in row)
+        blank = vocab.code(EMPTY)
+        sol,_,_ = encodeGrids(sols,vocab,(n,n))
+        prob,_,mask = encodeGrids(probs,vocab,(n,n))
+        prob = np.where(mask,prob,blank)
+        areas = None
+        if C_AREAS in flags:
+            area_vocab = Vocabulary()
+            grids = [d.get('areas') if isinstance(d.get('areas'),list) else None for d in datas]
+            areas,dims,_ = encodeGrids(grids,area_vocab,(n,n))
+            areas = np.where((dims == n).all(axis=1)[:,None,None],areas.astype(np.int64),-1)
+        bad = _checkGroup(sol.astype(np.int64),prob.astype(np.int64),areas,box,blank,flags)
+        for name,mask in bad.items():
+            for k in np.flatnonzero(mask).tolist():
+                failed.setdefault(objs[indices[k]]['file'],[]).append(name)
+    return failed
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='check the solutions of Latin square types')
+    ap.add_argument('puzzles',nargs='*',help='puzzle types (default all Latin square types)')
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    total = 0
+    for puzzle in args.puzzles or sorted(LATIN_TYPES):
+        objs = list(corpus.iterPuzzles(puzzle,args.data_dir))
+        failed = checkObjects(puzzle,objs)
+        total += len(failed)
+        for file,checks in sorted(failed.items()):
+            print('%s: %s'%(file,','.join(checks)))
+        print('%s: %d puzzles, %d failed'%(puzzle,len(objs),len(failed)))
+    print('total: %d failed'%total)
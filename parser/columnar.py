@@ -0,0 +1,191 @@
+'''
+Binary columnar store of the whole corpus, readable with mmap. It is built from
+the parsed data (corpus.py) into a directory of .npy files, each one a column
+that is opened with np.load(mmap_mode='r') the first time it is used, so opening
+the store only reads meta.json and scanning a column only touches its own pages.
+
+Usage: columnar.py build <out_dir> [--props problem,solution,areas]
+       columnar.py info <dir>
+
+Files in the directory (N is the number of puzzles):
+meta.json: count, string tables (types, authors, solvers, sources), the cell
+    token table and the list of grid properties
+type.npy: (N,) uint16 index into types
+number.npy: (N,) int32 puzzle number from the file name (-1 if there is none)
+rows.npy, cols.npy, size.npy: (N,) int16 (-1 if missing)
+author.npy, solver.npy, source.npy: (N,) int32 index into the string tables
+    (-1 if missing)
+file_bytes.npy, file_offsets.npy: UTF-8 file keys in one arena, key i is
+    file_bytes[file_offsets[i]:file_offsets[i+1]]
+<prop>_cells.npy: uint16 cell arena, codes index into the token table (code 0
+    is padding for jagged rows)
+<prop>_offsets.npy: (N+1,) int64 start of each grid in the cell arena
+<prop>_dims.npy: (N,2) int16 rows and (max) columns of each grid, (0,0) if the
+    puzzle does not have it
+
+Example:
+from columnar import ColumnStore
+store = ColumnStore('../corpus_columns')
+sudoku = store.typeIndices('/Sudoku')
+big = sudoku[store.column('size')[sudoku] >= 9]
+store.grid(int(big[0]),'problem') # (9,9) view of cell codes
+'''
+
+import argparse
+import array
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+import block_jsonl
+import corpus
+
+GRID_PROPS = ['problem','solution','areas']
+PAD = '' # token for code 0
+
+class _StringTable:
+    ''' Assigns indices to strings in order of first appearance. '''
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings: List[str] = [] if strings is None else strings
+        self._index = {s:i for i,s in enumerate(self.strings)}
+    def index(self, s: Optional[Any]) -> int:
+        if s is None:
+            return -1
+        s = str(s)
+        if s not in self._index:
+            self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return self._index[s]
+
+def _intOrMissing(value: Any) -> int:
+    return value if isinstance(value,int) else -1
+
+def build(out_dir: str, props: List[str] = GRID_PROPS, data_dir: str = corpus.data_dir):
+    ''' Build the store from all the data files in data_dir. '''
+    if not os.path.isdir(out_dir):
+        os.mkdir(out_dir)
+    types = _StringTable()
+    authors = _StringTable()
+    solvers = _StringTable()
+    sources = _StringTable()
+    tokens = _StringTable([PAD])
+    cols: Dict[str,array.array] = {
+        'type':array.array('H'), 'number':array.array('i'),
+        'rows':array.array('h'), 'cols':array.array('h'), 'size':array.array('h'),
+        'author':array.array('i'), 'solver':array.array('i'), 'source':array.array('i'),
+    }
+    file_bytes = bytearray()
+    file_offsets = array.array('q',[0])
+    cells = {p:array.array('H') for p in props}
+    offsets = {p:array.array('q',[0]) for p in props}
+    dims = {p:array.array('h') for p in props}
+    for puzzle in corpus.listTypes(data_dir):
+        type_id = types.index(puzzle)
+        for obj in corpus.iterPuzzles(puzzle,data_dir):
+            data = obj['data']
+            num = block_jsonl.puzzleNumber(obj['file'])
+            cols['type'].append(type_id)
+            cols['number'].append(-1 if num is None else num)
+            cols['rows'].append(_intOrMissing(data.get('rows')))
+            cols['cols'].append(_intOrMissing(data.get('cols')))
+            cols['size'].append(_intOrMissing(data.get('size')))
+            cols['author'].append(authors.index(data.get('author')))
+            cols['solver'].append(solvers.index(data.get('solver')))
+            cols['source'].append(sources.index(data.get('source')))
+            file_bytes += obj['file'].encode()
+            file_offsets.append(len(file_bytes))
+            for p in props:
+                grid = data.get(p)
+                if not isinstance(grid,list):
+                    grid = []
+                width = max((len(row) for row in grid),default=0)
+                for row in grid:
+                    cells[p].extend(tokens.index(cell) for cell in row)
+                    cells[p].extend([0]*(width-len(row)))
+                offsets[p].append(len(cells[p]))
+                dims[p].extend((len(grid),width))
+    assert len(tokens.strings) <= 2**16, 'too many distinct cells for uint16'
+    def save(name: str, data: Any, dtype: Any):
+        np.save(os.path.join(out_dir,name+'.npy'),np.frombuffer(data,dtype=dtype))
+    for name,col in cols.items():
+        save(name,col,np.dtype(col.typecode))
+    save('file_bytes',bytes(file_bytes),np.uint8)
+    save('file_offsets',file_offsets,np.int64)
+    for p in props:
+        save(p+'_cells',cells[p],np.uint16)
+        save(p+'_offsets',offsets[p],np.int64)
+        np.save(os.path.join(out_dir,p+'_dims.npy'),
+                np.frombuffer(dims[p],dtype=np.int16).reshape(-1,2))
+    meta = {'count':len(cols['type']),'types':types.strings,'authors':authors.strings,
+            'solvers':solvers.strings,'sources':sources.strings,
+            'tokens':tokens.strings,'grids':props}
+    outf = open(os.path.join(out_dir,'meta.json'),'w')
+    outf.write(json.dumps(meta,separators=(',',':'))+'\n')
+    outf.close()
+
+class ColumnStore:
+    '''
+    Read access to a store built with build(). Columns are memory mapped on
+    first use and grids are returned as views into the cell arena.
+    '''
+    path: str
+    meta: Dict[str,Any]
+    _columns: Dict[str,np.ndarray]
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = json.load(open(os.path.join(path,'meta.json'),'r'))
+        self._columns = dict()
+    def __len__(self) -> int:
+        return self.meta['count']
+    def column(self, name: str) -> np.ndarray:
+        ''' Memory mapped column (such as "size" or "problem_cells"). '''
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path,name+'.npy'),mmap_mode='r')
+        return self._columns[name]
+    def typeIndices(self, puzzle: str) -> np.ndarray:
+        ''' Indices of the puzzles of a type (empty if it is not in the store). '''
+        if puzzle not in self.meta['types']:
+            return np.zeros(0,dtype=np.int64)
+        return np.flatnonzero(self.column('type') == self.meta['types'].index(puzzle))
+    def file(self, i: int) -> str:
+        offsets = self.column('file_offsets')
+        return bytes(self.column('file_bytes')[offsets[i]:offsets[i+1]]).decode()
+    def string(self, column: str, i: int) -> Optional[str]:
+        ''' Value of a string table column (author, solver, source) for puzzle i. '''
+        index = int(self.column(column)[i])
+        return None if index < 0 else self.meta[column+'s'][index]
+    def grid(self, i: int, prop: str) -> Optional[np.ndarray]:
+        ''' (rows,cols) view of the cell codes of a grid, None if missing. '''
+        rows,cols = self.column(prop+'_dims')[i]
+        if rows == 0:
+            return None
+        offsets = self.column(prop+'_offsets')
+        return self.column(prop+'_cells')[offsets[i]:offsets[i+1]].reshape(rows,cols)
+    def gridStrings(self, i: int, prop: str) -> Optional[List[List[str]]]:
+        ''' Grid in the JSON format (jagged rows lose their padding). '''
+        grid = self.grid(i,prop)
+        if grid is None:
+            return None
+        tokens = self.meta['tokens']
+        return [[tokens[c] for c in row if c != 0] for row in grid.tolist()]
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='columnar store of the corpus')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_build = sp.add_parser('build',help='build the store from the data files')
+    ap_build.add_argument('out_dir')
+    ap_build.add_argument('--props',default=','.join(GRID_PROPS))
+    ap_build.add_argument('--data-dir',default=corpus.data_dir)
+    ap_info = sp.add_parser('info',help='print a summary of a store')
+    ap_info.add_argument('dir')
+    args = ap.parse_args()
+    if args.command == 'build':
+        build(args.out_dir,args.props.split(','),args.data_dir)
+    elif args.command == 'info':
+        store = ColumnStore(args.dir)
+        print('%d puzzles, %d types, %d authors, %d cell tokens'%(len(store),
+              len(store.meta['types']),len(store.meta['authors']),len(store.meta['tokens'])))
+        counts = np.bincount(store.column('type'),minlength=len(store.meta['types']))
+        for puzzle,count in zip(store.meta['types'],counts.tolist()):
+            print('%s: %d'%(puzzle,count))
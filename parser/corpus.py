@@ -0,0 +1,185 @@
+'''
+Reading the parsed puzzle data (the JSONL files in /data). Each puzzle type has
+one file named after its path relative to /Raetsel with '/' replaced by '_', so
+/Heyawake/AYE is in Heyawake_AYE.jsonl.bz2 (or .jsonl.zst, see block_jsonl.py
+for the compressed formats). A type written as shards (see shards.py) is read
+through its manifest, such as Nonograms.manifest.json, which is used before a
+single data file of the type. The shard files themselves
+(Nonograms.0000.jsonl.bz2, ...) are not types. Puzzles are given as the objects
+that were written by parse_data.py: {"file":"/Sudoku/0001.a.x-janko",
+"data":...}. Files written with compact grids (parse_data.py --compact) are
+converted back to the default format unless decode=False.
+
+Example:
+import corpus
+for obj in corpus.iterPuzzles('/Sudoku'):
+    print(obj['file'],obj['data']['author'])
+
+Iteration is lazy so memory use does not depend on the size of the corpus. With
+parallel=True, decompression and JSON decoding are done by a process pool and
+the puzzles are still produced in order. Files with a block index (written with
+block_jsonl.py) are split into one task per block, other files (and shards) are
+one task.
+
+With intern=True, property names, string values and grid cells are interned
+(sys.intern), so puzzles kept in memory share one object per distinct string
+instead of each holding its own copies of "-", author names, sources and so on.
+Strings longer than INTERN_MAX_LEN (such as moves) are left alone.
+'''
+
+import collections
+import json
+import multiprocessing
+import os
+import re
+import sys
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import block_jsonl
+import grid_codecs
+import shards
+
+data_dir = os.path.normpath('../data/')
+
+# supported data file extensions, in order of preference (zstd decompresses
+# much faster than bz2 so it is used if a type has both)
+extensions = ['.jsonl.zst','.jsonl.bz2','.jsonl']
+
+# matches any of the extensions
+data_ext_re = re.compile(r'\.jsonl(\.bz2|\.zst)?$')
+
+# manifest of a sharded type, used before a single data file of the type
+manifest_ext = '.manifest.json'
+
+# shard number at the end of a shard file stem (Nonograms.0000)
+shard_re = re.compile(r'\.\d{4,}$')
+
+# longest string value that is interned
+INTERN_MAX_LEN = 256
+
+# task for a worker process: (path,block,codec,decode), block (and codec) are None
+# for a whole file, decode converts compact grids back (see iterPuzzles)
+Task = Tuple[str,Optional[List[int]],Optional[str],bool]
+
+def typeFileStem(puzzle: str) -> str:
+    ''' File name (without extension) for a puzzle type such as /Heyawake/AYE. '''
+    assert puzzle.startswith('/')
+    return puzzle[1:].replace('/','_')
+
+def typeFromFileName(file_name: str) -> Optional[str]:
+    ''' Puzzle type for a data file name, None if it is not a data file. '''
+    for ext in extensions+[manifest_ext]:
+        if file_name.endswith(ext):
+            stem = file_name[:-len(ext)]
+            if shard_re.search(stem):
+                return None
+            return '/'+stem.replace('_','/')
+    return None
+
+def listTypes(data_dir: str = data_dir) -> List[str]:
+    ''' Sorted list of puzzle types which have a data file. '''
+    types = set()
+    for f in os.listdir(data_dir):
+        puzzle = typeFromFileName(f)
+        if puzzle is not None:
+            types.add(puzzle)
+    return sorted(types)
+
+def dataFile(puzzle: str, data_dir: str = data_dir) -> str:
+    ''' Path of the shard manifest or data file for a puzzle type. '''
+    for ext in [manifest_ext]+extensions:
+        path = os.path.join(data_dir,typeFileStem(puzzle)+ext)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError('no data file for: '+puzzle)
+
+def _typeList(puzzles: Union[None,str,Iterable[str]], data_dir: str) -> List[str]:
+    if puzzles is None:
+        return listTypes(data_dir)
+    if isinstance(puzzles,str):
+        return [puzzles]
+    return list(puzzles)
+
+def isManifest(path: str) -> bool:
+    return path.endswith(manifest_ext)
+
+def readLines(path: str) -> Iterator[bytes]:
+    ''' Lines of a data file or of all shards of a manifest (see dataFile). '''
+    if isManifest(path):
+        return shards.readLines(path)
+    return block_jsonl.readLines(path)
+
+def iterLines(puzzles: Union[None,str,Iterable[str]] = None,
+        data_dir: str = data_dir) -> Iterator[bytes]:
+    ''' Raw JSONL lines (as bytes, no newline) for the given puzzle types. '''
+    for puzzle in _typeList(puzzles,data_dir):
+        yield from readLines(dataFile(puzzle,data_dir))
+
+def _internValue(value: Any) -> Any:
+    if isinstance(value,str):
+        return sys.intern(value) if len(value) <= INTERN_MAX_LEN else value
+    if isinstance(value,list):
+        return [_internValue(v) for v in value]
+    if isinstance(value,dict):
+        return {sys.intern(k):_internValue(v) for k,v in value.items()}
+    return value
+
+def internObject(obj: Dict[str,Any]) -> Dict[str,Any]:
+    ''' Puzzle object with its strings interned (see module docstring). '''
+    return {'file':obj['file'],'data':_internValue(obj['data'])}
+
+def _decodeTask(task: Task) -> List[Dict[str,Any]]:
+    path,block,codec,decode = task
+    if block is None:
+        lines: Iterable[bytes] = block_jsonl.readLines(path)
+    else:
+        assert codec is not None
+        lines = block_jsonl.readBlock(path,block,codec)
+    if decode:
+        return [grid_codecs.decodeObject(json.loads(line)) for line in lines]
+    return [json.loads(line) for line in lines]
+
+def _tasks(puzzles: List[str], data_dir: str, decode: bool) -> Iterator[Task]:
+    for puzzle in puzzles:
+        path = dataFile(puzzle,data_dir)
+        for path in shards.shardPaths(path) if isManifest(path) else [path]:
+            index = block_jsonl.readIndex(path)
+            if index is None:
+                yield (path,None,None,decode)
+            else:
+                for block in index['blocks']:
+                    yield (path,block,index['codec'],decode)
+
+def _results(objs: List[Dict[str,Any]], intern: bool) -> List[Dict[str,Any]]:
+    return [internObject(obj) for obj in objs] if intern else objs
+
+def iterPuzzles(puzzles: Union[None,str,Iterable[str]] = None,
+        data_dir: str = data_dir, parallel: bool = False,
+        processes: Optional[int] = None, decode: bool = True,
+        intern: bool = False) -> Iterator[Dict[str,Any]]:
+    '''
+    Iterate over the puzzle objects of the given types (a type such as /Sudoku,
+    a list of types, or None for all types). Only the data files of the given
+    types are opened. The parallel mode keeps at most 2 tasks per process in
+    flight so memory stays bounded when the consumer is slower than the pool.
+    Interning is done in this process since interned strings are not shared
+    across processes.
+    '''
+    types = _typeList(puzzles,data_dir)
+    if not parallel:
+        for line in iterLines(types,data_dir):
+            obj = json.loads(line)
+            if decode:
+                obj = grid_codecs.decodeObject(obj)
+            yield internObject(obj) if intern else obj
+        return
+    if processes is None:
+        processes = os.cpu_count() or 1
+    pending: Deque[Any] = collections.deque()
+    with multiprocessing.Pool(processes) as pool:
+        for task in _tasks(types,data_dir,decode):
+            pending.append(pool.apply_async(_decodeTask,(task,)))
+            if len(pending) >= 2*processes:
+                yield from _results(pending.popleft().get(),intern)
+        while pending:
+            yield from _results(pending.popleft().get(),intern)
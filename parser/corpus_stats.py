@@ -0,0 +1,141 @@
+'''
+Summary statistics of the parsed puzzles, stored as small JSON sidecar files so
+overviews of the corpus do not need to decode any puzzle data.
+
+parse_data.py writes <name>.stats.json next to each output file <name>.jsonl
+(or .jsonl.bz2, .jsonl.zst) with:
+type: puzzle type such as /Sudoku
+count: number of puzzles
+failed: number of files that could not be parsed, failed_files lists them
+dims: "<rows>x<cols>" -> count (from rows/cols or size)
+sizes: size -> count, for puzzles with a size property
+authors, solvers: name -> count
+props: property -> number of puzzles that have it
+
+The rollup (stats.json in the same directory) combines all the sidecars into
+totals, per type counts and overall author/solver/property frequencies.
+
+Usage: corpus_stats.py build [--data-dir DIR]
+       corpus_stats.py show [puzzle] [--data-dir DIR]
+build computes the sidecars for existing data files (failure counts are not
+known there, so they are kept from an existing sidecar) and the rollup. show
+prints the rollup or the sidecar of one type.
+'''
+
+import argparse
+import collections
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import corpus
+
+ROLLUP_FILE = 'stats.json'
+
+def statsFileName(data_file: str) -> str:
+    ''' Sidecar path for a data file, such as Sudoku.jsonl.bz2 -> Sudoku.stats.json. '''
+    if data_file.endswith(corpus.manifest_ext): # sharded type (see shards.py)
+        return data_file[:-len(corpus.manifest_ext)]+'.stats.json'
+    return corpus.data_ext_re.sub('',data_file)+'.stats.json'
+
+def _sorted(counter: Dict[Any,int]) -> Dict[str,int]:
+    ''' Counts as a dict ordered by decreasing count. '''
+    return {str(k):v for k,v in sorted(counter.items(),key=lambda kv:(-kv[1],str(kv[0])))}
+
+def computeStats(puzzle: str, objs: Iterable[Dict[str,Any]],
+        failed_files: Optional[List[str]] = None) -> Dict[str,Any]:
+    ''' Statistics for the puzzle objects of a type (see module docstring). '''
+    count = 0
+    dims: Dict[str,int] = collections.Counter()
+    sizes: Dict[int,int] = collections.Counter()
+    authors: Dict[str,int] = collections.Counter()
+    solvers: Dict[str,int] = collections.Counter()
+    props: Dict[str,int] = collections.Counter()
+    for obj in objs:
+        data = obj['data']
+        count += 1
+        rows = data.get('rows',data.get('size'))
+        cols = data.get('cols',data.get('size'))
+        if rows is not None and cols is not None:
+            dims['%sx%s'%(rows,cols)] += 1
+        if 'size' in data:
+            sizes[data['size']] += 1
+        if 'author' in data:
+            authors[data['author']] += 1
+        if 'solver' in data:
+            solvers[data['solver']] += 1
+        props.update(data.keys())
+    stats: Dict[str,Any] = {'type':puzzle,'count':count}
+    if failed_files is not None:
+        stats['failed'] = len(failed_files)
+        stats['failed_files'] = failed_files
+    stats['dims'] = _sorted(dims)
+    stats['sizes'] = _sorted(sizes)
+    stats['authors'] = _sorted(authors)
+    stats['solvers'] = _sorted(solvers)
+    stats['props'] = _sorted(props)
+    return stats
+
+def writeStats(path: str, stats: Dict[str,Any]):
+    outf = open(path,'w')
+    outf.write(json.dumps(stats,indent=1)+'\n')
+    outf.close()
+
+def readStats(path: str) -> Optional[Dict[str,Any]]:
+    if not os.path.isfile(path):
+        return None
+    return json.load(open(path,'r'))
+
+def rollup(data_dir: str = corpus.data_dir) -> Dict[str,Any]:
+    ''' Combine the sidecars in a directory and write the rollup file. '''
+    total = 0
+    failed = 0
+    types: Dict[str,Dict[str,Any]] = dict()
+    authors: Dict[str,int] = collections.Counter()
+    solvers: Dict[str,int] = collections.Counter()
+    props: Dict[str,int] = collections.Counter()
+    for f in sorted(os.listdir(data_dir)):
+        if not f.endswith('.stats.json'):
+            continue
+        stats = json.load(open(os.path.join(data_dir,f),'r'))
+        total += stats['count']
+        failed += stats.get('failed',0)
+        types[stats['type']] = {'count':stats['count'],'failed':stats.get('failed'),
+                                'dims':len(stats['dims']),'authors':len(stats['authors'])}
+        authors.update(stats['authors'])
+        solvers.update(stats['solvers'])
+        props.update(stats['props'])
+    result = {'count':total,'failed':failed,'types':types,'authors':_sorted(authors),
+              'solvers':_sorted(solvers),'props':_sorted(props)}
+    writeStats(os.path.join(data_dir,ROLLUP_FILE),result)
+    return result
+
+def buildStats(data_dir: str = corpus.data_dir):
+    ''' Compute the sidecars for the data files and the rollup. '''
+    for puzzle in corpus.listTypes(data_dir):
+        path = statsFileName(corpus.dataFile(puzzle,data_dir))
+        old = readStats(path)
+        failed = old.get('failed_files') if old is not None else None
+        writeStats(path,computeStats(puzzle,corpus.iterPuzzles(puzzle,data_dir),failed))
+    rollup(data_dir)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='corpus statistics sidecars')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_build = sp.add_parser('build',help='compute sidecars and the rollup')
+    ap_build.add_argument('--data-dir',default=corpus.data_dir)
+    ap_show = sp.add_parser('show',help='print the rollup or the stats of a type')
+    ap_show.add_argument('puzzle',nargs='?')
+    ap_show.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    if args.command == 'build':
+        buildStats(args.data_dir)
+    elif args.command == 'show':
+        if args.puzzle is None:
+            path = os.path.join(args.data_dir,ROLLUP_FILE)
+        else:
+            path = statsFileName(corpus.dataFile(args.puzzle,args.data_dir))
+        stats = readStats(path)
+        if stats is None:
+            ap.error('no statistics file: '+path)
+        print(json.dumps(stats,indent=1))
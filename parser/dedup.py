@@ -0,0 +1,98 @@
+'''
+Exact duplicate detection. The fingerprint of a puzzle is a hash of all of its
+properties except the metadata in METADATA_PROPS (author, source, moves, ...),
+so the dimensions, grids (problem, solution, areas, labels, ...) and other clues
+(such as patternx or diagonals) are part of it, and puzzles stored under two
+names, like the 3 digit pages that were copied to 4 digit ones (see
+download_extra.py), or repeated in another type get the same fingerprint. The
+puzzle type is not part of it.
+
+Usage: dedup.py report [puzzle ...] [--data-dir DIR]
+       dedup.py index <out_file> [puzzle ...] [--data-dir DIR]
+report prints each group of duplicates (within and across the given types, all
+by default) as a JSON list of file keys. index writes the groups to a JSON file
+{fingerprint: [file, ...]} which parse_data.py --dedup-index uses to leave out
+all but the first puzzle of each group. parse_data.py --dedup removes
+duplicates within the type being parsed.
+'''
+
+import argparse
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import corpus
+
+# properties that describe where a puzzle comes from rather than the puzzle (also
+# with the '_' suffixes that duplicate properties get when parsing)
+METADATA_PROPS = {'puzzle','author','solver','source','info','infotext','title','pid',
+                  'date','rights','mail','unit','unitsize','moves','begin'}
+DIM_PROPS = {'rows','cols','size'}
+
+def fingerprint(data: Dict[str,Any]) -> Optional[str]:
+    ''' Hex fingerprint of a parse result, None if it has no grids. '''
+    if not any(isinstance(value,list) for value in data.values()):
+        return None
+    # the dimensions as rows and cols, given by some puzzles as a size
+    rows = data.get('rows',data.get('size'))
+    cols = data.get('cols',data.get('size'))
+    props = sorted((prop,value) for prop,value in data.items()
+                   if prop.rstrip('_') not in METADATA_PROPS and prop not in DIM_PROPS)
+    text = json.dumps([rows,cols,props],separators=(',',':'))
+    return hashlib.blake2b(text.encode(),digest_size=16).hexdigest()
+
+def duplicateGroups(objs: Iterable[Dict[str,Any]]) -> Dict[str,List[str]]:
+    ''' Fingerprint -> file keys, for fingerprints shared by several puzzles. '''
+    files: Dict[str,List[str]] = dict()
+    for obj in objs:
+        fp = fingerprint(obj['data'])
+        if fp is not None:
+            files.setdefault(fp,[]).append(obj['file'])
+    return {fp:group for fp,group in files.items() if len(group) > 1}
+
+def dropDuplicates(objs: Iterable[Dict[str,Any]], seen: Optional[Dict[str,str]] = None,
+        dropped: Optional[List[str]] = None) -> Iterable[Dict[str,Any]]:
+    '''
+    Puzzle objects without the ones whose fingerprint was already seen (seen
+    maps fingerprints to the first file). Removed file keys are added to
+    dropped if it is given.
+    '''
+    if seen is None:
+        seen = dict()
+    for obj in objs:
+        fp = fingerprint(obj['data'])
+        if fp is not None and fp in seen:
+            if dropped is not None:
+                dropped.append(obj['file'])
+            continue
+        if fp is not None:
+            seen[fp] = obj['file']
+        yield obj
+
+def readIndex(path: str) -> Dict[str,List[str]]:
+    return json.load(open(path,'r'))
+
+def droppedFiles(index: Dict[str,List[str]]) -> List[str]:
+    ''' Files to leave out with an index (all but the first of each group). '''
+    return [f for group in index.values() for f in group[1:]]
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='find duplicate puzzles')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_report = sp.add_parser('report',help='print groups of duplicates')
+    ap_report.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap_report.add_argument('--data-dir',default=corpus.data_dir)
+    ap_index = sp.add_parser('index',help='write the groups of duplicates to a file')
+    ap_index.add_argument('out_file')
+    ap_index.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap_index.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    groups = duplicateGroups(corpus.iterPuzzles(args.puzzles or None,args.data_dir))
+    if args.command == 'report':
+        for group in groups.values():
+            print(json.dumps(group))
+        print('%d groups, %d duplicates'%(len(groups),len(droppedFiles(groups))))
+    elif args.command == 'index':
+        outf = open(args.out_file,'w')
+        outf.write(json.dumps(groups,indent=1)+'\n')
+        outf.close()
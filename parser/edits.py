@@ -0,0 +1,137 @@
+'''
+Edits to puzzle files that are applied when they are parsed, so the extracted
+.x-janko files do not have to be changed by hand (and stay as extracted when
+extract_data.py or download_extra.py run again). The edits are in edits.json,
+a list of operations for each file key:
+{
+    "/Area-51/012.a.x-janko": [{"op": "set", "prop": "rows", "value": "15"}],
+    "/Araf/Inequality.x-janko": [{"op": "skip"}],
+    ...
+}
+The operations work on the lines of the file as the parser sees them (with
+whitespace stripped and empty lines removed), in order:
+set: the first line of the single line property prop becomes "prop value"
+replace: old is replaced with new in each line (with "regex": true, old is a
+    regular expression and new may use its groups), or only in the line with
+    index "line" (negative from the end); "\\n" in new splits the line
+delete_line: the first line equal to match (a regular expression with
+    "regex": true) is deleted, with the "count"-1 lines after it (default 1)
+insert_before: text (lines separated by "\\n") is inserted before the first line
+    equal to (or matching) match
+skip: the file is not parsed (puzzles that need special handling)
+An operation that finds nothing to change is not an error (the file may already
+have been edited by hand), parse_data.py prints a warning for it. Edits that
+need the contents of the file to write (mostly grid rows), or that would change
+a file already edited by hand again (removing one of two repeated lines,
+inserting a line), are still described in edits.txt.
+
+Usage: edits.py check [--edits FILE]
+Applies the edits to the files in puzzle_x-janko and prints the ones that find
+nothing to change or whose file does not exist.
+'''
+
+import argparse
+import json
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+EDITS_FILE = 'edits.json'
+
+OPS = ['set','replace','delete_line','insert_before','skip']
+
+Edit = Dict[str,Any]
+
+def loadEdits(path: str = EDITS_FILE) -> Dict[str,List[Edit]]:
+    ''' File key -> operations, checking that the operations are valid. '''
+    edits: Dict[str,List[Edit]] = json.load(open(path,'r'))
+    for file,ops in edits.items():
+        for op in ops:
+            if op.get('op') not in OPS:
+                raise ValueError('%s: unknown edit operation: %s'%(file,json.dumps(op)))
+    return edits
+
+def isSkipped(ops: List[Edit]) -> bool:
+    return any(op['op'] == 'skip' for op in ops)
+
+def _matches(op: Edit, line: str) -> bool:
+    if op.get('regex',False):
+        return re.fullmatch(op['match'],line) is not None
+    return line == op['match']
+
+def _find(op: Edit, lines: List[str]) -> int:
+    return next((i for i,line in enumerate(lines) if _matches(op,line)),-1)
+
+def _applyOne(op: Edit, lines: List[str]) -> bool:
+    ''' Apply an operation to lines in place, False if nothing was changed. '''
+    name = op['op']
+    if name == 'set':
+        for i,line in enumerate(lines):
+            if line.split()[0] == op['prop']:
+                new = '%s %s'%(op['prop'],op['value'])
+                if line == new:
+                    return False
+                lines[i] = new
+                return True
+        return False
+    if name == 'replace':
+        indexes = range(len(lines)) if 'line' not in op else [op['line']%len(lines)]
+        changed = False
+        for i in indexes:
+            if op.get('regex',False):
+                new = re.sub(op['old'],op['new'],lines[i])
+            else:
+                new = lines[i].replace(op['old'],op['new'])
+            changed |= new != lines[i]
+            lines[i] = new
+        return changed
+    if name == 'delete_line':
+        i = _find(op,lines)
+        if i < 0:
+            return False
+        del lines[i:i+op.get('count',1)]
+        return True
+    if name == 'insert_before':
+        i = _find(op,lines)
+        if i < 0:
+            return False
+        lines[i:i] = op['text'].split('\n')
+        return True
+    return True # skip is handled by the caller
+
+def applyEdits(lines: List[str], ops: List[Edit]) -> Tuple[List[str],List[Edit]]:
+    '''
+    Apply the operations to the stripped nonempty lines of a file. Returns the
+    edited lines (also stripped and nonempty) and the operations that found
+    nothing to change.
+    '''
+    lines = list(lines)
+    unapplied = []
+    for op in ops:
+        if lines and not _applyOne(op,lines):
+            unapplied.append(op)
+        lines = [s for line in lines for s in (part.strip() for part in line.split('\n')) if s]
+    return lines,unapplied
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='check the edits applied when parsing')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_check = sp.add_parser('check',help='print edits that do not apply')
+    ap_check.add_argument('--edits',default=EDITS_FILE)
+    args = ap.parse_args()
+    import parse_data
+    count = 0
+    for file,ops in loadEdits(args.edits).items():
+        path = parse_data.base_dir+file
+        if not os.path.isfile(path):
+            print('%s: file not found'%file)
+            count += 1
+            continue
+        if isSkipped(ops):
+            continue
+        lines = [line.strip() for line in open(path,'r')]
+        _,unapplied = applyEdits([line for line in lines if line != ''],ops)
+        for op in unapplied:
+            print('%s: not applied: %s'%(file,json.dumps(op)))
+        count += len(unapplied)
+    print('%d problems'%count)
@@ -0,0 +1,209 @@
+'''
+Export the parsed puzzles of a type to a NumPy .npz file with the grids encoded
+as integer arrays, so a whole type can be loaded with one np.load.
+
+Usage: export_npz.py <puzzle> <out_file> [--props problem,solution,areas]
+           [--compress]
+The puzzle is a type such as /Sudoku, read from /data with corpus.py.
+
+Cells are encoded with a vocabulary built for the type. Integer cells are stored
+as their value and "-" as 0 when these codes are free, other cells (and values
+whose code is taken) get the next unused code. The arrays in the file are (N is
+the number of puzzles, R and C the largest grid dimensions of the type):
+
+files: (N,) file keys
+vocab_tokens, vocab_codes: (V,) the cell vocabulary
+<prop>: (N,R,C) cell codes (uint8 if they fit, otherwise int16 or int32)
+<prop>_shape: (N,2) rows and columns of each grid (0,0 if it is missing)
+<prop>_mask: (N,R,C) True for cells that are in the grid (rows can be jagged)
+    (only for properties that are grids, a property such as the problem of
+    Rechengitter that is a string is a meta_ array)
+meta_<name>: (N,) other properties, int64 (-1 if missing) if all values are
+    integers, bool (True if present) for flag properties without a value such as
+    "negative", otherwise strings ('' if missing). Long string properties such as
+    "moves" are left out since fixed width string arrays would be huge.
+'''
+
+import argparse
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import corpus
+
+GRID_PROPS = ['problem','solution','areas']
+SKIP_META = ['moves']
+EMPTY = '-'
+
+def _intValue(token: str) -> Optional[int]:
+    try:
+        value = int(token)
+    except ValueError:
+        return None
+    return value if str(value) == token else None
+
+class Vocabulary:
+    '''
+    Mapping between cell strings and integer codes. Codes are stable once
+    assigned, so a vocabulary can keep growing while grids are encoded.
+    '''
+    _codes: Dict[str,int]
+    _tokens: Dict[int,str]
+    _next: int # next code for tokens without a free preferred code
+    def __init__(self):
+        self._codes = dict()
+        self._tokens = dict()
+        self._next = 1
+    @staticmethod
+    def build(tokens: Iterable[str]) -> 'Vocabulary':
+        ''' Vocabulary for a set of tokens, integers are assigned first. '''
+        vocab = Vocabulary()
+        vocab.addTokens(tokens)
+        return vocab
+    def addTokens(self, tokens: Iterable[str]):
+        '''
+        Add a set of tokens, integers first so they get their own value as code
+        when it is free (adding one at a time can give "-" the code 0 first).
+        '''
+        tokens = set(tokens)
+        ints = sorted((t for t in tokens if _intValue(t) is not None),key=_intValue)
+        others = sorted(t for t in tokens if _intValue(t) is None and t != EMPTY)
+        for token in ints+([EMPTY] if EMPTY in tokens else [])+others:
+            self.code(token)
+    @staticmethod
+    def fromArrays(tokens: np.ndarray, codes: np.ndarray) -> 'Vocabulary':
+        vocab = Vocabulary()
+        for token,code in zip(tokens.tolist(),codes.tolist()):
+            vocab._add(token,code)
+        return vocab
+    def _add(self, token: str, code: int):
+        self._codes[token] = code
+        self._tokens[code] = token
+        self._next = max(self._next,code+1)
+    def code(self, token: str) -> int:
+        ''' Code for a token, adding it to the vocabulary if it is new. '''
+        if token in self._codes:
+            return self._codes[token]
+        code = 0 if token == EMPTY else _intValue(token)
+        if code is None or code in self._tokens:
+            code = self._next
+        self._add(token,code)
+        return code
+    def token(self, code: int) -> str:
+        return self._tokens[code]
+    def __len__(self) -> int:
+        return len(self._codes)
+    def dtype(self) -> Any:
+        ''' Smallest integer type that can hold all the codes. '''
+        lo,hi = min(self._tokens,default=0),max(self._tokens,default=0)
+        if lo >= 0 and hi <= 255:
+            return np.uint8
+        if lo >= -2**15 and hi < 2**15:
+            return np.int16
+        return np.int32
+    def arrays(self) -> Tuple[np.ndarray,np.ndarray]:
+        tokens = list(self._codes)
+        return np.array(tokens,dtype=str),np.array([self._codes[t] for t in tokens],dtype=np.int64)
+
+def isGrid(value: Any) -> bool:
+    ''' True for a grid (list of rows), False for other values such as long strings. '''
+    return isinstance(value,list) and all(isinstance(row,list) for row in value)
+
+def gridValue(data: Dict[str,Any], prop: str) -> Optional[List[List[str]]]:
+    ''' The grid of a property, None if it is missing or not a grid. '''
+    value = data.get(prop)
+    return value if isGrid(value) else None
+
+def encodeGrids(grids: List[Optional[List[List[str]]]], vocab: Vocabulary,
+        shape: Optional[Tuple[int,int]] = None) -> Tuple[np.ndarray,np.ndarray,np.ndarray]:
+    '''
+    Encode grids (None for a missing grid) into padded arrays, returns (cells,
+    shape, mask). The padded shape is the largest grid unless given, in which
+    case larger grids are an error.
+    '''
+    dims = np.zeros((len(grids),2),dtype=np.int16)
+    for i,grid in enumerate(grids):
+        if grid is not None:
+            dims[i] = (len(grid),max((len(row) for row in grid),default=0))
+    if shape is None:
+        shape = (int(dims[:,0].max(initial=0)),int(dims[:,1].max(initial=0)))
+    elif (dims[:,0] > shape[0]).any() or (dims[:,1] > shape[1]).any():
+        raise ValueError('grid larger than shape %s'%(shape,))
+    codes = [[[vocab.code(cell) for cell in row] for row in grid] if grid is not None else []
+             for grid in grids]
+    cells = np.zeros((len(grids),)+shape,dtype=vocab.dtype())
+    mask = np.zeros((len(grids),)+shape,dtype=bool)
+    for i,grid in enumerate(codes):
+        for r,row in enumerate(grid):
+            cells[i,r,:len(row)] = row
+            mask[i,r,:len(row)] = True
+    return cells,dims,mask
+
+def decodeGrid(arrays: Dict[str,np.ndarray], prop: str, i: int,
+        vocab: Optional[Vocabulary] = None) -> Optional[List[List[str]]]:
+    ''' Convert grid i of a property from loaded arrays back to strings. '''
+    if vocab is None:
+        vocab = Vocabulary.fromArrays(arrays['vocab_tokens'],arrays['vocab_codes'])
+    rows,cols = arrays[prop+'_shape'][i]
+    if rows == 0:
+        return None
+    cells = arrays[prop][i]
+    mask = arrays[prop+'_mask'][i]
+    return [[vocab.token(int(c)) for c in cells[r][mask[r]]] for r in range(rows)]
+
+def _metaArray(values: List[Any], has: List[bool]) -> np.ndarray:
+    present = [v for v in values if v is not None]
+    if not present: # flag property (no value), stored as whether it is present
+        return np.array(has,dtype=bool)
+    if all(isinstance(v,int) for v in present):
+        return np.array([-1 if v is None else v for v in values],dtype=np.int64)
+    return np.array(['' if v is None else str(v) for v in values],dtype=str)
+
+def exportArrays(objs: List[Dict[str,Any]], props: List[str] = GRID_PROPS) \
+        -> Dict[str,np.ndarray]:
+    ''' Build the arrays for a list of puzzle objects (see module docstring). '''
+    # only properties that are grids (problem is a long string in some types)
+    props = [p for p in props if any(gridValue(obj['data'],p) is not None for obj in objs)]
+    vocab = Vocabulary.build(cell for obj in objs for p in props
+                             for row in gridValue(obj['data'],p) or [] for cell in row)
+    arrays: Dict[str,np.ndarray] = dict()
+    arrays['files'] = np.array([obj['file'] for obj in objs],dtype=str)
+    for p in props:
+        cells,dims,mask = encodeGrids([gridValue(obj['data'],p) for obj in objs],vocab)
+        arrays[p] = cells
+        arrays[p+'_shape'] = dims
+        arrays[p+'_mask'] = mask
+    arrays['vocab_tokens'],arrays['vocab_codes'] = vocab.arrays()
+    meta: List[str] = []
+    for obj in objs:
+        for k,v in obj['data'].items():
+            if not isinstance(v,list) and k not in meta and k.rstrip('_') not in SKIP_META:
+                meta.append(k)
+    for k in meta:
+        arrays['meta_'+k] = _metaArray([obj['data'].get(k) for obj in objs],
+                                       [k in obj['data'] for obj in objs])
+    return arrays
+
+def exportType(puzzle: str, out_file: str, props: List[str] = GRID_PROPS,
+        compress: bool = False, data_dir: str = corpus.data_dir):
+    objs = list(corpus.iterPuzzles(puzzle,data_dir))
+    arrays = exportArrays(objs,props)
+    if compress:
+        np.savez_compressed(out_file,**arrays)
+    else:
+        np.savez(out_file,**arrays)
+
+def load(path: str) -> Dict[str,np.ndarray]:
+    ''' Load all arrays of an exported file. '''
+    with np.load(path) as f:
+        return {k:f[k] for k in f.files}
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='export a puzzle type to .npz')
+    ap.add_argument('puzzle')
+    ap.add_argument('out_file')
+    ap.add_argument('--props',default=','.join(GRID_PROPS),
+                    help='comma separated grid properties to export')
+    ap.add_argument('--compress',action='store_true',help='use np.savez_compressed')
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    exportType(args.puzzle,args.out_file,args.props.split(','),args.compress,args.data_dir)
@@ -0,0 +1,138 @@
+'''
+Export parsed puzzles to a SQLite database so they can be searched with indexed
+queries instead of decoding whole JSONL files.
+
+Usage: export_sqlite.py <db_file> [puzzle ...] [--data-dir DIR]
+Loads the given puzzle types (all of them by default) from the data files. The
+database can also be filled while parsing with parse_data.py --sqlite <db_file>.
+
+Tables:
+puzzles: id, type (such as /Heyawake), file, number (from the file name), rows,
+    cols, size, author, solver, source, date and data (the other properties as
+    JSON). For puzzles that only have a size, rows and cols are set to it too.
+grids: (puzzle,prop) -> rows, cols, cells. Cells is the grid as UTF-8 text like
+    in the .x-janko files (cells separated by ' ', rows by newlines).
+
+Example query (all 10x10 Heyawake by Otto Janko):
+SELECT file FROM puzzles WHERE type = '/Heyawake' AND rows = 10 AND cols = 10
+    AND author = 'Otto Janko';
+'''
+
+import argparse
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import block_jsonl
+import corpus
+import grid_codecs
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    file TEXT NOT NULL UNIQUE,
+    number INTEGER,
+    rows INTEGER,
+    cols INTEGER,
+    size INTEGER,
+    author TEXT,
+    solver TEXT,
+    source TEXT,
+    date TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grids (
+    puzzle INTEGER NOT NULL REFERENCES puzzles(id),
+    prop TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    cells BLOB NOT NULL,
+    PRIMARY KEY (puzzle,prop)
+) WITHOUT ROWID;
+'''
+
+INDEXES = '''
+CREATE INDEX IF NOT EXISTS puzzles_type ON puzzles(type,number);
+CREATE INDEX IF NOT EXISTS puzzles_dims ON puzzles(rows,cols);
+CREATE INDEX IF NOT EXISTS puzzles_size ON puzzles(size);
+CREATE INDEX IF NOT EXISTS puzzles_author ON puzzles(author);
+CREATE INDEX IF NOT EXISTS puzzles_source ON puzzles(source);
+'''
+
+# properties stored in their own column instead of the data JSON
+COLUMNS = ['rows','cols','size','author','solver','source','date']
+
+def connect(db_file: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_file)
+    conn.executescript(SCHEMA)
+    return conn
+
+def createIndexes(conn: sqlite3.Connection):
+    conn.executescript(INDEXES)
+
+def encodeGrid(grid: List[List[str]]) -> bytes:
+    return '\n'.join(' '.join(row) for row in grid).encode()
+
+def decodeGrid(cells: bytes) -> List[List[str]]:
+    if cells == b'': # a grid without rows
+        return []
+    return [row.split(' ') if row else [] for row in cells.decode().split('\n')]
+
+def _rows(puzzle: str, objs: Iterable[Dict[str,Any]], first_id: int) \
+        -> Tuple[List[Tuple[Any,...]],List[Tuple[Any,...]]]:
+    puzzle_rows: List[Tuple[Any,...]] = []
+    grid_rows: List[Tuple[Any,...]] = []
+    for i,obj in enumerate(objs,first_id):
+        obj = grid_codecs.decodeObject(obj)
+        data: Dict[str,Any] = obj['data']
+        other: Dict[str,Any] = dict()
+        for prop,value in data.items():
+            if isinstance(value,list):
+                cols = max((len(row) for row in value),default=0)
+                grid_rows.append((i,prop,len(value),cols,encodeGrid(value)))
+            elif prop not in COLUMNS:
+                other[prop] = value
+        rows = data.get('rows',data.get('size'))
+        cols = data.get('cols',data.get('size'))
+        puzzle_rows.append((i,puzzle,obj['file'],block_jsonl.puzzleNumber(obj['file']),
+                            rows,cols,data.get('size'),data.get('author'),data.get('solver'),
+                            data.get('source'),data.get('date'),
+                            json.dumps(other,separators=(',',':'))))
+    return puzzle_rows,grid_rows
+
+def insertPuzzles(conn: sqlite3.Connection, puzzle: str, objs: Iterable[Dict[str,Any]]):
+    '''
+    Replace the puzzles of a type with the given puzzle objects (as written by
+    parse_data.py) in a single transaction.
+    '''
+    with conn:
+        conn.execute('DELETE FROM grids WHERE puzzle IN (SELECT id FROM puzzles WHERE type = ?)',
+                     (puzzle,))
+        conn.execute('DELETE FROM puzzles WHERE type = ?',(puzzle,))
+        first_id = conn.execute('SELECT COALESCE(MAX(id),0)+1 FROM puzzles').fetchone()[0]
+        puzzle_rows,grid_rows = _rows(puzzle,objs,first_id)
+        conn.executemany('INSERT INTO puzzles VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',puzzle_rows)
+        conn.executemany('INSERT INTO grids VALUES (?,?,?,?,?)',grid_rows)
+
+def exportTypes(db_file: str, puzzles: Optional[List[str]] = None,
+        data_dir: str = corpus.data_dir):
+    '''
+    Load puzzle types from the data files. The indexes are created after the
+    inserts since that is faster than updating them for every row.
+    '''
+    conn = connect(db_file)
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA synchronous = OFF')
+    for puzzle in puzzles or corpus.listTypes(data_dir):
+        insertPuzzles(conn,puzzle,corpus.iterPuzzles(puzzle,data_dir))
+    createIndexes(conn)
+    conn.close()
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='export puzzles to SQLite')
+    ap.add_argument('db_file')
+    ap.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    exportTypes(args.db_file,args.puzzles,args.data_dir)
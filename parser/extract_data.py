@@ -5,7 +5,7 @@ Extract puzzle data from .htm files.
 import bs4
 import os
 from tqdm import tqdm
-from typing import List, Tuple
+from typing import IO, List, Optional, Tuple, Union
 
 # wrapper for os.mkdir to ignore error if directory exists
 def mkdir(dir):
@@ -16,6 +16,21 @@ base_dir = os.path.normpath('../www.janko.at/Raetsel/')
 out_dir = os.path.normpath('../puzzle_x-janko/')
 ignore_types = ['.css','.gif','.jpg','.js','.png']
 
+def extractData(page: Union[str,IO[str]]) -> Optional[str]:
+    '''
+    Puzzle data (contents of the application/x-janko script tag) of an htm page
+    given as a string or file, None if the page has no "data" tag.
+    '''
+    soup = bs4.BeautifulSoup(page,'html.parser')
+    data = soup.find(id='data')
+    if data is None:
+        return None
+    assert isinstance(data,bs4.Tag)
+    assert data.attrs['type'] == 'application/x-janko'
+    text = data.string
+    assert text is not None
+    return '\n'.join(text.splitlines())+'\n'
+
 if __name__ == '__main__':
 
     mkdir(out_dir)
@@ -45,19 +60,11 @@ if __name__ == '__main__':
             tqdm.write('WARN: unsupported type')
             continue
         with open(base_dir+filepath,'r') as file:
-            page = bs4.BeautifulSoup(file,'html.parser')
-            data = page.find(id='data')
-            if data is None:
-                tqdm.write('WARN: no "data" tag, skipping')
-            elif isinstance(data,bs4.Tag):
-                assert data.attrs['type'] == 'application/x-janko'
-                data = data.string
-                assert data is not None
-                out_data = '\n'.join(data.splitlines())+'\n'
-                outf = open(out_file,'w')
-                outf.write(out_data)
-                outf.close()
-                tqdm.write('successful')
-            else:
-                assert 0
-
+            out_data = extractData(file)
+        if out_data is None:
+            tqdm.write('WARN: no "data" tag, skipping')
+        else:
+            outf = open(out_file,'w')
+            outf.write(out_data)
+            outf.close()
+            tqdm.write('successful')
@@ -0,0 +1,91 @@
+'''
+Encodings for grid properties in the JSON output. By default a grid is a list of
+rows, each being a list of cell strings. In the compact output mode (parse_data.py
+--compact), each grid is stored with a codec and the codecs used are listed in a
+"codecs" object next to "data", for example:
+
+{"file":"/Sudoku/0375.a.x-janko","data":{...,"problem":["--31","----",...]},
+ "codecs":{"problem":"rows","solution":"rows"}}
+
+The codecs are:
+list: the default format (List[List[str]]), not listed in "codecs"
+rows: each row is a string of single character cells (List[str])
+int: each cell is an integer, or null for an empty cell "-" (List[List[int]])
+
+Each grid property declares the codec it prefers (see PuzzleParser.addGrid). The
+declared codec is used if it can represent the grid exactly, otherwise it falls
+back to rows and then list. Grids with a duplicate property name (such as
+"solution_") use the codec declared for the original name.
+'''
+
+from typing import Any, Dict, List, Optional, Tuple
+
+C_LIST = 'list'
+C_ROWS = 'rows'
+C_INT = 'int'
+
+EMPTY = '-' # empty cell, stored as null with the int codec
+
+def _isRows(grid: List[List[str]]) -> bool:
+    return all(len(cell) == 1 for row in grid for cell in row)
+
+def _isInt(grid: List[List[str]]) -> bool:
+    for row in grid:
+        for cell in row:
+            if cell == EMPTY:
+                continue
+            try:
+                if str(int(cell)) != cell: # must convert back exactly
+                    return False
+            except ValueError:
+                return False
+    return True
+
+def encodeGrid(grid: List[List[str]], codec: str) -> Tuple[Any,str]:
+    ''' Encode a grid with its declared codec, returns (value,codec used). '''
+    if codec == C_INT and _isInt(grid):
+        return [[None if cell == EMPTY else int(cell) for cell in row] for row in grid],C_INT
+    if codec != C_LIST and _isRows(grid):
+        return [''.join(row) for row in grid],C_ROWS
+    return grid,C_LIST
+
+def decodeGrid(value: Any, codec: str) -> List[List[str]]:
+    ''' Convert an encoded grid back to the default format. '''
+    if codec == C_LIST:
+        return value
+    if codec == C_ROWS:
+        return [list(row) for row in value]
+    if codec == C_INT:
+        return [[EMPTY if cell is None else str(cell) for cell in row] for row in value]
+    raise ValueError('unknown grid codec: '+codec)
+
+def encodeResult(data: Dict[str,Any], grid_codecs: Dict[str,str]) \
+        -> Tuple[Dict[str,Any],Dict[str,str]]:
+    '''
+    Encode the grids of a parse result given the declared codec of each grid
+    property. Returns the encoded data and the codecs used (excluding list).
+    '''
+    result: Dict[str,Any] = dict()
+    codecs: Dict[str,str] = dict()
+    for prop,value in data.items():
+        codec: Optional[str] = grid_codecs.get(prop.rstrip('_'))
+        if codec is None or not isinstance(value,list):
+            result[prop] = value
+            continue
+        result[prop],used = encodeGrid(value,codec)
+        if used != C_LIST:
+            codecs[prop] = used
+    return result,codecs
+
+def decodeResult(data: Dict[str,Any], codecs: Dict[str,str]) -> Dict[str,Any]:
+    ''' Convert the encoded grids of a result back to the default format. '''
+    result = dict(data)
+    for prop,codec in codecs.items():
+        result[prop] = decodeGrid(data[prop],codec)
+    return result
+
+def decodeObject(obj: Dict[str,Any]) -> Dict[str,Any]:
+    ''' Convert a JSONL object from compact output to the default format. '''
+    if 'codecs' not in obj:
+        return obj
+    return {'file':obj['file'],'data':decodeResult(obj['data'],obj['codecs'])}
@@ -0,0 +1,162 @@
+'''
+Instrumentation of parse_data.py runs, to find where the time goes when parsing
+all puzzles is slow. Enabled with parse_data.py --instrument REPORT and/or
+--profile DIR.
+
+For each puzzle type, the report has the wall and CPU time of the phases
+read: reading the bytes of the files
+tokenize: decoding them and splitting them into stripped nonempty lines
+parse: the parser attempts (PuzzleParser.parse), including failed ones
+serialize: JSON encoding, compression and writing of the output file
+and of the whole type (total, which also has the checks, statistics and
+database loading). failed_attempts counts the parser attempts that raised an
+exception before one succeeded (or all failed), with their time in
+failed_wall/failed_cpu. bytes_in is the size of the input files, bytes_out the
+size of the output file. peak_rss is the peak resident memory of the process at
+the end of the type (a high water mark, so it only increases from type to type).
+
+With --profile, each type is run under cProfile and the dumps of the
+PROFILE_TOP slowest types (by wall time) are kept in the directory, named like
+the output files (Heyawake_AYE.prof), for use with pstats or snakeviz. The
+profiler slows parsing down, so the times in a report made with --profile are
+only comparable to each other.
+
+Usage: instrument.py <report> [--sort PHASE] [--top N]
+Prints the types of a report sorted by the wall time of a phase (default total).
+'''
+
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+PHASES = ['read','tokenize','parse','serialize']
+PROFILE_TOP = 10
+
+def peakMemory() -> Optional[int]:
+    ''' Peak resident memory of the process in bytes (None if unknown). '''
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+def profileName(puzzle: str) -> str:
+    return ('root' if puzzle == '/' else puzzle[1:].replace('/','_'))+'.prof'
+
+class Instrument:
+    '''
+    Collects the timings of a parse_data.py run. Each type is enclosed in
+    begin() and end(), and the work in phase() contexts.
+    '''
+    types: Dict[str,Dict[str,Any]]
+    profile_dir: Optional[str]
+    profile_top: int
+    _current: Optional[Dict[str,Any]]
+    _start: Tuple[float,float]
+    _last: Tuple[float,float] # wall and CPU time of the last phase
+    _profiler: Optional[cProfile.Profile]
+    def __init__(self, profile_dir: Optional[str] = None, profile_top: int = PROFILE_TOP):
+        self.types = dict()
+        self.profile_dir = profile_dir
+        self.profile_top = profile_top
+        self._current = None
+        self._start = (0.0,0.0)
+        self._last = (0.0,0.0)
+        self._profiler = None
+        if profile_dir is not None:
+            os.makedirs(profile_dir,exist_ok=True)
+    def begin(self, puzzle: str):
+        self._current = {'files':0,'failed_files':0,'failed_attempts':0,
+                         'failed_wall':0.0,'failed_cpu':0.0,'bytes_in':0,'bytes_out':0,
+                         'wall':{p:0.0 for p in PHASES},'cpu':{p:0.0 for p in PHASES}}
+        self.types[puzzle] = self._current
+        if self.profile_dir is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = (time.perf_counter(),time.process_time())
+    def end(self, puzzle: str):
+        wall,cpu = time.perf_counter()-self._start[0],time.process_time()-self._start[1]
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(os.path.join(self.profile_dir,profileName(puzzle)))
+            self._profiler = None
+        stats = self.types[puzzle]
+        stats['wall']['total'] = wall
+        stats['cpu']['total'] = cpu
+        stats['peak_rss'] = peakMemory()
+        self._current = None
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        ''' Add the time of the enclosed code to a phase of the current type. '''
+        wall,cpu = time.perf_counter(),time.process_time()
+        try:
+            yield
+        finally:
+            self._last = (time.perf_counter()-wall,time.process_time()-cpu)
+            self._current['wall'][name] += self._last[0]
+            self._current['cpu'][name] += self._last[1]
+    def failedAttempt(self):
+        ''' Count the last phase as a failed parser attempt. '''
+        self._current['failed_attempts'] += 1
+        self._current['failed_wall'] += self._last[0]
+        self._current['failed_cpu'] += self._last[1]
+    def addFile(self, size: int, failed: bool = False):
+        self._current['files'] += 1
+        self._current['failed_files'] += failed
+        self._current['bytes_in'] += size
+    def setOutput(self, size: int):
+        self._current['bytes_out'] = size
+    def report(self) -> Dict[str,Any]:
+        ''' The report with the totals over all types. '''
+        total: Dict[str,Any] = {'wall':dict(),'cpu':dict()}
+        for stats in self.types.values():
+            for key,value in stats.items():
+                if isinstance(value,dict):
+                    for p,t in value.items():
+                        total[key][p] = total[key].get(p,0.0)+t
+                elif key != 'peak_rss':
+                    total[key] = total.get(key,0)+value
+        total['peak_rss'] = peakMemory()
+        return {'total':total,'types':self.types}
+    def write(self, path: str):
+        outf = open(path,'w')
+        outf.write(json.dumps(self.report(),indent=1)+'\n')
+        outf.close()
+    def pruneProfiles(self):
+        ''' Remove the profile dumps except for the slowest types. '''
+        if self.profile_dir is None:
+            return
+        slowest = sorted(self.types,key=lambda p:-self.types[p]['wall'].get('total',0.0))
+        for puzzle in slowest[self.profile_top:]:
+            path = os.path.join(self.profile_dir,profileName(puzzle))
+            if os.path.isfile(path):
+                os.remove(path)
+
+def formatReport(report: Dict[str,Any], sort: str = 'total', top: int = 0) -> List[str]:
+    ''' Lines of a table of the types, slowest first. '''
+    types = sorted(report['types'].items(),key=lambda t:-t[1]['wall'].get(sort,0.0))
+    if top > 0:
+        types = types[:top]
+    lines = ['%-32s %8s %8s %8s %8s %8s %8s %6s %10s'%('type','total','read','tokenize',
+             'parse','serial','failed','files','MB in')]
+    for puzzle,stats in types+[('total',report['total'])]:
+        wall = stats['wall']
+        lines.append('%-32s %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %6d %10.2f'%(
+            puzzle,wall.get('total',0.0),wall['read'],wall['tokenize'],wall['parse'],
+            wall['serialize'],stats['failed_wall'],stats['files'],stats['bytes_in']/2**20))
+    return lines
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='print a parse_data.py instrumentation report')
+    ap.add_argument('report')
+    ap.add_argument('--sort',choices=['total']+PHASES,default='total')
+    ap.add_argument('--top',type=int,default=0,help='only the slowest N types')
+    args = ap.parse_args()
+    print('\n'.join(formatReport(json.load(open(args.report,'r')),args.sort,args.top)))
@@ -0,0 +1,249 @@
+'''
+Distributed parsing with a job manifest in a shared directory. The work of
+parsing puzzle types is split into units of at most UNIT_SIZE files of one type,
+which workers on any number of machines (with the same puzzle_x-janko tree and
+code) claim and parse, and a final step merges the partial outputs in order.
+
+Usage: jobs.py plan <job_dir> [puzzle ...] [--unit-size N] [--compact]
+       jobs.py work <job_dir> [--workers N]
+       jobs.py status <job_dir>
+       jobs.py reset <job_dir> [--stale SECONDS]
+       jobs.py merge <job_dir> <out_dir> [--format jsonl|bz2|zst] [--block-size N]
+plan writes the manifest for the given types (default all types with a parser
+and a source directory). work runs a worker (or N local worker processes) until
+no unit is left to claim. status prints the number of units done, claimed and
+open. reset removes the locks of units that are not done (all of them, or those
+older than SECONDS, for workers that died), it should not run while workers
+that could still finish those units are running. merge writes the output of
+each type to out_dir like parse_data.py (with a statistics sidecar), after all
+units are done.
+
+The manifest <job_dir>/jobs.json looks like:
+{
+    "compact": false,
+    "units": [
+        {"id": "00000", "type": "/Sudoku", "start": 0, "stop": 500,
+         "first": "0001.a.x-janko", "last": "0500.a.x-janko",
+         "schema": "..."},
+        ...
+    ]
+}
+A unit is the files start to stop-1 (in parse_data.sourceFiles order) of a type,
+first and last are the names of its first and last file and schema is the
+parse_data.schemaFingerprint of the type. A worker refuses a unit if its files
+or parsers differ, so all outputs are made from the same input and parser code.
+
+Files in <job_dir>/units/ for each unit:
+<id>.lock: created with O_EXCL by the worker that claims the unit (the claim
+    is atomic on local file systems and NFSv3+), with the host and process id
+<id>.jsonl: the parsed puzzles as written by parse_data.py
+<id>.done.json: written last, {"count": N, "failed": [file, ...], "worker": ...}
+Outputs are written to a temporary name and renamed, so a unit is either done
+with complete outputs or not done.
+'''
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+import block_jsonl
+import corpus_stats
+import grid_codecs
+import parse_data
+
+UNIT_SIZE = 500
+
+def manifestPath(job_dir: str) -> str:
+    return os.path.join(job_dir,'jobs.json')
+
+def unitPath(job_dir: str, unit_id: str, ext: str) -> str:
+    return os.path.join(job_dir,'units',unit_id+ext)
+
+def readManifest(job_dir: str) -> Dict[str,Any]:
+    return json.load(open(manifestPath(job_dir),'r'))
+
+def _writeAtomic(path: str, data: bytes):
+    tmp = '%s.tmp.%s.%d'%(path,socket.gethostname(),os.getpid())
+    outf = open(tmp,'wb')
+    outf.write(data)
+    outf.close()
+    os.replace(tmp,path)
+
+def plan(job_dir: str, puzzles: Optional[List[str]] = None, unit_size: int = UNIT_SIZE,
+        compact: bool = False) -> Dict[str,Any]:
+    ''' Write the manifest for the given types (see module docstring). '''
+    if puzzles is None:
+        puzzles = [puzzle for puzzle in parse_data.parsermap
+                   if os.path.isdir(parse_data.base_dir+('' if puzzle == '/' else puzzle))]
+    units = []
+    for puzzle in puzzles:
+        names = [os.path.split(file)[1] for file in parse_data.sourceFiles(puzzle)]
+        schema = parse_data.schemaFingerprint(puzzle)
+        for start in range(0,len(names),unit_size):
+            stop = min(start+unit_size,len(names))
+            units.append({'id':'%05d'%len(units),'type':puzzle,'start':start,'stop':stop,
+                          'first':names[start],'last':names[stop-1],'schema':schema})
+    manifest = {'compact':compact,'units':units}
+    os.makedirs(os.path.join(job_dir,'units'),exist_ok=True)
+    _writeAtomic(manifestPath(job_dir),(json.dumps(manifest,indent=1)+'\n').encode())
+    return manifest
+
+def isDone(job_dir: str, unit: Dict[str,Any]) -> bool:
+    return os.path.isfile(unitPath(job_dir,unit['id'],'.done.json'))
+
+def claim(job_dir: str, unit: Dict[str,Any]) -> bool:
+    ''' Try to claim a unit by creating its lock file, False if it exists. '''
+    try:
+        fd = os.open(unitPath(job_dir,unit['id'],'.lock'),os.O_CREAT|os.O_EXCL|os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd,('%s %d %f\n'%(socket.gethostname(),os.getpid(),time.time())).encode())
+    os.close(fd)
+    return True
+
+def release(job_dir: str, unit: Dict[str,Any]):
+    os.remove(unitPath(job_dir,unit['id'],'.lock'))
+
+def runUnit(job_dir: str, unit: Dict[str,Any], compact: bool = False):
+    ''' Parse the files of a claimed unit and write its outputs. '''
+    puzzle = unit['type']
+    files = parse_data.sourceFiles(puzzle)[unit['start']:unit['stop']]
+    names = [os.path.split(file)[1] for file in files]
+    if parse_data.schemaFingerprint(puzzle) != unit['schema']:
+        raise ValueError('parsers of %s differ from the manifest'%puzzle)
+    if not names or names[0] != unit['first'] or names[-1] != unit['last'] \
+            or len(names) != unit['stop']-unit['start']:
+        raise ValueError('files of %s differ from the manifest'%puzzle)
+    lines = []
+    failed = []
+    for file,name in zip(files,names):
+        file_rel = puzzle+'/'+name
+        result,parser,_ = parse_data.parseFile(puzzle,file)
+        if result is None:
+            failed.append(file_rel)
+            continue
+        obj = parse_data.outputObject(file_rel,result,parser,compact)
+        lines.append(json.dumps(obj,separators=(',',':'))+'\n')
+    _writeAtomic(unitPath(job_dir,unit['id'],'.jsonl'),''.join(lines).encode())
+    done = {'count':len(lines),'failed':failed,
+            'worker':'%s %d'%(socket.gethostname(),os.getpid())}
+    _writeAtomic(unitPath(job_dir,unit['id'],'.done.json'),json.dumps(done).encode())
+
+def work(job_dir: str) -> int:
+    ''' Claim and run units until none are left, returns the number run. '''
+    for parsers in parse_data.parsermap.values():
+        for parser in parsers:
+            parser.setErrPrint(lambda s: None)
+    manifest = readManifest(job_dir)
+    count = 0
+    for unit in manifest['units']:
+        if isDone(job_dir,unit) or not claim(job_dir,unit):
+            continue
+        if isDone(job_dir,unit): # finished between the check and the claim
+            release(job_dir,unit)
+            continue
+        try:
+            runUnit(job_dir,unit,manifest['compact'])
+        except Exception as e:
+            print('unit %s (%s): %s'%(unit['id'],unit['type'],e))
+            release(job_dir,unit)
+            continue
+        count += 1
+    return count
+
+def status(job_dir: str) -> Dict[str,List[str]]:
+    ''' Unit ids by state: done, claimed (locked but not done) and open. '''
+    states: Dict[str,List[str]] = {'done':[],'claimed':[],'open':[]}
+    for unit in readManifest(job_dir)['units']:
+        if isDone(job_dir,unit):
+            states['done'].append(unit['id'])
+        elif os.path.isfile(unitPath(job_dir,unit['id'],'.lock')):
+            states['claimed'].append(unit['id'])
+        else:
+            states['open'].append(unit['id'])
+    return states
+
+def reset(job_dir: str, stale: float = 0.0) -> List[str]:
+    ''' Remove the locks of units not done that are older than stale seconds. '''
+    removed = []
+    for unit in readManifest(job_dir)['units']:
+        lock = unitPath(job_dir,unit['id'],'.lock')
+        if not isDone(job_dir,unit) and os.path.isfile(lock) \
+                and time.time()-os.path.getmtime(lock) >= stale:
+            os.remove(lock)
+            removed.append(unit['id'])
+    return removed
+
+def merge(job_dir: str, out_dir: str, ext: str = '.jsonl', block_size: int = 0):
+    ''' Write the output of each type from its units, in order. '''
+    units = readManifest(job_dir)['units']
+    missing = [unit['id'] for unit in units if not isDone(job_dir,unit)]
+    if missing:
+        raise ValueError('units not done: '+' '.join(missing))
+    by_type: Dict[str,List[Dict[str,Any]]] = dict()
+    for unit in units:
+        by_type.setdefault(unit['type'],[]).append(unit)
+    for puzzle,type_units in by_type.items():
+        lines: List[bytes] = []
+        failed: List[str] = []
+        for unit in sorted(type_units,key=lambda u:u['start']):
+            lines.extend(block_jsonl.readLines(unitPath(job_dir,unit['id'],'.jsonl')))
+            failed.extend(json.load(open(unitPath(job_dir,unit['id'],'.done.json'),'r'))['failed'])
+        out_file = os.path.join(out_dir,puzzle[1:].replace('/','_')+ext)
+        print('writing '+out_file+' (%d objects)'%len(lines))
+        parse_data.writeLines(out_file,(line.decode() for line in lines),block_size)
+        objs = [grid_codecs.decodeObject(json.loads(line)) for line in lines]
+        corpus_stats.writeStats(corpus_stats.statsFileName(out_file),
+                                corpus_stats.computeStats(puzzle,objs,failed))
+        if failed:
+            print('failed files (%d):'%len(failed))
+            print('\n'.join(failed))
+    corpus_stats.rollup(out_dir)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='distributed parsing with a job directory')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_plan = sp.add_parser('plan',help='write the job manifest')
+    ap_plan.add_argument('job_dir')
+    ap_plan.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap_plan.add_argument('--unit-size',type=int,default=UNIT_SIZE,help='files per unit')
+    ap_plan.add_argument('--compact',action='store_true',
+                         help='write grids with compact encodings (see grid_codecs.py)')
+    ap_work = sp.add_parser('work',help='claim and parse units')
+    ap_work.add_argument('job_dir')
+    ap_work.add_argument('--workers',type=int,default=1,help='local worker processes')
+    ap_status = sp.add_parser('status',help='print the state of the units')
+    ap_status.add_argument('job_dir')
+    ap_reset = sp.add_parser('reset',help='remove locks of units that are not done')
+    ap_reset.add_argument('job_dir')
+    ap_reset.add_argument('--stale',type=float,default=0.0,
+                          help='only locks older than this many seconds')
+    ap_merge = sp.add_parser('merge',help='write the outputs of the types')
+    ap_merge.add_argument('job_dir')
+    ap_merge.add_argument('out_dir')
+    ap_merge.add_argument('--format',choices=['jsonl','bz2','zst'],default='jsonl')
+    ap_merge.add_argument('--block-size',type=int,default=0)
+    args = ap.parse_args()
+    if args.command == 'plan':
+        manifest = plan(args.job_dir,args.puzzles or None,args.unit_size,args.compact)
+        print('%d units'%len(manifest['units']))
+    elif args.command == 'work':
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers) as pool:
+                counts = pool.map(work,[args.job_dir]*args.workers)
+        else:
+            counts = [work(args.job_dir)]
+        print('%d units parsed'%sum(counts))
+    elif args.command == 'status':
+        for state,ids in status(args.job_dir).items():
+            print('%s: %d'%(state,len(ids)))
+    elif args.command == 'reset':
+        removed = reset(args.job_dir,args.stale)
+        print('%d locks removed'%len(removed))
+    elif args.command == 'merge':
+        ext = '.jsonl' if args.format == 'jsonl' else '.jsonl.'+args.format
+        merge(args.job_dir,args.out_dir,ext,args.block_size)
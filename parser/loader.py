@@ -0,0 +1,162 @@
+'''
+Streaming loader of shuffled NumPy batches of puzzle grids, for training jobs
+that need more than a static export (export_npz.py).
+
+Example:
+from loader import BatchLoader
+loader = BatchLoader(['/Sudoku','/Sudoku/Chaos'],batch_size=128,size=9,
+                     shape=(9,9),shuffle_buffer=4096,seed=1)
+for batch in loader:
+    batch['problem'] # (B,9,9) cell codes, see loader.vocab for the mapping
+    batch['problem_mask'] # (B,9,9) True for cells in the grid
+
+Puzzles are read with corpus.py (optionally decoding with a process pool), then
+filtered by dimensions, shuffled with a bounded buffer and encoded into batches
+by a background thread, which keeps up to prefetch batches ready. Each batch
+has the same arrays as an export_npz.py file for the puzzles in it: files,
+<prop>, <prop>_shape, <prop>_mask. Without a fixed shape, each batch is padded
+to its largest grid. With a fixed shape, larger puzzles are skipped. Values of
+the props that are not grids (such as a problem given as a string) are treated
+as missing.
+
+The cell vocabulary grows as new cells are seen unless a vocabulary is given
+(such as one loaded from an .npz export), so codes are stable across batches
+and across epochs that use the same loader.
+'''
+
+import queue
+import random
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import corpus
+from export_npz import Vocabulary, encodeGrids, gridValue
+
+# dimension filter, either an exact value or an inclusive (min,max) range
+DimFilter = Union[None,int,Tuple[int,int]]
+
+_END = object() # marks the end of the batches in the queue
+
+def puzzleDims(data: Dict[str,Any]) -> Tuple[Optional[int],Optional[int]]:
+    ''' (rows,cols) of a puzzle from its rows/cols or size properties. '''
+    rows = data.get('rows',data.get('size'))
+    cols = data.get('cols',data.get('size'))
+    return rows,cols
+
+def _match(value: Optional[int], f: DimFilter) -> bool:
+    if f is None:
+        return True
+    if value is None:
+        return False
+    if isinstance(f,int):
+        return value == f
+    return f[0] <= value <= f[1]
+
+def shuffled(items: Iterable[Any], buffer_size: int, rng: random.Random) -> Iterator[Any]:
+    '''
+    Approximate shuffle with a bounded buffer. Each item replaces a random
+    item of a full buffer, which is produced instead.
+    '''
+    buffer: List[Any] = []
+    for item in items:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        i = rng.randrange(buffer_size)
+        yield buffer[i]
+        buffer[i] = item
+    rng.shuffle(buffer)
+    yield from buffer
+
+class BatchLoader:
+    '''
+    Iterable over batches of encoded grids. Each iteration is one pass over the
+    selected puzzles, reshuffled with the next seed of the loader.
+    '''
+    def __init__(self, puzzles: Union[None,str,Iterable[str]],
+            batch_size: int = 64, props: Iterable[str] = ('problem','solution'),
+            shape: Optional[Tuple[int,int]] = None, shuffle_buffer: int = 1024,
+            seed: Optional[int] = None, prefetch: int = 4,
+            rows: DimFilter = None, cols: DimFilter = None, size: DimFilter = None,
+            vocab: Optional[Vocabulary] = None, drop_last: bool = False,
+            parallel: bool = False, processes: Optional[int] = None,
+            data_dir: str = corpus.data_dir):
+        self.puzzles = puzzles if puzzles is None or isinstance(puzzles,str) else list(puzzles)
+        self.batch_size = batch_size
+        self.props = list(props)
+        self.shape = shape
+        self.shuffle_buffer = shuffle_buffer
+        self.prefetch = prefetch
+        self.rows = rows
+        self.cols = cols
+        self.size = size
+        self.vocab = Vocabulary() if vocab is None else vocab
+        self.drop_last = drop_last
+        self.parallel = parallel
+        self.processes = processes
+        self.data_dir = data_dir
+        self.skipped = 0 # puzzles skipped for not fitting the fixed shape
+        self._rng = random.Random(seed)
+    def _accept(self, data: Dict[str,Any]) -> bool:
+        rows,cols = puzzleDims(data)
+        if not (_match(rows,self.rows) and _match(cols,self.cols) and _match(data.get('size'),self.size)):
+            return False
+        if self.shape is not None:
+            for p in self.props:
+                grid = gridValue(data,p)
+                if grid is not None and (len(grid) > self.shape[0]
+                        or max((len(row) for row in grid),default=0) > self.shape[1]):
+                    self.skipped += 1
+                    return False
+        return True
+    def _objects(self) -> Iterator[Dict[str,Any]]:
+        objs = corpus.iterPuzzles(self.puzzles,self.data_dir,self.parallel,self.processes)
+        return (obj for obj in objs if self._accept(obj['data']))
+    def encodeBatch(self, objs: List[Dict[str,Any]]) -> Dict[str,np.ndarray]:
+        batch: Dict[str,np.ndarray] = dict()
+        batch['files'] = np.array([obj['file'] for obj in objs],dtype=str)
+        for p in self.props:
+            cells,dims,mask = encodeGrids([gridValue(obj['data'],p) for obj in objs],
+                                          self.vocab,self.shape)
+            batch[p] = cells
+            batch[p+'_shape'] = dims
+            batch[p+'_mask'] = mask
+        return batch
+    def _produce(self, rng: random.Random, out: 'queue.Queue[Any]', stop: threading.Event):
+        try:
+            objs: List[Dict[str,Any]] = []
+            for obj in shuffled(self._objects(),self.shuffle_buffer,rng):
+                objs.append(obj)
+                if len(objs) == self.batch_size:
+                    out.put(self.encodeBatch(objs))
+                    objs = []
+                if stop.is_set():
+                    return
+            if objs and not self.drop_last:
+                out.put(self.encodeBatch(objs))
+            out.put(_END)
+        except BaseException as e: # pass to the consumer
+            out.put(e)
+    def __iter__(self) -> Iterator[Dict[str,np.ndarray]]:
+        rng = random.Random(self._rng.random())
+        out: 'queue.Queue[Any]' = queue.Queue(maxsize=max(1,self.prefetch))
+        stop = threading.Event()
+        thread = threading.Thread(target=self._produce,args=(rng,out,stop),daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _END:
+                    break
+                if isinstance(item,BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            while thread.is_alive(): # unblock the producer if the queue is full
+                try:
+                    out.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
@@ -0,0 +1,184 @@
+'''
+Decoding and replay of the "moves" property, the solving steps recorded by the
+janko.at applet, such as "Z2;ba,2;aa,4;ab,3;..." for Sudoku #375.
+
+Moves are tokens ending with ";". A token is either a header (an uppercase
+letter and a number, like Z2 or Q0) or a step: an optional prefix (H and V for
+horizontal and vertical edges, N for grid nodes, none for cells), a coordinate
+and up to 3 comma separated fields. The coordinate is 2 letters (column then
+row, a=0) or for large grids a number (100*column+row). The fields are the value
+("-" clears the cell), a state number and a string of notes (candidates), any of
+which can be empty. For example "ba,2" writes 2 into row 0, column 1 and
+"cc,-,,24" clears row 2, column 2 and notes 2 and 4.
+
+decodeMoves converts the moves of many puzzles in one pass into a structured
+step array (STEP_DTYPE) with offsets per puzzle. Values and states are codes of
+an export_npz.Vocabulary, so they can be compared with encoded grids. replay
+applies the cell steps to the problem grids of all puzzles at once.
+
+Usage: moves.py check [puzzle ...] [--data-dir DIR]
+Replays the moves of each puzzle type and counts how many puzzles end up equal
+to their solution.
+'''
+
+import argparse
+import re
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+import corpus
+from export_npz import Vocabulary, encodeGrids
+
+# step opcodes (from the token prefix)
+OP_CELL = 0
+OP_HEDGE = 1
+OP_VEDGE = 2
+OP_NODE = 3
+PREFIX_OPS = {'':OP_CELL,'H':OP_HEDGE,'V':OP_VEDGE,'N':OP_NODE}
+
+NONE = -2**31 # value or state code for an empty field
+
+STEP_DTYPE = np.dtype([('op',np.uint8),('row',np.int16),('col',np.int16),
+                       ('value',np.int32),('state',np.int32),('notes',np.int32)])
+
+# groups: header letter, header number, prefix, coordinate, 3 fields, end of
+# puzzle, unrecognized token
+token_re = re.compile(r'([A-Z])(\d+);|([A-Z]?)([a-z]{2}|\d+)'
+                      r'(?:,([^,;\n]*))?(?:,([^,;\n]*))?(?:,([^,;\n]*))?;|(\n)|([^;\n]*;)')
+
+class MoveSteps:
+    '''
+    Decoded moves of N puzzles. The steps of puzzle i are
+    steps[offsets[i]:offsets[i+1]]. notes is an index into note_strings (-1 if
+    empty) and headers has the header tokens of each puzzle (like {'Z':2}).
+    '''
+    steps: np.ndarray
+    offsets: np.ndarray
+    headers: List[Dict[str,int]]
+    note_strings: List[str]
+    vocab: Vocabulary
+    unknown: List[str] # tokens that could not be decoded
+    def __init__(self, steps: np.ndarray, offsets: np.ndarray, headers: List[Dict[str,int]],
+            note_strings: List[str], vocab: Vocabulary, unknown: List[str]):
+        self.steps = steps
+        self.offsets = offsets
+        self.headers = headers
+        self.note_strings = note_strings
+        self.vocab = vocab
+        self.unknown = unknown
+    def __len__(self) -> int:
+        return len(self.offsets)-1
+    def puzzleSteps(self, i: int) -> np.ndarray:
+        return self.steps[self.offsets[i]:self.offsets[i+1]]
+    def puzzleIndex(self) -> np.ndarray:
+        ''' Puzzle of each step. '''
+        return np.repeat(np.arange(len(self)),np.diff(self.offsets))
+
+def _codes(strings: np.ndarray, vocab: Vocabulary) -> np.ndarray:
+    ''' Vocabulary codes for an array of field strings (NONE for empty ones). '''
+    unique,inverse = np.unique(strings,return_inverse=True)
+    vocab.addTokens(s for s in unique.tolist() if s != '')
+    table = np.array([NONE if s == '' else vocab.code(s) for s in unique.tolist()],dtype=np.int32)
+    return table[inverse.reshape(-1)] if len(strings) else np.zeros(0,dtype=np.int32)
+
+def decodeMoves(moves: List[Optional[str]], vocab: Optional[Vocabulary] = None) -> MoveSteps:
+    ''' Decode the moves strings of many puzzles (None if a puzzle has none). '''
+    if vocab is None:
+        vocab = Vocabulary()
+    joined = ''.join((m or '')+'\n' for m in moves)
+    tokens = np.array(token_re.findall(joined),dtype=str).reshape(-1,9)
+    end = tokens[:,7] != ''
+    # puzzle of each token, the end of puzzle marker belongs to the next one
+    puzzle = np.cumsum(end)-end
+    is_step = tokens[:,3] != ''
+    fields = tokens[is_step]
+    steps = np.zeros(len(fields),dtype=STEP_DTYPE)
+    steps['op'] = [PREFIX_OPS.get(p,OP_CELL) for p in fields[:,2].tolist()]
+    coords = fields[:,3]
+    numeric = np.char.isdigit(coords)
+    if numeric.any():
+        n = coords[numeric].astype(np.int64)
+        steps['row'][numeric] = n%100
+        steps['col'][numeric] = n//100
+    if not numeric.all():
+        letters = coords[~numeric].astype('<U2').view(np.uint32).reshape(-1,2).astype(np.int64)-ord('a')
+        steps['col'][~numeric] = letters[:,0]
+        steps['row'][~numeric] = letters[:,1]
+    steps['value'] = _codes(fields[:,4],vocab)
+    steps['state'] = _codes(fields[:,5],vocab)
+    note_strings,note_index = np.unique(fields[:,6],return_inverse=True)
+    note_strings = note_strings.tolist()
+    note_index = note_index.reshape(-1).astype(np.int32)
+    if note_strings and note_strings[0] == '':
+        note_strings.pop(0)
+        note_index -= 1
+    steps['notes'] = note_index
+    offsets = np.zeros(len(moves)+1,dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(puzzle[is_step],minlength=len(moves)))
+    headers: List[Dict[str,int]] = [dict() for _ in moves]
+    for i in np.flatnonzero(tokens[:,0] != '').tolist():
+        headers[puzzle[i]][str(tokens[i,0])] = int(tokens[i,1])
+    unknown = tokens[tokens[:,8] != '',8].tolist()
+    return MoveSteps(steps,offsets,headers,note_strings,vocab,unknown)
+
+def replay(cells: np.ndarray, dims: np.ndarray, moves: MoveSteps) -> np.ndarray:
+    '''
+    Apply the cell steps with a value to the encoded grids (N,R,C) of the same
+    vocabulary, returning the new grids. The last step for each cell wins and
+    steps outside of a grid are ignored.
+    '''
+    steps = moves.steps
+    puzzle = moves.puzzleIndex()
+    rows = steps['row'].astype(np.int64)
+    cols = steps['col'].astype(np.int64)
+    keep = (steps['op'] == OP_CELL) & (steps['value'] != NONE) & (rows >= 0) & (cols >= 0) \
+        & (rows < dims[puzzle,0]) & (cols < dims[puzzle,1])
+    _,R,C = cells.shape
+    key = (puzzle[keep]*R+rows[keep])*C+cols[keep]
+    values = steps['value'][keep]
+    # last occurrence of each cell, found as the first one in reverse order
+    key_last,index = np.unique(key[::-1],return_index=True)
+    result = cells.copy()
+    result.reshape(-1)[key_last] = values[::-1][index]
+    return result
+
+def replayObjects(objs: List[Dict[str,Any]]) -> Tuple[np.ndarray,np.ndarray]:
+    '''
+    Replay the moves of puzzle objects from their problem grids. Returns (has,
+    solved): whether each puzzle has moves, a problem and a solution, and
+    whether the replayed grid equals the solution.
+    '''
+    datas = [obj['data'] for obj in objs]
+    problems = [d.get('problem') for d in datas]
+    solutions = [d.get('solution') for d in datas]
+    vocab = Vocabulary()
+    vocab.addTokens(cell for grid in problems+solutions for row in grid or [] for cell in row)
+    moves = decodeMoves([d.get('moves') for d in datas],vocab)
+    has = np.array([d.get('moves') is not None and p is not None and s is not None
+                    for d,p,s in zip(datas,problems,solutions)],dtype=bool)
+    grids = [g for g in problems+solutions if g is not None]
+    shape = (max((len(g) for g in grids),default=0),
+             max((len(row) for g in grids for row in g),default=0))
+    prob,prob_dims,_ = encodeGrids(problems,vocab,shape)
+    sol,sol_dims,sol_mask = encodeGrids(solutions,vocab,shape)
+    final = replay(prob.astype(np.int64),prob_dims,moves)
+    diff = (final != sol) & sol_mask
+    solved = has & (prob_dims == sol_dims).all(axis=1) & ~diff.any(axis=(1,2))
+    return has,solved
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='decode and replay puzzle moves')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_check = sp.add_parser('check',help='replay moves and compare with the solutions')
+    ap_check.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap_check.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    if args.command == 'check':
+        total_has = total_solved = 0
+        for puzzle in args.puzzles or corpus.listTypes(args.data_dir):
+            objs = list(corpus.iterPuzzles(puzzle,args.data_dir))
+            has,solved = replayObjects(objs)
+            total_has += int(has.sum())
+            total_solved += int(solved.sum())
+            print('%s: %d puzzles, %d with moves, %d solved'%(puzzle,len(objs),has.sum(),solved.sum()))
+        print('total: %d with moves, %d solved'%(total_has,total_solved))
@@ -3,24 +3,89 @@ Given a directory of puzzle data files (extracted from the htm files with the
 extract_data.py script), this script will create a .jsonl file (1 JSON object
 per line) with all the puzzles in that directory.
 
-Usage: parse_data.py <puzzle> <out_file>
+Usage: parse_data.py <puzzle> <out_file> [--block-size N] [--processes N]
+           [--zstd-dict FILE] [--compact] [--sqlite DB] [--dedup]
+           [--dedup-index FILE] [--check] [--shard-size N] [--shard-bytes N]
+           [--edits FILE | --no-edits] [--intern] [--instrument REPORT]
+           [--profile DIR] [--profile-top N]
+       parse_data.py all [--format jsonl|bz2|zst] [--block-size N]
+           [--processes N] [--zstd-dict FILE] [--compact] [--sqlite DB]
+           [--dedup] [--dedup-index FILE] [--check] [--shard-size N]
+           [--shard-bytes N] [--edits FILE | --no-edits] [--intern]
+           [--instrument REPORT] [--profile DIR] [--profile-top N]
+       parse_data.py <puzzle> <out_file> --metadata [--edits FILE | --no-edits]
+           [--intern]
+       parse_data.py all --metadata [--format jsonl|bz2|zst]
+           [--edits FILE | --no-edits] [--intern]
 Puzzle is specified as its directory relative to /Raetsel on the website (/ for
 the root, /Sudoku for Sudoku, and so on)
+
+The edits in edits.json (or the file given with --edits) are applied to the
+files as they are read and files marked to skip are left out (see edits.py),
+--no-edits parses the files as they are.
+
+The output is compressed if out_file ends with .bz2 or .zst (zstd, optionally
+with a dictionary trained by block_jsonl.py). With --block-size, it is
+written as independently compressed blocks of N puzzles with an index file (see
+block_jsonl.py) so single puzzles can be read without decompressing everything.
+With --shard-size or --shard-bytes, the output is split into shard files with a
+manifest of their puzzle ranges and checksums (see shards.py), and writing again
+only rewrites the shards whose puzzles changed.
+With --compact, grids are written in the compact encodings from grid_codecs.py
+instead of lists of lists of strings. With --sqlite, the puzzles are also loaded
+into a SQLite database (see export_sqlite.py), replacing those of the same type,
+with the indexes created after all types are loaded.
+With --dedup, puzzles with the same fingerprint (all properties but the
+metadata, see dedup.py) as an earlier puzzle of the type are not written, and --dedup-index
+leaves out the duplicates listed in an index written by dedup.py (such as the
+puzzles of /Nonogramme that are also in /Nonograms).
+With --check, the solutions of Latin square types such as Sudoku are checked
+(see check_latin.py) and the inconsistent ones are listed.
+With --metadata, only the single line properties (puzzle, author, size, info and
+so on) are written. Grids and moves are skipped without being parsed, which is
+much faster than a full parse. The options for the full output (--compact,
+--dedup, --check, --sqlite, blocks, shards and so on) cannot be used with it.
+With --instrument, the time spent reading, tokenizing, parsing and serializing
+each type, the failed parser attempts, the bytes in and out and the peak memory
+are written to a JSON report, and --profile writes cProfile dumps of the slowest
+types (see instrument.py).
+With --intern, the parsers intern property names, string values and grid cells
+(see PuzzleParser.setIntern), so the puzzles of a type kept in memory until it is
+written share one object for each distinct string.
+
+A statistics sidecar (see corpus_stats.py) is written next to the output file
+(unless it is not a regular file, such as /dev/null), and parsing all puzzles
+also writes the rollup of all the sidecars.
 '''
 
+import argparse
+import contextlib
 import copy
+import hashlib
+import io
 import json
 import os
 import re
-import sys
 from tqdm import tqdm
-from typing import Dict, List, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from PuzzleParser import PuzzleParser, PropType
 import PuzzleParserUtils as ppu
+import block_jsonl
+import corpus_stats
+import edits
+import instrument as instr
+import shards
+from grid_codecs import C_INT
+import grid_codecs
 
 base_dir = os.path.normpath('../puzzle_x-janko/')
 
+# edits applied when parsing (see edits.py), None to parse the files as they are
+edits_file: Optional[str] = edits.EDITS_FILE
+_edits: Optional[Dict[str,List[edits.Edit]]] = None
+_edits_mtime: Optional[int] = None # modification time of the loaded edits file
+
 # puzzle path -> list of parsers to try (try in order until one works)
 parsermap: Dict[str,List[PuzzleParser]] = dict()
 
@@ -638,11 +703,11 @@ def createParsers():
 
     # /Nonogramme
     p2 = copy.deepcopy(prcgrid)
-    p2.addGrid('rlabels','rows','cols',flags='s')
-    p2.addGrid('clabels','cols','rows',flags='s')
+    p2.addGrid('rlabels','rows','cols',flags='s',codec=C_INT)
+    p2.addGrid('clabels','cols','rows',flags='s',codec=C_INT)
     p3 = copy.deepcopy(psizegrid)
-    p3.addGrid('rlabels','size','size',flags='s')
-    p3.addGrid('clabels','size','size',flags='s')
+    p3.addGrid('rlabels','size','size',flags='s',codec=C_INT)
+    p3.addGrid('clabels','size','size',flags='s',codec=C_INT)
     parsermap['/Nonogramme'] = [prcgrid,psizegrid,p2,p3]
 
     # /Nonograms
@@ -974,8 +1039,8 @@ def createParsers():
 
     # /Sukano
     p0 = copy.deepcopy(psizegrid)
-    p0.addGrid('rlabels','size','size',flags='s')
-    p0.addGrid('clabels','size','size',flags='s')
+    p0.addGrid('rlabels','size','size',flags='s',codec=C_INT)
+    p0.addGrid('clabels','size','size',flags='s',codec=C_INT)
     parsermap['/Sukano'] = [p0]
 
     # /Sukima
@@ -1174,56 +1239,364 @@ if 1:
                 print('add to noparsermap:',puzzle_path)
             #assert len(filenames) == 0
 
-def main(puzzle: str, out_file: str):
-    #puzzle = sys.argv[1]
-    #out_file = sys.argv[2]
+def writeJsonl(out_file: str, jsonl_data: List[Dict[str,Union[str,Dict[str,PropType]]]],
+        block_size: int = 0, processes: int = 1, zdict: Optional[str] = None,
+        shard_size: int = 0, shard_bytes: int = 0):
+    '''
+    Write the puzzle objects as JSONL, compressed if the file extension is for a
+    supported codec. A block size > 0 writes independently compressed blocks.
+    A shard size or shard bytes > 0 writes shards with a manifest instead of
+    out_file (see shards.py), writing out_file removes the shards of an earlier
+    sharded write.
+    '''
+    lines = (json.dumps(obj,separators=(',',':')) for obj in jsonl_data)
+    writeLines(out_file,lines,block_size,processes,zdict,shard_size,shard_bytes)
+
+def writeLines(out_file: str, lines: Iterable[str], block_size: int = 0, processes: int = 1,
+        zdict: Optional[str] = None, shard_size: int = 0, shard_bytes: int = 0):
+    ''' Write JSONL lines (without newlines) with the options of writeJsonl. '''
+    if shard_size > 0 or shard_bytes > 0:
+        written = shards.writeShards(out_file,lines,shard_size,shard_bytes,block_size,
+                                     processes,zdict)
+        print('%d shards written'%len(written))
+        return
+    shards.removeShards(out_file)
+    codec = block_jsonl.codecForFile(out_file)
+    if codec is None:
+        assert block_size == 0, 'block size requires a compressed output file'
+        assert zdict is None, 'zstd dictionary requires a .zst output file'
+        outf = open(out_file,'w')
+        for line in lines:
+            outf.write(line+'\n')
+        outf.close()
+    else:
+        block_jsonl.writeBlocks(out_file,lines,block_size,processes,codec,zdict)
+
+def scanMetadata(puzzle: str) -> Iterator[Dict[str,Union[str,Dict[str,PropType]]]]:
+    '''
+    Puzzle objects with only the single line properties (puzzle, author, size,
+    info, ...) of each file in a puzzle directory. Grids and long strings are
+    not converted (see PuzzleParser.parseLazy), so rows of grids are not
+    checked and files with invalid grids are not reported as failed. Files for
+    which no parser can scan the properties are skipped with an error message.
+    '''
     assert puzzle.startswith('/')
-    dir_path = base_dir + ('' if puzzle == '/' else puzzle)
-    file_name_list = sorted(os.listdir(dir_path))
-    files = [dir_path+'/'+f for f in file_name_list if os.path.isfile(dir_path+'/'+f)]
-    jsonl_data: List[Dict[str,Union[str,Dict[str,PropType]]]] = []
-    tqdm.write('opening dir: '+dir_path+' (%d files)'%len(files))
-    failed_files = []
-    for file in tqdm(files):
-        file_rel = puzzle+'/'+os.path.split(file)[1] # relative to /Raetsel dir
-        tqdm.write('\nprocessing: '+file_rel)
-        result = None
+    for file in sourceFiles(puzzle):
+        f = os.path.split(file)[1]
+        lines = open(file,'r').readlines()
+        if fileEdits(puzzle+'/'+f):
+            lines = editLines(puzzle+'/'+f,[line.strip() for line in lines if line.strip() != ''])
         errors = []
         for i,parser in enumerate(parsermap[puzzle]):
-            result: Union[None,Dict[str,PropType]] = None
             try:
-                result = parser.parse(open(file,'r'))
-                break
+                result = parser.parseLazy(lines)
             except Exception as e:
                 if isinstance(e,AssertionError):
                     raise e
                 errors.append('parser %d: '%i+str(e))
-        if result is None:
-            tqdm.write('\n'.join(errors))
-            tqdm.write('ERROR: not parsed')
-            failed_files.append(file)
+                continue
+            yield {'file':puzzle+'/'+f,'data':result.metadata()}
+            break
         else:
-            jsonl_data.append({'file':file_rel,'data':result})
+            tqdm.write('\n'.join(errors))
+            tqdm.write('ERROR: not scanned: '+puzzle+'/'+f)
+
+def mainMetadata(puzzle: str, out_file: str):
+    ''' Write the metadata of all puzzles of a type (see scanMetadata). '''
+    objs = list(scanMetadata(puzzle))
+    print('writing '+out_file+' (%d objects)'%len(objs))
+    writeJsonl(out_file,objs)
+
+def setEditsFile(path: Optional[str]):
+    global edits_file,_edits,_edits_mtime
+    edits_file = path
+    _edits = None
+    _edits_mtime = None
+
+def fileEdits(file_rel: str) -> List[edits.Edit]:
+    '''
+    Edits for a file (relative to /Raetsel). The edits file is loaded again when
+    its modification time changes (such as while watch.py runs).
+    '''
+    global _edits,_edits_mtime
+    mtime = None
+    if edits_file is not None and os.path.isfile(edits_file):
+        mtime = os.stat(edits_file).st_mtime_ns
+    if _edits is None or mtime != _edits_mtime:
+        _edits = dict() if mtime is None else edits.loadEdits(edits_file)
+        _edits_mtime = mtime
+    return _edits.get(file_rel,[])
+
+def editLines(file_rel: str, lines: List[str]) -> List[str]:
+    ''' Apply the edits for a file to its stripped nonempty lines. '''
+    ops = fileEdits(file_rel)
+    if not ops:
+        return lines
+    lines,unapplied = edits.applyEdits(lines,ops)
+    for op in unapplied:
+        tqdm.write('WARNING: edit not applied to %s: %s'%(file_rel,json.dumps(op)))
+    return lines
+
+def sourceFiles(puzzle: str) -> List[str]:
+    '''
+    Paths of the files of a puzzle directory, in the order they are written,
+    without the files skipped by the edits.
+    '''
+    dir_path = base_dir + ('' if puzzle == '/' else puzzle)
+    file_name_list = sorted(os.listdir(dir_path))
+    return [dir_path+'/'+f for f in file_name_list if os.path.isfile(dir_path+'/'+f)
+            and not edits.isSkipped(fileEdits(puzzle+'/'+f))]
+
+def schemaFingerprint(puzzle: str) -> str:
+    '''
+    Hash of the fingerprints of the parsers of a type (see
+    PuzzleParser.fingerprint) and of the edits of its files.
+    '''
+    text = ','.join(parser.fingerprint() for parser in parsermap[puzzle])
+    dir_path = base_dir + ('' if puzzle == '/' else puzzle)
+    for f in sorted(os.listdir(dir_path)):
+        if fileEdits(puzzle+'/'+f):
+            text += json.dumps([f,fileEdits(puzzle+'/'+f)])
+    return hashlib.blake2b(text.encode(),digest_size=16).hexdigest()
+
+def outputObject(file_rel: str, result: Dict[str,PropType], parser: PuzzleParser,
+        compact: bool = False) -> Dict[str,Union[str,Dict[str,PropType]]]:
+    '''
+    Object written for a parse result, with the grids in the codecs of the
+    parser if compact (see grid_codecs.encodeResult).
+    '''
+    if not compact:
+        return {'file':file_rel,'data':result}
+    data,codecs = grid_codecs.encodeResult(result,parser.gridCodecs())
+    obj = {'file':file_rel,'data':data}
+    if codecs:
+        obj['codecs'] = codecs
+    return obj
+
+def parseFile(puzzle: str, file: str, instrument: Optional[instr.Instrument] = None) \
+        -> Tuple[Optional[Dict[str,PropType]],Optional[PuzzleParser],List[str]]:
+    '''
+    Parse a file with the parsers of its puzzle type, trying them in order.
+    Returns the result and the parser that worked, or None for both and the
+    error of each parser if none did.
+    '''
+    phase = instrument.phase if instrument is not None else lambda name: contextlib.nullcontext()
+    with phase('read'):
+        raw = open(file,'rb').read()
+    with phase('tokenize'):
+        lines = [line.strip() for line in io.TextIOWrapper(io.BytesIO(raw))]
+        lines = [line for line in lines if line != '']
+        lines = editLines(puzzle+'/'+os.path.split(file)[1],lines)
+    errors = []
+    for i,parser in enumerate(parsermap[puzzle]):
+        try:
+            with phase('parse'):
+                result = parser.parse(lines)
+        except Exception as e:
+            if isinstance(e,AssertionError):
+                raise e
+            errors.append('parser %d: '%i+str(e))
+            if instrument is not None:
+                instrument.failedAttempt()
+            continue
+        if instrument is not None:
+            instrument.addFile(len(raw))
+        return result,parser,errors
+    if instrument is not None:
+        instrument.addFile(len(raw),True)
+    return None,None,errors
+
+def main(puzzle: str, out_file: str, block_size: int = 0, processes: int = 1,
+        zdict: Optional[str] = None, compact: bool = False, sqlite: Optional[str] = None,
+        drop_duplicates: bool = False, dedup_index: Optional[str] = None,
+        check: bool = False, instrument: Optional[instr.Instrument] = None,
+        shard_size: int = 0, shard_bytes: int = 0):
+    #puzzle = sys.argv[1]
+    #out_file = sys.argv[2]
+    assert puzzle.startswith('/')
+    if instrument is not None:
+        instrument.begin(puzzle)
+        phase = instrument.phase
+    else:
+        phase = lambda name: contextlib.nullcontext()
+    dir_path = base_dir + ('' if puzzle == '/' else puzzle)
+    files = sourceFiles(puzzle)
+    jsonl_data: List[Dict[str,Union[str,Dict[str,PropType]]]] = []
+    tqdm.write('opening dir: '+dir_path+' (%d files)'%len(files))
+    failed_files = []
+    # modules for optional features are imported when used (check_latin needs numpy)
+    if drop_duplicates or dedup_index is not None:
+        import dedup
+    # duplicates (see dedup.py) are left out of the output
+    drop_files = set() if dedup_index is None else set(dedup.droppedFiles(dedup.readIndex(dedup_index)))
+    dropped = [] # file keys left out as duplicates
+    parsers: Dict[str,PuzzleParser] = dict() # file -> parser that parsed it
+    def parsedObjects() -> Iterator[Dict[str,Union[str,Dict[str,PropType]]]]:
+        for file in tqdm(files):
+            file_rel = puzzle+'/'+os.path.split(file)[1] # relative to /Raetsel dir
+            tqdm.write('\nprocessing: '+file_rel)
+            result,parser,errors = parseFile(puzzle,file,instrument)
+            if result is None:
+                tqdm.write('\n'.join(errors))
+                tqdm.write('ERROR: not parsed')
+                failed_files.append(file)
+                continue
+            if file_rel in drop_files:
+                tqdm.write('duplicate, not written')
+                dropped.append(file_rel)
+                continue
+            parsers[file_rel] = parser
+            yield {'file':file_rel,'data':result}
+    objs: Iterable[Dict[str,Union[str,Dict[str,PropType]]]] = parsedObjects()
+    if drop_duplicates:
+        objs = dedup.dropDuplicates(objs,dropped=dropped)
+    for obj in objs:
+        jsonl_data.append(outputObject(obj['file'],obj['data'],parsers[obj['file']],compact))
     print()
     print('failed files (%d):'%len(failed_files))
     print('\n'.join(failed_files))
     print()
+    if drop_duplicates or dedup_index is not None:
+        print('duplicates not written (%d):'%len(dropped))
+        print('\n'.join(dropped))
+        print()
+    if check:
+        import check_latin
+    if check and puzzle in check_latin.LATIN_TYPES:
+        objs = [grid_codecs.decodeObject(obj) for obj in jsonl_data] if compact else jsonl_data
+        inconsistent = check_latin.checkObjects(puzzle,objs)
+        print('inconsistent solutions (%d):'%len(inconsistent))
+        for file_rel,checks in sorted(inconsistent.items()):
+            print(file_rel+': '+','.join(checks))
+        print()
     print('writing '+out_file+' (%d objects)'%len(jsonl_data))
-    outf = open(out_file,'w')
-    for obj in jsonl_data:
-        outf.write(json.dumps(obj,separators=(',',':'))+'\n')
-    outf.close()
+    with phase('serialize'):
+        writeJsonl(out_file,jsonl_data,block_size,processes,zdict,shard_size,shard_bytes)
+    if instrument is not None and (shard_size > 0 or shard_bytes > 0):
+        manifest = shards.readManifest(shards.manifestFileName(out_file))
+        instrument.setOutput(sum(shard['bytes'] for shard in manifest['shards']))
+    elif instrument is not None and os.path.isfile(out_file):
+        instrument.setOutput(os.path.getsize(out_file))
+    failed_rel = [puzzle+'/'+os.path.split(file)[1] for file in failed_files]
+    # no sidecar for outputs that are not regular files (such as /dev/null)
+    if shard_size > 0 or shard_bytes > 0 or os.path.isfile(out_file):
+        corpus_stats.writeStats(corpus_stats.statsFileName(out_file),
+                                corpus_stats.computeStats(puzzle,jsonl_data,failed_rel))
+    if sqlite is not None:
+        import export_sqlite
+        print('loading into '+sqlite)
+        conn = export_sqlite.connect(sqlite)
+        export_sqlite.insertPuzzles(conn,puzzle,jsonl_data)
+        conn.close()
+    if instrument is not None:
+        instrument.end(puzzle)
     print('done')
     if len(failed_files) > 0:
         assert 0
 
+def indexSqlite(sqlite: str):
+    ''' Create the indexes once after loading the types (as export_sqlite.exportTypes). '''
+    import export_sqlite
+    conn = export_sqlite.connect(sqlite)
+    export_sqlite.createIndexes(conn)
+    conn.close()
+
 if __name__ == '__main__':
-    if len(sys.argv) > 2:
-        main(sys.argv[1],sys.argv[2])
-    elif sys.argv[1] == 'all':
-        for puzzle in parsermap:
-            #print(puzzle,'->','../puzzle_jsonl/'+puzzle[1:].replace('/','_')+'.jsonl')
-            main(puzzle,'../puzzle_jsonl/'+puzzle[1:].replace('/','_')+'.jsonl')
+    ap = argparse.ArgumentParser(description='parse puzzle files to JSONL')
+    ap.add_argument('puzzle',help='puzzle path (such as /Sudoku) or "all"')
+    ap.add_argument('out_file',nargs='?',help='output file (not used with "all")')
+    ap.add_argument('--format',choices=['jsonl','bz2','zst'],default='jsonl',
+                    help='output format when parsing all puzzles')
+    ap.add_argument('--block-size',type=int,default=0,
+                    help='puzzles per compressed block (0 for a single stream)')
+    ap.add_argument('--processes',type=int,default=1,
+                    help='processes for compressing blocks')
+    ap.add_argument('--zstd-dict',help='zstd dictionary file for .zst output')
+    ap.add_argument('--compact',action='store_true',
+                    help='write grids with compact encodings (see grid_codecs.py)')
+    ap.add_argument('--sqlite',help='also load the puzzles into this SQLite database')
+    ap.add_argument('--dedup',action='store_true',
+                    help='leave out puzzles with the same grids as an earlier one')
+    ap.add_argument('--dedup-index',help='leave out duplicates listed in this index (dedup.py)')
+    ap.add_argument('--check',action='store_true',
+                    help='check the solutions of Latin square types (see check_latin.py)')
+    ap.add_argument('--metadata',action='store_true',
+                    help='only write the single line properties (no grids or moves)')
+    ap.add_argument('--shard-size',type=int,default=0,
+                    help='write shards of N puzzles with a manifest (see shards.py)')
+    ap.add_argument('--shard-bytes',type=int,default=0,
+                    help='write shards of about N uncompressed bytes with a manifest')
+    ap.add_argument('--edits',default=edits.EDITS_FILE,
+                    help='edits to apply when parsing (see edits.py)')
+    ap.add_argument('--no-edits',action='store_true',help='parse the files without edits')
+    ap.add_argument('--intern',action='store_true',
+                    help='intern strings and grid cells while parsing to save memory')
+    ap.add_argument('--instrument',help='write timings of each phase to this JSON report')
+    ap.add_argument('--profile',help='write cProfile dumps of the slowest types to this directory')
+    ap.add_argument('--profile-top',type=int,default=instr.PROFILE_TOP,
+                    help='number of profile dumps to keep')
+    args = ap.parse_args()
+    if args.metadata:
+        # options of the full output that scanMetadata does not support
+        unsupported = [('--block-size',args.block_size != 0),('--processes',args.processes != 1),
+                       ('--zstd-dict',args.zstd_dict is not None),('--compact',args.compact),
+                       ('--sqlite',args.sqlite is not None),('--dedup',args.dedup),
+                       ('--dedup-index',args.dedup_index is not None),('--check',args.check),
+                       ('--shard-size',args.shard_size != 0),('--shard-bytes',args.shard_bytes != 0),
+                       ('--instrument',args.instrument is not None),
+                       ('--profile',args.profile is not None)]
+        for option,used in unsupported:
+            if used:
+                ap.error(option+' cannot be used with --metadata')
+    setEditsFile(None if args.no_edits else args.edits)
+    if args.intern:
+        for parsers in parsermap.values():
+            for parser in parsers:
+                parser.setIntern()
+    instrument = None
+    if args.instrument is not None or args.profile is not None:
+        instrument = instr.Instrument(args.profile,args.profile_top)
+    if args.metadata:
+        if args.out_file is not None:
+            mainMetadata(args.puzzle,args.out_file)
+        elif args.puzzle == 'all':
+            ext = '.jsonl' if args.format == 'jsonl' else '.jsonl.'+args.format
+            for puzzle in parsermap:
+                mainMetadata(puzzle,'../puzzle_jsonl/'+puzzle[1:].replace('/','_')+'.meta'+ext)
+        else:
+            ap.error('out_file is required')
+    elif args.out_file is not None:
+        try:
+            main(args.puzzle,args.out_file,args.block_size,args.processes,args.zstd_dict,
+                 args.compact,args.sqlite,args.dedup,args.dedup_index,args.check,instrument,
+                 args.shard_size,args.shard_bytes)
+        finally:
+            if args.sqlite is not None:
+                indexSqlite(args.sqlite)
+            if instrument is not None:
+                if args.instrument is not None:
+                    instrument.write(args.instrument)
+                instrument.pruneProfiles()
+    elif args.puzzle == 'all':
+        ext = '.jsonl' if args.format == 'jsonl' else '.jsonl.'+args.format
+        try:
+            for puzzle in parsermap:
+                #print(puzzle,'->','../puzzle_jsonl/'+puzzle[1:].replace('/','_')+'.jsonl')
+                main(puzzle,'../puzzle_jsonl/'+puzzle[1:].replace('/','_')+ext,
+                     args.block_size,args.processes,args.zstd_dict,args.compact,args.sqlite,
+                     args.dedup,args.dedup_index,args.check,instrument,
+                     args.shard_size,args.shard_bytes)
+        finally:
+            # the rollup, indexes, report and profiles of the types parsed so far
+            # if one fails (the rollup is made from the sidecars that were written)
+            corpus_stats.rollup('../puzzle_jsonl')
+            if args.sqlite is not None:
+                indexSqlite(args.sqlite)
+            if instrument is not None:
+                if args.instrument is not None:
+                    instrument.write(args.instrument)
+                instrument.pruneProfiles()
+    else:
+        ap.error('out_file is required')
     #for puzzle in parsermap:
     #    main(puzzle,'/dev/null')
-
@@ -0,0 +1,167 @@
+'''
+Lookup of single puzzles by type and number with an LRU cache of the decoded
+puzzles, limited by an approximate memory budget in bytes.
+
+Example:
+import puzzle_cache
+obj = puzzle_cache.get('/Sudoku',375) # {"file":"/Sudoku/0375.a.x-janko","data":...}
+puzzle_cache.stats() # hits, misses, evictions, entries, bytes
+
+On a miss only the requested puzzle is decoded. For data files with a block
+index (block_jsonl.py), only the block containing it is decompressed. Other
+files are decompressed once and their raw lines are kept by file key (without
+decoding them). The returned objects are shared with the cache, so they
+should not be modified.
+'''
+
+import collections
+import json
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import block_jsonl
+import corpus
+import grid_codecs
+
+DEFAULT_BUDGET = 64*2**20
+
+# puzzle is given by its number or its file key
+PuzzleId = Union[int,str]
+
+def sizeOf(obj: Any) -> int:
+    ''' Approximate memory used by a decoded JSON value. '''
+    size = sys.getsizeof(obj)
+    if isinstance(obj,dict):
+        for k,v in obj.items():
+            size += sizeOf(k)+sizeOf(v)
+    elif isinstance(obj,list):
+        for v in obj:
+            size += sizeOf(v)
+    return size
+
+class PuzzleCache:
+    '''
+    LRU cache of puzzle objects, safe to use from several threads. Entries are
+    kept under their file key (a lookup by number is mapped to it), and are
+    evicted (least recently used first) when the total estimated size exceeds
+    the budget. A puzzle larger than the whole budget is returned without being
+    cached. For data files without a block index, the raw lines are kept after
+    the first miss (by file key and number), so later misses in the same file do
+    not decompress it again. These scans have their own budget of the same size.
+    '''
+    budget: int
+    data_dir: str
+    hits: int
+    misses: int
+    evictions: int
+    _entries: 'collections.OrderedDict[Tuple[str,str],Tuple[Dict[str,Any],int]]'
+    _keys: Dict[Tuple[str,int],str] # (type,number) -> file key of a cached puzzle
+    _indexes: Dict[str,Optional[Dict[str,Any]]] # data file -> block index
+    _scans: 'collections.OrderedDict[str,Tuple[Dict[PuzzleId,bytes],int]]' # data file -> lines
+    _size: int
+    _scan_size: int
+    _lock: threading.Lock
+    def __init__(self, budget: int = DEFAULT_BUDGET, data_dir: str = corpus.data_dir):
+        self.budget = budget
+        self.data_dir = data_dir
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._keys = dict()
+        self._indexes = dict()
+        self._scans = collections.OrderedDict()
+        self._size = 0
+        self._scan_size = 0
+        self._lock = threading.Lock()
+    def _index(self, path: str) -> Optional[Dict[str,Any]]:
+        if path not in self._indexes:
+            self._indexes[path] = block_jsonl.readIndex(path)
+        return self._indexes[path]
+    def _scan(self, path: str) -> Dict[PuzzleId,bytes]:
+        ''' Raw lines of a file without a block index by file key and number. '''
+        if path in self._scans:
+            self._scans.move_to_end(path)
+            return self._scans[path][0]
+        lines: Dict[PuzzleId,bytes] = dict()
+        size = 0
+        for line in corpus.readLines(path):
+            key = block_jsonl.fileKey(line)
+            num = block_jsonl.puzzleNumber(key)
+            lines[key] = line
+            if num is not None:
+                lines.setdefault(num,line)
+            size += len(line)
+        self._scans[path] = (lines,size)
+        self._scan_size += size
+        while self._scan_size > self.budget and len(self._scans) > 1:
+            _,(_,old_size) = self._scans.popitem(last=False)
+            self._scan_size -= old_size
+        return lines
+    def _load(self, puzzle: str, number: PuzzleId) -> Dict[str,Any]:
+        path = corpus.dataFile(puzzle,self.data_dir)
+        index = self._index(path)
+        if index is not None:
+            block,line = block_jsonl.findPuzzle(index,number)
+            lines = block_jsonl.readBlock(path,index['blocks'][block],index['codec'])
+            return grid_codecs.decodeObject(json.loads(lines[line]))
+        found = self._scan(path).get(number)
+        if found is None:
+            raise KeyError((puzzle,number))
+        return grid_codecs.decodeObject(json.loads(found))
+    def get(self, puzzle: str, number: PuzzleId) -> Dict[str,Any]:
+        '''
+        Puzzle object for a type (such as /Sudoku) and a puzzle number or file
+        key. Raises KeyError if there is no such puzzle.
+        '''
+        with self._lock:
+            file = number if isinstance(number,str) else self._keys.get((puzzle,number))
+            entry = None if file is None else self._entries.get((puzzle,file))
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end((puzzle,file))
+                return entry[0]
+            self.misses += 1
+            obj = self._load(puzzle,number)
+            size = sizeOf(obj)
+            if size > self.budget:
+                return obj
+            key = (puzzle,obj['file'])
+            if isinstance(number,int):
+                self._keys[(puzzle,number)] = obj['file']
+            self._entries[key] = (obj,size)
+            self._size += size
+            while self._size > self.budget:
+                (old_puzzle,old_file),(_,old_size) = self._entries.popitem(last=False)
+                self._keys.pop((old_puzzle,block_jsonl.puzzleNumber(old_file)),None)
+                self._size -= old_size
+                self.evictions += 1
+            return obj
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._scans.clear()
+            self._size = 0
+            self._scan_size = 0
+    def stats(self) -> Dict[str,int]:
+        with self._lock:
+            return {'hits':self.hits,'misses':self.misses,'evictions':self.evictions,
+                    'entries':len(self._entries),'bytes':self._size,'budget':self.budget,
+                    'scan_bytes':self._scan_size}
+
+_cache: Optional[PuzzleCache] = None
+
+def defaultCache() -> PuzzleCache:
+    ''' Cache used by get() and stats(), created on first use. '''
+    global _cache
+    if _cache is None:
+        _cache = PuzzleCache()
+    return _cache
+
+def get(puzzle: str, number: PuzzleId) -> Dict[str,Any]:
+    return defaultCache().get(puzzle,number)
+
+def stats() -> Dict[str,int]:
+    return defaultCache().stats()
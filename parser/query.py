@@ -0,0 +1,150 @@
+'''
+Query the parsed puzzle data from the command line.
+
+Usage: query.py [--type TYPE ...] [--where COND ...] [--fields F1,F2,...]
+           [--processes N] [--limit N] [--data-dir DIR]
+Example: query.py --type Sudoku --where size=9 --where author~Janko --fields file,problem
+
+TYPE is a puzzle type as a path (/Sudoku/Chaos) or data file name (Sudoku_Chaos)
+and can be a glob pattern (Sudoku*). COND is <prop><op><value> where op is one
+of = != ~ (substring) < <= > >= (integer comparison). Each matching puzzle is
+printed as one JSON object with the selected fields ("file" and properties of
+"data"), or the whole puzzle object without --fields.
+
+Types are selected from the file names alone, so other files are not opened.
+Before a line is decoded, it is checked against the raw bytes implied by the
+conditions (the property must appear except for !=, and the exact JSON value
+for = and ~), so most lines that do not match are never decoded. Files are searched in parallel.
+'''
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
+
+import corpus
+import grid_codecs
+
+cond_re = re.compile(r'^(\w+)(!=|<=|>=|=|~|<|>)(.*)$')
+
+# (prop,op,value) of a --where condition
+Condition = Tuple[str,str,str]
+
+def parseCondition(s: str) -> Condition:
+    m = cond_re.match(s)
+    if m is None:
+        raise ValueError('invalid condition: '+s)
+    if m.group(2) in ('<','<=','>','>=') and not re.match(r'^-?\d+$',m.group(3)):
+        raise ValueError('integer comparison needs an integer: '+s)
+    return m.group(1),m.group(2),m.group(3)
+
+def selectTypes(patterns: List[str], data_dir: str = corpus.data_dir) -> List[str]:
+    ''' Puzzle types matching any of the patterns (all types if none). '''
+    types = corpus.listTypes(data_dir)
+    if not patterns:
+        return types
+    selected = []
+    for puzzle in types:
+        names = [puzzle,corpus.typeFileStem(puzzle)]
+        if any(fnmatch.fnmatchcase(name,pat) for pat in patterns for name in names):
+            selected.append(puzzle)
+    return selected
+
+def _prefilter(cond: Condition) -> Optional[Pattern[bytes]]:
+    ''' Regex that a raw line must match to possibly satisfy a condition. '''
+    prop,op,value = cond
+    if prop == 'file':
+        return None
+    key = json.dumps(prop).encode()+b':'
+    if op == '=':
+        alts = [re.escape(json.dumps(value).encode())]
+        if re.match(r'^-?\d+$',value):
+            alts.append(re.escape(value.encode())+rb'[,}]')
+        return re.compile(re.escape(key)+b'(?:'+b'|'.join(alts)+b')')
+    if op == '~':
+        return re.compile(re.escape(key)+rb'"?(?:[^"\\]|\\.)*?'
+                          +re.escape(json.dumps(value)[1:-1].encode()))
+    if op == '!=': # puzzles without the property match
+        return None
+    return re.compile(re.escape(key))
+
+def _compare(actual: Any, op: str, value: str) -> bool:
+    if actual is None or isinstance(actual,list):
+        return op == '!=' and actual is None
+    if op == '=':
+        return str(actual) == value
+    if op == '!=':
+        return str(actual) != value
+    if op == '~':
+        return value in str(actual)
+    if not isinstance(actual,int):
+        return False
+    target = int(value)
+    if op == '<':
+        return actual < target
+    if op == '<=':
+        return actual <= target
+    if op == '>':
+        return actual > target
+    assert op == '>='
+    return actual >= target
+
+def matches(obj: Dict[str,Any], conds: List[Condition]) -> bool:
+    for prop,op,value in conds:
+        actual = obj['file'] if prop == 'file' else obj['data'].get(prop)
+        if not _compare(actual,op,value):
+            return False
+    return True
+
+def _selectFields(obj: Dict[str,Any], fields: Optional[List[str]]) -> Dict[str,Any]:
+    if fields is None:
+        return obj
+    return {f:(obj['file'] if f == 'file' else obj['data'].get(f)) for f in fields}
+
+def queryType(args: Tuple[str,str,List[Condition],Optional[List[str]]]) -> List[str]:
+    ''' Output lines for the matching puzzles of one type. '''
+    puzzle,data_dir,conds,fields = args
+    filters = [f for f in map(_prefilter,conds) if f is not None]
+    out: List[str] = []
+    for line in corpus.iterLines(puzzle,data_dir):
+        if not all(f.search(line) for f in filters):
+            continue
+        obj = grid_codecs.decodeObject(json.loads(line))
+        if matches(obj,conds):
+            out.append(json.dumps(_selectFields(obj,fields),separators=(',',':')))
+    return out
+
+def query(types: List[str], conds: List[Condition], fields: Optional[List[str]] = None,
+        processes: int = 1, data_dir: str = corpus.data_dir) -> Iterator[str]:
+    ''' Output lines for all matching puzzles, in the order of the types. '''
+    tasks = [(puzzle,data_dir,conds,fields) for puzzle in types]
+    if processes > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(processes) as pool:
+            for lines in pool.imap(queryType,tasks):
+                yield from lines
+    else:
+        for task in tasks:
+            yield from queryType(task)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='query the parsed puzzle data')
+    ap.add_argument('--type',action='append',default=[],help='puzzle type or glob')
+    ap.add_argument('--where',action='append',default=[],help='condition like size=9')
+    ap.add_argument('--fields',help='comma separated fields to print')
+    ap.add_argument('--processes',type=int,default=os.cpu_count() or 1)
+    ap.add_argument('--limit',type=int,default=0,help='stop after N results')
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    try:
+        conds = [parseCondition(c) for c in args.where]
+    except ValueError as e:
+        ap.error(str(e))
+    types = selectTypes(args.type,args.data_dir)
+    fields = args.fields.split(',') if args.fields else None
+    for i,line in enumerate(query(types,conds,fields,args.processes,args.data_dir),1):
+        print(line)
+        if i == args.limit:
+            break
@@ -0,0 +1,227 @@
+'''
+Sharded JSONL output for large puzzle types. The lines of a type are split into
+shards of shard_size puzzles (or of about shard_bytes uncompressed bytes), each
+written as its own file next to where the single file would be, such as
+Nonograms.0000.jsonl.bz2, Nonograms.0001.jsonl.bz2, ... for
+Nonograms.jsonl.bz2, with a manifest Nonograms.manifest.json:
+{
+    "codec": "bz2", (or null for uncompressed shards)
+    "shard_size": 1000,
+    "shard_bytes": 0,
+    "block_size": 0, (see block_jsonl.py)
+    "zstd_dict": null, (file name of the zstd dictionary)
+    "zstd_dict_checksum": null, (hash of the dictionary file)
+    "count": 2300,
+    "shards": [
+        {"file": "Nonograms.0000.jsonl.bz2", "start": 0, "count": 1000,
+         "first": "/Nonograms/0001.a.x-janko", "last": "/Nonograms/1000.a.x-janko",
+         "content": "...", "bytes": 1234567, "checksum": "..."},
+        ...
+    ]
+}
+start is the index of the first puzzle of the shard in the type, first and last
+the file keys of its first and last puzzle, content the hash of its
+uncompressed lines, bytes the size of the shard file and checksum the hash of
+the shard file (both hashes are 16 byte blake2b). Consumers can hand out shards
+to workers and check them with the checksum. corpus.py reads a sharded type
+through its manifest (which is used before a single data file of the type).
+
+When the output is written again, a shard whose file is unchanged (same checksum
+as in the old manifest) and whose content is the same is not rewritten (unless
+the block size or the contents of the dictionary changed), so after reparsing
+only the shards with changed puzzles are compressed and written. Shard files of
+the old manifest that are not in the new one (past the end, or with the
+extension of another codec) are removed. With shard_size, the shard boundaries
+only move when puzzles are added or removed. Shards can be compressed as blocks
+with an index (see block_jsonl.py).
+
+Usage: shards.py split <in_file> <out_file> [--shard-size N] [--shard-bytes N]
+           [--block-size N] [--processes N] [--zstd-dict FILE]
+       shards.py check <manifest>
+split shards an existing (plain or compressed) JSONL file, check verifies the
+shard files of a manifest.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+import block_jsonl
+import corpus
+
+def manifestFileName(out_file: str) -> str:
+    ''' Manifest path for an output file, such as Sudoku.jsonl.bz2 -> Sudoku.manifest.json. '''
+    return corpus.data_ext_re.sub('',out_file)+corpus.manifest_ext
+
+def shardFileName(out_file: str, i: int) -> str:
+    ''' Path of shard i, such as Sudoku.jsonl.bz2 -> Sudoku.0003.jsonl.bz2. '''
+    m = corpus.data_ext_re.search(out_file)
+    assert m is not None, 'not a JSONL file name: '+out_file
+    return out_file[:m.start()]+'.%04d'%i+m.group()
+
+def splitShards(lines: Iterable[bytes], shard_size: int = 0, shard_bytes: int = 0) \
+        -> Iterator[List[bytes]]:
+    ''' Group lines into shards of shard_size lines or about shard_bytes bytes. '''
+    assert shard_size > 0 or shard_bytes > 0
+    shard: List[bytes] = []
+    size = 0
+    for line in lines:
+        shard.append(line)
+        size += len(line)+1
+        if (shard_size > 0 and len(shard) >= shard_size) \
+                or (shard_bytes > 0 and size >= shard_bytes):
+            yield shard
+            shard = []
+            size = 0
+    if shard:
+        yield shard
+
+def contentHash(lines: List[bytes]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for line in lines:
+        h.update(line+b'\n')
+    return h.hexdigest()
+
+def fileChecksum(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    f = open(path,'rb')
+    for chunk in iter(lambda: f.read(2**20),b''):
+        h.update(chunk)
+    f.close()
+    return h.hexdigest()
+
+def readManifest(path: str) -> Dict[str,Any]:
+    return json.load(open(path,'r'))
+
+def _unchanged(entry: Dict[str,Any], old: Optional[Dict[str,Any]], path: str) -> bool:
+    return old is not None and old['file'] == entry['file'] \
+        and old['content'] == entry['content'] and os.path.isfile(path) \
+        and fileChecksum(path) == old['checksum']
+
+def _removeFiles(dir_path: str, files: List[str], keep: Set[str] = set()):
+    ''' Remove shard files (and their block indexes) except those in keep. '''
+    for f in files:
+        if f in keep:
+            continue
+        path = os.path.join(dir_path,f)
+        for stale in [path,block_jsonl.indexFileName(path)]:
+            if os.path.isfile(stale):
+                os.remove(stale)
+
+def removeShards(out_file: str):
+    '''
+    Remove the manifest of an output file and its shards, if there is one (when
+    the type is written as a single file again, since the manifest is read first).
+    '''
+    manifest_file = manifestFileName(out_file)
+    if os.path.isfile(manifest_file):
+        _removeFiles(os.path.dirname(out_file),
+                     [entry['file'] for entry in readManifest(manifest_file)['shards']])
+        os.remove(manifest_file)
+
+def writeShards(out_file: str, lines: Iterable[Union[str,bytes]], shard_size: int = 0,
+        shard_bytes: int = 0, block_size: int = 0, processes: int = 1,
+        zdict: Optional[str] = None) -> List[int]:
+    '''
+    Write lines (without trailing newlines) as shards with a manifest (see
+    module docstring). Returns the indexes of the shards that were written.
+    '''
+    codec = block_jsonl.codecForFile(out_file)
+    assert codec is not None or block_size == 0, 'block size requires a compressed output file'
+    manifest_file = manifestFileName(out_file)
+    zdict_name = None if zdict is None else os.path.basename(zdict)
+    zdict_checksum = None if zdict is None else fileChecksum(zdict)
+    old_shards = []
+    reuse = False
+    if os.path.isfile(manifest_file):
+        old_manifest = readManifest(manifest_file)
+        old_shards = old_manifest['shards']
+        # the dictionary is compared by its contents, a retrained dictionary
+        # usually keeps its file name
+        reuse = old_manifest.get('block_size') == block_size \
+            and old_manifest.get('zstd_dict_checksum') == zdict_checksum
+    blines = (line.encode() if isinstance(line,str) else line for line in lines)
+    entries: List[Dict[str,Any]] = []
+    written: List[int] = []
+    start = 0
+    for i,shard in enumerate(splitShards(blines,shard_size,shard_bytes)):
+        path = shardFileName(out_file,i)
+        entry = {'file':os.path.basename(path),'start':start,'count':len(shard),
+                 'first':block_jsonl.fileKey(shard[0]),'last':block_jsonl.fileKey(shard[-1]),
+                 'content':contentHash(shard)}
+        old = old_shards[i] if i < len(old_shards) else None
+        if reuse and _unchanged(entry,old,path):
+            entry['bytes'] = old['bytes']
+            entry['checksum'] = old['checksum']
+        else:
+            if codec is None:
+                outf = open(path,'wb')
+                outf.write(b''.join(line+b'\n' for line in shard))
+                outf.close()
+            else:
+                block_jsonl.writeBlocks(path,shard,block_size,processes,codec,zdict)
+            entry['bytes'] = os.path.getsize(path)
+            entry['checksum'] = fileChecksum(path)
+            written.append(i)
+        entries.append(entry)
+        start += len(shard)
+    # shards past the end from an earlier write with more shards, or written
+    # with another codec
+    _removeFiles(os.path.dirname(out_file),[old['file'] for old in old_shards],
+                 {entry['file'] for entry in entries})
+    manifest = {'codec':codec,'shard_size':shard_size,'shard_bytes':shard_bytes,
+                'block_size':block_size,'zstd_dict':zdict_name,
+                'zstd_dict_checksum':zdict_checksum,'count':start,'shards':entries}
+    outf = open(manifest_file,'w')
+    outf.write(json.dumps(manifest,indent=1)+'\n')
+    outf.close()
+    return written
+
+def shardPaths(manifest_file: str) -> List[str]:
+    manifest = readManifest(manifest_file)
+    return [os.path.join(os.path.dirname(manifest_file),s['file']) for s in manifest['shards']]
+
+def readLines(manifest_file: str) -> Iterator[bytes]:
+    ''' Lines of all shards of a manifest, in order. '''
+    for path in shardPaths(manifest_file):
+        yield from block_jsonl.readLines(path)
+
+def checkShards(manifest_file: str) -> List[str]:
+    ''' Errors for shard files that are missing or do not match the manifest. '''
+    errors = []
+    manifest = readManifest(manifest_file)
+    for entry,path in zip(manifest['shards'],shardPaths(manifest_file)):
+        if not os.path.isfile(path):
+            errors.append(entry['file']+': missing')
+        elif fileChecksum(path) != entry['checksum']:
+            errors.append(entry['file']+': checksum mismatch')
+    return errors
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='sharded JSONL files')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_split = sp.add_parser('split',help='shard a JSONL file')
+    ap_split.add_argument('in_file')
+    ap_split.add_argument('out_file')
+    ap_split.add_argument('--shard-size',type=int,default=0,help='puzzles per shard')
+    ap_split.add_argument('--shard-bytes',type=int,default=0,help='uncompressed bytes per shard')
+    ap_split.add_argument('--block-size',type=int,default=0)
+    ap_split.add_argument('--processes',type=int,default=os.cpu_count() or 1)
+    ap_split.add_argument('--zstd-dict')
+    ap_check = sp.add_parser('check',help='verify the shard files of a manifest')
+    ap_check.add_argument('manifest')
+    args = ap.parse_args()
+    if args.command == 'split':
+        if args.shard_size <= 0 and args.shard_bytes <= 0:
+            ap.error('--shard-size or --shard-bytes is required')
+        written = writeShards(args.out_file,block_jsonl.readLines(args.in_file),args.shard_size,
+                              args.shard_bytes,args.block_size,args.processes,args.zstd_dict)
+        print('%d shards written'%len(written))
+    elif args.command == 'check':
+        errors = checkShards(args.manifest)
+        print('\n'.join(errors) if errors else 'ok')
+        if errors:
+            sys.exit(1)
@@ -0,0 +1,191 @@
+'''
+Near duplicate search over the problem grids with MinHash and LSH, so puzzles
+that differ in a few cells, or are rotations or reflections of each other, are
+found without comparing every pair.
+
+Usage: similar.py report [puzzle ...] [--threshold T] [--data-dir DIR]
+       similar.py like <puzzle> <number> [--types TYPE ...] [--threshold T]
+           [--data-dir DIR]
+report prints each pair of similar puzzles (within and across the given types,
+all by default) with the estimated similarity and the symmetry that maps the
+first onto the second. like prints the puzzles similar to one puzzle, searching
+the given types (the type of the puzzle by default).
+
+A problem grid is reduced to the set of its filled cells (row, column, value)
+and the shape, and sketched with NUM_HASHES min hashes, which estimate the
+Jaccard similarity of these sets. The index buckets the sketches of the puzzles
+as they are by bands of the hashes. To find puzzles similar under a symmetry,
+the sketches of all 8 rotations and reflections of a puzzle are looked up. For
+types where the values are only symbols (RELABEL_TYPES, such as Sudoku without
+extra rules), values are renumbered in order of first appearance (row by row) so
+puzzles with permuted digits match too. Only the problem grid is compared, so
+symmetries are not applied to areas or to clues with a direction.
+'''
+
+import argparse
+import fnmatch
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import corpus
+import puzzle_cache
+
+NUM_HASHES = 64
+BANDS = 16 # NUM_HASHES/BANDS hashes per band
+THRESHOLD = 0.8
+EMPTY = ['-','']
+
+# types where any permutation of the values gives an equivalent puzzle
+RELABEL_TYPES = ['/Sudoku','/Sudoku/2D','/Sudoku/Butterfly','/Sudoku/Chaos',
+                 '/Sudoku/Flower','/Sudoku/Gattai-8','/Sudoku/Samurai','/Sudoku/Shogun',
+                 '/Sudoku/Sohei','/Sudoku/Sumo','/Sudoku/Windmill']
+
+# names of the 8 symmetries, in the order of variants()
+SYMMETRIES = ['identity','rot90','rot180','rot270','flip','flip_rot90','flip_rot180','flip_rot270']
+
+_seeds = np.random.default_rng(0).integers(0,2**63,NUM_HASHES,dtype=np.uint64)
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    ''' splitmix64 finalizer, a bijection of uint64 that spreads the bits. '''
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+def variants(grid: List[List[str]]) -> List[np.ndarray]:
+    ''' The grid under the 8 symmetries (only itself if the rows are jagged). '''
+    if len({len(row) for row in grid}) > 1:
+        return [np.array([row+['']*(max(map(len,grid))-len(row)) for row in grid],dtype=object)]
+    a = np.array(grid,dtype=object).reshape(len(grid),-1)
+    rots = [np.rot90(a,k) for k in range(4)]
+    return rots+[np.rot90(np.fliplr(a),k) for k in range(4)]
+
+class SimilarityIndex:
+    '''
+    MinHash sketches of problem grids with LSH buckets. Puzzles are added with
+    add() and searched with like() or report().
+    '''
+    files: List[str]
+    signatures: List[np.ndarray]
+    _codes: Dict[str,int] # cell value -> code used in the cell features
+    _buckets: Dict[Tuple[int,bytes],List[int]]
+    def __init__(self):
+        self.files = []
+        self.signatures = []
+        self._codes = dict()
+        self._buckets = dict()
+    def sketch(self, grid: np.ndarray, relabel: bool) -> Optional[np.ndarray]:
+        ''' Min hashes of a grid (object array), None if it has no filled cells. '''
+        flat = grid.ravel().tolist()
+        labels: Dict[str,str] = dict()
+        if relabel:
+            for cell in flat:
+                if cell not in EMPTY and cell not in labels:
+                    labels[cell] = '#%d'%len(labels)
+        codes = np.array([self._codes.setdefault(labels.get(cell,cell),len(self._codes))
+                          for cell in flat],dtype=np.uint64)
+        filled = np.array([cell not in EMPTY for cell in flat],dtype=bool)
+        if not filled.any():
+            return None
+        pos = np.flatnonzero(filled).astype(np.uint64)
+        rows,cols = grid.shape
+        features = np.empty(len(pos)+1,dtype=np.uint64)
+        features[:-1] = ((pos//np.uint64(cols)) << np.uint64(40)) \
+            | ((pos%np.uint64(cols)) << np.uint64(24)) | codes[filled]
+        features[-1] = (np.uint64(1) << np.uint64(63)) | np.uint64(rows << 16 | cols)
+        return _mix(features[None,:] ^ _seeds[:,None]).min(axis=1)
+    def _keys(self, sig: np.ndarray) -> List[Tuple[int,bytes]]:
+        width = NUM_HASHES//BANDS
+        return [(b,sig[b*width:(b+1)*width].tobytes()) for b in range(BANDS)]
+    def add(self, file: str, puzzle: str, data: Dict[str,Any]) -> bool:
+        ''' Add a puzzle, returns False if it has no problem grid to index. '''
+        grid = data.get('problem')
+        if not isinstance(grid,list) or not grid:
+            return False
+        sig = self.sketch(variants(grid)[0],puzzle in RELABEL_TYPES)
+        if sig is None:
+            return False
+        i = len(self.files)
+        self.files.append(file)
+        self.signatures.append(sig)
+        for key in self._keys(sig):
+            self._buckets.setdefault(key,[]).append(i)
+        return True
+    def like(self, puzzle: str, data: Dict[str,Any], threshold: float = THRESHOLD) \
+            -> List[Tuple[int,float,str]]:
+        '''
+        Indexed puzzles similar to a puzzle under some symmetry, as (index,
+        similarity,symmetry) with the best similarity for each, best first.
+        '''
+        grid = data.get('problem')
+        if not isinstance(grid,list) or not grid:
+            return []
+        best: Dict[int,Tuple[float,str]] = dict()
+        for name,variant in zip(SYMMETRIES,variants(grid)):
+            sig = self.sketch(variant,puzzle in RELABEL_TYPES)
+            if sig is None:
+                continue
+            candidates = sorted({j for key in self._keys(sig) for j in self._buckets.get(key,[])})
+            if not candidates:
+                continue
+            sims = (np.array([self.signatures[j] for j in candidates]) == sig).mean(axis=1)
+            for j,sim in zip(candidates,sims.tolist()):
+                if sim >= threshold and sim > best.get(j,(-1.0,''))[0]:
+                    best[j] = (sim,name)
+        return sorted(((j,sim,name) for j,(sim,name) in best.items()),key=lambda t:(-t[1],t[0]))
+
+def buildIndex(puzzles: Optional[List[str]] = None, data_dir: str = corpus.data_dir) \
+        -> Tuple[SimilarityIndex,Dict[str,Dict[str,Any]]]:
+    ''' Index of the given types, and the data of the indexed puzzles by file. '''
+    index = SimilarityIndex()
+    datas: Dict[str,Dict[str,Any]] = dict()
+    for obj in corpus.iterPuzzles(puzzles,data_dir):
+        if index.add(obj['file'],_fileType(obj['file']),obj['data']):
+            datas[obj['file']] = obj['data']
+    return index,datas
+
+def _fileType(file: str) -> str:
+    return file.rsplit('/',1)[0]
+
+def report(index: SimilarityIndex, datas: Dict[str,Dict[str,Any]],
+        threshold: float = THRESHOLD) -> Iterable[Tuple[str,str,float,str]]:
+    ''' Pairs of similar indexed puzzles (each pair once). '''
+    for i,file in enumerate(index.files):
+        for j,sim,name in index.like(_fileType(file),datas[file],threshold):
+            if j > i:
+                yield file,index.files[j],sim,name
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='near duplicate puzzle search')
+    sp = ap.add_subparsers(dest='command',required=True)
+    ap_report = sp.add_parser('report',help='print pairs of similar puzzles')
+    ap_report.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap_report.add_argument('--threshold',type=float,default=THRESHOLD)
+    ap_report.add_argument('--data-dir',default=corpus.data_dir)
+    ap_like = sp.add_parser('like',help='print puzzles similar to one puzzle')
+    ap_like.add_argument('puzzle')
+    ap_like.add_argument('number',help='puzzle number or file key')
+    ap_like.add_argument('--types',nargs='*',default=[],help='types to search (globs)')
+    ap_like.add_argument('--threshold',type=float,default=THRESHOLD)
+    ap_like.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    if args.command == 'report':
+        index,datas = buildIndex(args.puzzles or None,args.data_dir)
+        count = 0
+        for a,b,sim,name in report(index,datas,args.threshold):
+            print('%s %s %.3f %s'%(a,b,sim,name))
+            count += 1
+        print('%d puzzles indexed, %d similar pairs'%(len(index.files),count))
+    elif args.command == 'like':
+        number = int(args.number) if args.number.isdigit() else args.number
+        try:
+            obj = puzzle_cache.PuzzleCache(data_dir=args.data_dir).get(args.puzzle,number)
+        except KeyError:
+            ap.error('puzzle not found')
+        types = [t for t in corpus.listTypes(args.data_dir)
+                 if any(fnmatch.fnmatchcase(t,p) for p in args.types)] if args.types else [args.puzzle]
+        index,_ = buildIndex(types,args.data_dir)
+        for j,sim,name in index.like(args.puzzle,obj['data'],args.threshold):
+            if index.files[j] != obj['file']:
+                print('%s %.3f %s'%(index.files[j],sim,name))
@@ -0,0 +1,117 @@
+'''
+Differences between two snapshots of the parsed data (two directories like
+/data), per puzzle.
+
+Usage: snapshot_diff.py <old_dir> <new_dir> [--type TYPE ...] [--processes N]
+           [--list] [--delta FILE]
+Prints the number of added, removed and modified puzzles of each type that
+changed (with --list, also each file key prefixed by +, - or ~). With --delta,
+the changes are written as JSONL (compressed if FILE ends with .bz2 or .zst),
+one object per changed puzzle:
+{"op":"add","file":...,"data":...} for new and {"op":"modify",...} for changed
+puzzles, with the data from the new snapshot
+{"op":"remove","file":...} for puzzles that are not in the new snapshot
+
+Each snapshot is reduced to a hash per puzzle while streaming through its files,
+with one task per type in a process pool. Lines in the default format are hashed
+as they are, compact lines (parse_data.py --compact) are decoded first so the
+result does not depend on the encoding. Only the types with changes are read
+again to write the delta.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import block_jsonl
+import corpus
+import grid_codecs
+
+# added, removed, modified file keys
+TypeDiff = Tuple[List[str],List[str],List[str]]
+
+def lineHash(line: bytes) -> str:
+    ''' Hash of a puzzle line that is the same for compact and default lines. '''
+    if b'"codecs":' in line:
+        obj = grid_codecs.decodeObject(json.loads(line))
+        line = json.dumps(obj,separators=(',',':')).encode()
+    return hashlib.blake2b(line,digest_size=16).hexdigest()
+
+def hashIndex(puzzle: str, data_dir: str) -> Dict[str,str]:
+    ''' File key -> hash for the puzzles of a type (empty if it has no file). '''
+    try:
+        path = corpus.dataFile(puzzle,data_dir)
+    except FileNotFoundError:
+        return dict()
+    return {block_jsonl.fileKey(line):lineHash(line) for line in corpus.readLines(path)}
+
+def diffType(args: Tuple[str,str,str]) -> TypeDiff:
+    puzzle,old_dir,new_dir = args
+    old = hashIndex(puzzle,old_dir)
+    new = hashIndex(puzzle,new_dir)
+    added = [f for f in new if f not in old]
+    removed = [f for f in old if f not in new]
+    modified = [f for f in new if f in old and old[f] != new[f]]
+    return added,removed,modified
+
+def diffSnapshots(old_dir: str, new_dir: str, types: Optional[List[str]] = None,
+        processes: int = 1) -> Iterator[Tuple[str,TypeDiff]]:
+    ''' (type,(added,removed,modified)) for each type, in sorted order. '''
+    if types is None:
+        types = sorted(set(corpus.listTypes(old_dir))|set(corpus.listTypes(new_dir)))
+    tasks = [(puzzle,old_dir,new_dir) for puzzle in types]
+    if processes > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(processes) as pool:
+            yield from zip(types,pool.imap(diffType,tasks))
+    else:
+        yield from zip(types,map(diffType,tasks))
+
+def deltaLines(diffs: List[Tuple[str,TypeDiff]], new_dir: str) -> Iterator[str]:
+    ''' JSONL lines of the delta (see module docstring). '''
+    for puzzle,(added,removed,modified) in diffs:
+        ops = {f:'add' for f in added}
+        ops.update((f,'modify') for f in modified)
+        if ops:
+            for line in corpus.readLines(corpus.dataFile(puzzle,new_dir)):
+                file = block_jsonl.fileKey(line)
+                if file in ops:
+                    obj = grid_codecs.decodeObject(json.loads(line))
+                    yield json.dumps({'op':ops[file],'file':file,'data':obj['data']},
+                                     separators=(',',':'))
+        for file in removed:
+            yield json.dumps({'op':'remove','file':file},separators=(',',':'))
+
+def writeDelta(out_file: str, lines: Iterator[str]):
+    # imported here since importing parse_data creates all the parsers
+    import parse_data
+    parse_data.writeLines(out_file,lines)
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='compare two snapshots of the parsed data')
+    ap.add_argument('old_dir')
+    ap.add_argument('new_dir')
+    ap.add_argument('--type',action='append',default=[],help='puzzle type (default all)')
+    ap.add_argument('--processes',type=int,default=os.cpu_count() or 1)
+    ap.add_argument('--list',action='store_true',help='print the changed file keys')
+    ap.add_argument('--delta',help='write the changes to this JSONL file')
+    args = ap.parse_args()
+    changed: List[Tuple[str,TypeDiff]] = []
+    totals = [0,0,0]
+    for puzzle,diff in diffSnapshots(args.old_dir,args.new_dir,args.type or None,args.processes):
+        if not any(diff):
+            continue
+        changed.append((puzzle,diff))
+        added,removed,modified = diff
+        print('%s: %d added, %d removed, %d modified'%(puzzle,len(added),len(removed),len(modified)))
+        if args.list:
+            for prefix,files in zip('+-~',diff):
+                for file in files:
+                    print(prefix+file)
+        for i,files in enumerate(diff):
+            totals[i] += len(files)
+    print('total: %d added, %d removed, %d modified'%tuple(totals))
+    if args.delta is not None:
+        writeDelta(args.delta,deltaLines(changed,args.new_dir))
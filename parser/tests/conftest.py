@@ -0,0 +1,9 @@
+'''
+The parser modules are scripts that import each other by name, so the tests add
+the parser directory to the module path (like running them from parser/).
+'''
+
+import os
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
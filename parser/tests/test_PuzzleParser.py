@@ -0,0 +1,68 @@
+import re
+import pytest
+
+from PuzzleParser import ParseException, PuzzleParser
+
+SUDOKU = '''
+begin
+puzzle sudoku
+author Otto Janko
+size 4
+problem
+- - 3 1
+- - - -
+- - - -
+1 4 - -
+solution
+4 2 3 1
+3 1 4 2
+2 3 1 4
+1 4 2 3
+moves
+Z2;ba,2;aa,4;ab,3;
+cb,4;db,2;
+end
+'''
+
+def sudokuParser() -> PuzzleParser:
+    parser = PuzzleParser(err=lambda s: None)
+    parser.addStr('puzzle')
+    parser.addStr('author')
+    parser.addInt('size')
+    parser.addGrid('problem','size','size')
+    parser.addGrid('solution','size','size')
+    parser.addStrLong('moves',re.compile(r';$'))
+    return parser
+
+def testInternSharesStrings():
+    parser = sudokuParser()
+    parser.setIntern()
+    a = parser.parse(SUDOKU.splitlines())
+    b = parser.parse(SUDOKU.splitlines())
+    assert a == b
+    assert a['author'] is b['author']
+    assert a['problem'][0][0] is b['problem'][1][1] is b['problem'][0][0]
+    assert next(iter(a)) is next(iter(b))
+
+def testLazyMatchesParse():
+    parser = sudokuParser()
+    result = parser.parseLazy(SUDOKU.splitlines())
+    assert result.metadata() == {'puzzle':'sudoku','author':'Otto Janko','size':4}
+    assert list(result) == ['puzzle','author','size','problem','solution','moves']
+    assert result['moves'] == 'Z2;ba,2;aa,4;ab,3;cb,4;db,2;'
+    assert result.metadata() == {'puzzle':'sudoku','author':'Otto Janko','size':4}
+    assert result.materialize() == parser.parse(SUDOKU.splitlines())
+
+def testGridErrors():
+    parser = sudokuParser()
+    bad = SUDOKU.replace('2 3 1 4','2 3 1')
+    result = parser.parseLazy(bad.splitlines())
+    assert result['size'] == 4
+    with pytest.raises(ParseException):
+        result['solution']
+    with pytest.raises(ParseException):
+        parser.parse(bad.splitlines())
+    with pytest.raises(ParseException):
+        parser.parse(SUDOKU.split('solution')[0].splitlines()[:-2])
+    with pytest.raises(ParseException):
+        parser.parse(SUDOKU.replace('author','artist').splitlines())
@@ -0,0 +1,40 @@
+import json
+import os
+import pytest
+
+import block_jsonl
+
+def puzzleLines(n: int):
+    return [json.dumps({'file':'/Sudoku/%04d.a.x-janko'%(i+1),'data':{'size':4,'i':i}},
+                       separators=(',',':')).encode() for i in range(n)]
+
+def testBlockRoundTrip(tmp_path):
+    path = str(tmp_path/'Sudoku.jsonl.bz2')
+    lines = puzzleLines(25)
+    block_jsonl.writeBlocks(path,lines,block_size=10)
+    assert list(block_jsonl.readLines(path)) == lines
+    index = block_jsonl.readIndex(path)
+    assert index is not None
+    assert [block[3] for block in index['blocks']] == [10,10,5]
+    assert [line for block in block_jsonl.iterBlocks(path,index) for line in block] == lines
+
+def testGetPuzzleByNumberAndKey(tmp_path):
+    path = str(tmp_path/'Sudoku.jsonl.bz2')
+    block_jsonl.writeBlocks(path,puzzleLines(25),block_size=10)
+    assert block_jsonl.getPuzzle(path,17)['data']['i'] == 16
+    assert block_jsonl.getPuzzle(path,'/Sudoku/0021.a.x-janko')['data']['i'] == 20
+    with pytest.raises(KeyError):
+        block_jsonl.getPuzzle(path,99)
+
+def testSingleStreamRemovesStaleIndex(tmp_path):
+    path = str(tmp_path/'Sudoku.jsonl.bz2')
+    block_jsonl.writeBlocks(path,puzzleLines(5),block_size=2)
+    block_jsonl.writeBlocks(path,puzzleLines(5),block_size=0)
+    assert not os.path.isfile(block_jsonl.indexFileName(path))
+    assert list(block_jsonl.readLines(path)) == puzzleLines(5)
+
+def testFileKey():
+    assert block_jsonl.fileKey(b'{"file":"/A/001.a.x-janko","data":{}}') == '/A/001.a.x-janko'
+    assert block_jsonl.fileKey(b'{"data":{},"file":"/A/002.a.x-janko"}') == '/A/002.a.x-janko'
+    assert block_jsonl.puzzleNumber('/Sudoku/0375.a.x-janko') == 375
+    assert block_jsonl.puzzleNumber('/Araf/Inequality.x-janko') is None
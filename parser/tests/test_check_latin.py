@@ -0,0 +1,34 @@
+import pytest
+pytest.importorskip('numpy')
+
+import check_latin
+
+PROBLEM = [['-','-','3','1'],['-','-','-','-'],['-','-','-','-'],['1','4','-','-']]
+SOLUTION = [['4','2','3','1'],['3','1','4','2'],['2','3','1','4'],['1','4','2','3']]
+
+def sudoku(file: str, solution, problem=PROBLEM, **data):
+    return {'file':file,'data':dict(size=4,problem=problem,solution=solution,**data)}
+
+def testChecks():
+    # rows and columns are still fine after swapping rows
+    swapped = [SOLUTION[0],SOLUTION[2],SOLUTION[1],SOLUTION[3]]
+    given = [SOLUTION[1],SOLUTION[0],SOLUTION[2],SOLUTION[3]]
+    repeated = [row[:] for row in SOLUTION]
+    repeated[0][0] = '2'
+    objs = [sudoku('/Sudoku/1',SOLUTION),sudoku('/Sudoku/2',swapped),
+            sudoku('/Sudoku/3',given),sudoku('/Sudoku/4',repeated),
+            sudoku('/Sudoku/5',[['1','2'],['2']]),sudoku('/Sudoku/6',[['1','2'],['2','1']])]
+    failed = check_latin.checkObjects('/Sudoku',objs)
+    assert failed == {'/Sudoku/2':['boxes'],'/Sudoku/3':['givens'],
+                      '/Sudoku/4':['rows','cols','symbols','boxes']}
+
+def testAreasAndClues():
+    areas = [['a','a','b','b'],['a','a','b','b'],['c','c','d','d'],['c','c','d','d']]
+    bad_areas = [['a','b','b','b'],['a','a','a','b'],['c','c','d','d'],['c','c','d','d']]
+    objs = [sudoku('/Sudoku/Chaos/1',SOLUTION,areas=areas),
+            sudoku('/Sudoku/Chaos/2',SOLUTION,areas=bad_areas)]
+    assert check_latin.checkObjects('/Sudoku/Chaos',objs) == {'/Sudoku/Chaos/2':['areas']}
+    clues = [['2','10','-','-'],['-','-','-','-'],['-','-','-','-'],['-','-','-','3']]
+    objs = [sudoku('/Kendoku/1',SOLUTION,problem=clues)]
+    assert check_latin.checkObjects('/Kendoku',objs) == {}
+    assert check_latin.checkObjects('/Kendoku',objs,'') == {'/Kendoku/1':['givens']}
@@ -0,0 +1,38 @@
+import json
+
+import block_jsonl
+import columnar
+
+def writeType(data_dir, puzzle: str, datas):
+    lines = [json.dumps({'file':'%s/%03d.a.x-janko'%(puzzle,i+1),'data':data})
+             for i,data in enumerate(datas)]
+    block_jsonl.writeBlocks(str(data_dir/(puzzle[1:].replace('/','_')+'.jsonl.bz2')),lines,0)
+
+def testBuildAndRead(tmp_path):
+    data_dir = tmp_path/'data'
+    data_dir.mkdir()
+    sudoku = [{'size':2,'author':'A','problem':[['1','-'],['-','2']]},
+              {'size':3,'author':'B','solver':'C','problem':[['1','2'],['3']],
+               'solution':[['9']]}]
+    akari = [{'rows':2,'cols':3,'author':'A','problem':'not a grid'}]
+    writeType(data_dir,'/Sudoku',sudoku)
+    writeType(data_dir,'/Akari',akari)
+    columnar.build(str(tmp_path/'cols'),data_dir=str(data_dir))
+    store = columnar.ColumnStore(str(tmp_path/'cols'))
+    assert len(store) == 3
+    # types are in sorted order
+    assert [store.file(i) for i in range(3)] == \
+        ['/Akari/001.a.x-janko','/Sudoku/001.a.x-janko','/Sudoku/002.a.x-janko']
+    assert store.typeIndices('/Sudoku').tolist() == [1,2]
+    assert store.typeIndices('/Nurikabe').tolist() == []
+    assert store.column('size').tolist() == [-1,2,3]
+    assert store.column('rows').tolist() == [2,-1,-1]
+    assert [store.string('author',i) for i in range(3)] == ['A','A','B']
+    assert store.string('solver',1) is None and store.string('solver',2) == 'C'
+    assert store.column('number').tolist() == [1,1,2]
+    assert store.gridStrings(0,'problem') is None
+    assert store.gridStrings(1,'problem') == sudoku[0]['problem']
+    assert store.gridStrings(2,'problem') == sudoku[1]['problem'] # jagged
+    assert store.grid(2,'problem').shape == (2,2)
+    assert store.gridStrings(1,'solution') is None
+    assert store.gridStrings(2,'solution') == [['9']]
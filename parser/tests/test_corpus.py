@@ -0,0 +1,44 @@
+import json
+
+import block_jsonl
+import corpus
+
+def writeType(data_dir, puzzle: str, n: int, ext: str = '.jsonl.bz2', block_size: int = 0):
+    lines = [json.dumps({'file':'%s/%03d.a.x-janko'%(puzzle,i+1),'data':{'size':i}})
+             for i in range(n)]
+    path = str(data_dir/(corpus.typeFileStem(puzzle)+ext))
+    if ext == '.jsonl':
+        open(path,'w').write(''.join(line+'\n' for line in lines))
+    else:
+        block_jsonl.writeBlocks(path,lines,block_size)
+    return path
+
+def testTypeNames():
+    assert corpus.typeFileStem('/Heyawake/AYE') == 'Heyawake_AYE'
+    assert corpus.typeFromFileName('Heyawake_AYE.jsonl.bz2') == '/Heyawake/AYE'
+    assert corpus.typeFromFileName('Sudoku.stats.json') is None
+
+def testListTypesAndIterate(tmp_path):
+    writeType(tmp_path,'/Sudoku',5)
+    writeType(tmp_path,'/Heyawake/AYE',3,'.jsonl')
+    (tmp_path/'Sudoku.stats.json').write_text('{}')
+    assert corpus.listTypes(str(tmp_path)) == ['/Heyawake/AYE','/Sudoku']
+    objs = list(corpus.iterPuzzles('/Sudoku',str(tmp_path)))
+    assert [obj['data']['size'] for obj in objs] == [0,1,2,3,4]
+    assert len(list(corpus.iterPuzzles(None,str(tmp_path)))) == 8
+
+def testParallelKeepsOrder(tmp_path):
+    writeType(tmp_path,'/Sudoku',23,block_size=5)
+    writeType(tmp_path,'/Akari',4)
+    serial = list(corpus.iterPuzzles(None,str(tmp_path)))
+    parallel = list(corpus.iterPuzzles(None,str(tmp_path),parallel=True,processes=2))
+    assert parallel == serial
+
+def testInternObject():
+    objs = [json.loads(json.dumps({'file':'/Sudoku/%04d.a.x-janko'%i,
+                                   'data':{'author':'Otto Janko','problem':[['-','10']]}}))
+            for i in (1,2)]
+    a,b = map(corpus.internObject,objs)
+    assert a == objs[0] and b == objs[1]
+    assert a['data']['author'] is b['data']['author']
+    assert a['data']['problem'][0][1] is b['data']['problem'][0][1]
@@ -0,0 +1,32 @@
+import json
+
+import corpus_stats
+
+OBJS = [{'file':'/Sudoku/001.a.x-janko','data':{'size':4,'author':'A','solver':'S'}},
+        {'file':'/Sudoku/002.a.x-janko','data':{'size':9,'author':'A'}},
+        {'file':'/Sudoku/003.a.x-janko','data':{'rows':2,'cols':3,'author':'B'}}]
+
+def testStatsFileName():
+    assert corpus_stats.statsFileName('d/Sudoku.jsonl.bz2') == 'd/Sudoku.stats.json'
+    assert corpus_stats.statsFileName('d/Sudoku.jsonl') == 'd/Sudoku.stats.json'
+    assert corpus_stats.statsFileName('d/Sudoku.manifest.json') == 'd/Sudoku.stats.json'
+
+def testComputeStats():
+    stats = corpus_stats.computeStats('/Sudoku',OBJS,['/Sudoku/004.a.x-janko'])
+    assert stats['count'] == 3 and stats['failed'] == 1
+    assert stats['dims'] == {'4x4':1,'9x9':1,'2x3':1}
+    assert stats['sizes'] == {'4':1,'9':1}
+    assert list(stats['authors'].items()) == [('A',2),('B',1)] # by decreasing count
+    assert stats['solvers'] == {'S':1}
+    assert stats['props']['author'] == 3
+
+def testRollupFromSidecars(tmp_path):
+    corpus_stats.writeStats(str(tmp_path/'Sudoku.stats.json'),
+                            corpus_stats.computeStats('/Sudoku',OBJS,[]))
+    corpus_stats.writeStats(str(tmp_path/'Akari.stats.json'),
+                            corpus_stats.computeStats('/Akari',OBJS[:1],['/Akari/x']))
+    result = corpus_stats.rollup(str(tmp_path))
+    assert result['count'] == 4 and result['failed'] == 1
+    assert sorted(result['types']) == ['/Akari','/Sudoku']
+    assert result['authors'] == {'A':3,'B':1}
+    assert json.load(open(str(tmp_path/corpus_stats.ROLLUP_FILE))) == result
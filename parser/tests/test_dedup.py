@@ -0,0 +1,27 @@
+import dedup
+
+GRID = [['-','1'],['2','-']]
+
+def puzzle(file: str, **data):
+    return {'file':file,'data':data}
+
+def testFingerprint():
+    a = dedup.fingerprint({'author':'A','size':2,'problem':GRID,'moves':'aa,1;'})
+    assert a == dedup.fingerprint({'author':'B','source':'x','size':2,'problem':GRID})
+    assert a == dedup.fingerprint({'rows':2,'cols':2,'problem':GRID,'author_':'C'})
+    assert a != dedup.fingerprint({'size':2,'problem':[['-','1'],['-','2']]})
+    assert a != dedup.fingerprint({'size':2,'problem':GRID,'patternx':1})
+    assert dedup.fingerprint({'author':'A','size':2}) is None
+
+def testDropDuplicates():
+    objs = [puzzle('/A/1',size=2,problem=GRID),puzzle('/A/2',size=2,problem=GRID,author='B'),
+            puzzle('/A/3',size=3),puzzle('/A/4',size=3),puzzle('/A/5',size=2,problem=[['1']])]
+    groups = dedup.duplicateGroups(objs)
+    assert list(groups.values()) == [['/A/1','/A/2']]
+    assert dedup.droppedFiles(groups) == ['/A/2']
+    dropped = []
+    kept = dedup.dropDuplicates(objs,dropped=dropped)
+    assert [obj['file'] for obj in kept] == ['/A/1','/A/3','/A/4','/A/5']
+    assert dropped == ['/A/2']
+    seen = {dedup.fingerprint(objs[4]['data']):'/B/1'}
+    assert [obj['file'] for obj in dedup.dropDuplicates(objs,seen)] == ['/A/1','/A/3','/A/4']
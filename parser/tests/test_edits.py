@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+
+import edits
+import parse_data
+
+LINES = ['begin','puzzle sudoku','aolver X','size 3','problem','1 2 3','1 2 3','moves','end']
+
+def testApplyEdits():
+    ops = [{'op':'set','prop':'size','value':'2'},
+           {'op':'replace','regex':True,'old':'^aolver\\b','new':'solver'},
+           {'op':'delete_line','match':'1 2 3'},
+           {'op':'insert_before','match':'end','text':'aa,1;\nab,2;'},
+           {'op':'replace','line':-1,'old':'end','new':'x\nend'},
+           {'op':'delete_line','match':'nothing'}]
+    lines,unapplied = edits.applyEdits(LINES,ops)
+    assert lines == ['begin','puzzle sudoku','solver X','size 2','problem','1 2 3','moves',
+                     'aa,1;','ab,2;','x','end']
+    assert unapplied == [ops[-1]]
+    # applying the idempotent operations again changes nothing
+    again,unapplied = edits.applyEdits(lines,ops[:2])
+    assert again == lines and unapplied == ops[:2]
+    assert edits.isSkipped([{'op':'set'},{'op':'skip'}])
+
+def testLoadEdits(tmp_path):
+    path = str(tmp_path/'edits.json')
+    json.dump({'/Sudoku/0001.a.x-janko':[{'op':'skip'}]},open(path,'w'))
+    assert edits.loadEdits(path) == {'/Sudoku/0001.a.x-janko':[{'op':'skip'}]}
+    json.dump({'/Sudoku/0001.a.x-janko':[{'op':'drop'}]},open(path,'w'))
+    with pytest.raises(ValueError):
+        edits.loadEdits(path)
+
+def testFileEditsReload(tmp_path, monkeypatch):
+    path = str(tmp_path/'edits.json')
+    json.dump({'/Sudoku/0001.a.x-janko':[{'op':'set','prop':'size','value':'2'}]},open(path,'w'))
+    monkeypatch.setattr(parse_data,'edits_file',path)
+    monkeypatch.setattr(parse_data,'_edits',None)
+    assert parse_data.editLines('/Sudoku/0001.a.x-janko',LINES)[3] == 'size 2'
+    assert parse_data.editLines('/Sudoku/0002.a.x-janko',LINES) == LINES
+    json.dump({'/Sudoku/0002.a.x-janko':[{'op':'skip'}]},open(path,'w'))
+    os.utime(path,ns=(0,os.stat(path).st_mtime_ns+1)) # even on coarse clocks
+    assert parse_data.fileEdits('/Sudoku/0001.a.x-janko') == []
+    assert edits.isSkipped(parse_data.fileEdits('/Sudoku/0002.a.x-janko'))
+    os.remove(path)
+    assert parse_data.fileEdits('/Sudoku/0002.a.x-janko') == []
+
+def testSourceFilesSkipped(tmp_path, monkeypatch):
+    os.mkdir(tmp_path/'Sudoku')
+    for name in ['0001.a.x-janko','0002.a.x-janko']:
+        open(tmp_path/'Sudoku'/name,'w').write('\n'.join(LINES)+'\n')
+    path = str(tmp_path/'edits.json')
+    json.dump({'/Sudoku/0002.a.x-janko':[{'op':'skip'}]},open(path,'w'))
+    monkeypatch.setattr(parse_data,'base_dir',str(tmp_path))
+    monkeypatch.setattr(parse_data,'edits_file',path)
+    monkeypatch.setattr(parse_data,'_edits',None)
+    assert parse_data.sourceFiles('/Sudoku') == [str(tmp_path)+'/Sudoku/0001.a.x-janko']
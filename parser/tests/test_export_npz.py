@@ -0,0 +1,47 @@
+import numpy as np
+
+import export_npz
+
+def objects():
+    return [{'file':'/Sudoku/001.a.x-janko',
+             'data':{'size':2,'author':'A','problem':[['1','-'],['-','2']],
+                     'solution':[['1','2'],['2','1']],'negative':None}},
+            {'file':'/Sudoku/002.a.x-janko',
+             'data':{'size':3,'author':'B','problem':[['x','-','3'],['-'],['10','-','-']]}}]
+
+def testGridRoundTrip(tmp_path):
+    objs = objects()
+    path = str(tmp_path/'Sudoku.npz')
+    np.savez(path,**export_npz.exportArrays(objs))
+    arrays = export_npz.load(path)
+    assert arrays['files'].tolist() == [obj['file'] for obj in objs]
+    assert arrays['problem'].shape == (2,3,3)
+    for i,obj in enumerate(objs):
+        for prop in export_npz.GRID_PROPS:
+            if prop == 'areas':
+                assert prop not in arrays
+                continue
+            assert export_npz.decodeGrid(arrays,prop,i) == obj['data'].get(prop)
+    assert arrays['meta_size'].tolist() == [2,3]
+    assert arrays['meta_author'].tolist() == ['A','B']
+    assert arrays['meta_negative'].tolist() == [True,False]
+
+def testStringProblemIsNotAGrid():
+    # Rechengitter: problem and solution are long strings, not lists of rows
+    objs = [{'file':'/Rechengitter/%03d.a.x-janko'%i,
+             'data':{'size':3,'problem':'? + ? = %d'%i,'solution':[['1','2','3']]}}
+            for i in range(1,4)]
+    arrays = export_npz.exportArrays(objs)
+    assert 'problem' not in arrays and 'problem_shape' not in arrays
+    assert arrays['meta_problem'].tolist() == [obj['data']['problem'] for obj in objs]
+    for i,obj in enumerate(objs):
+        assert export_npz.decodeGrid(arrays,'solution',i) == obj['data']['solution']
+
+def testVocabularyKeepsIntegers():
+    vocab = export_npz.Vocabulary.build(['-','3','a','0','b'])
+    assert vocab.code('-') == vocab.code('-')
+    assert vocab.code('3') == 3
+    assert len({vocab.code(t) for t in ['-','3','a','0','b']}) == 5
+    tokens,codes = vocab.arrays()
+    copy = export_npz.Vocabulary.fromArrays(tokens,codes)
+    assert all(copy.token(vocab.code(t)) == t for t in ['-','3','a','0','b'])
@@ -0,0 +1,33 @@
+import json
+
+import export_sqlite
+import grid_codecs
+
+def testGridRoundTrip():
+    for grid in [[['1','-','12'],['a','b','c']],[['x']],[],[['a'],[],['b','c']]]:
+        assert export_sqlite.decodeGrid(export_sqlite.encodeGrid(grid)) == grid
+
+def testInsertAndQuery(tmp_path):
+    conn = export_sqlite.connect(str(tmp_path/'p.db'))
+    objs = [{'file':'/Sudoku/0001.a.x-janko',
+             'data':{'size':4,'author':'Otto Janko','moves':'Z2;','problem':[['1','-'],['-','2']]}},
+            {'file':'/Sudoku/0002.a.x-janko',
+             'data':{'rows':2,'cols':3,'author':'B','problem':[['1','2','3'],['-','-','-']]}}]
+    # compact objects are stored in the default format
+    data,codecs = grid_codecs.encodeResult(objs[1]['data'],{'problem':grid_codecs.C_INT})
+    export_sqlite.insertPuzzles(conn,'/Sudoku',[objs[0],{'file':objs[1]['file'],'data':data,
+                                                         'codecs':codecs}])
+    export_sqlite.createIndexes(conn)
+    rows = conn.execute('SELECT file,number,rows,cols,size,author,data FROM puzzles '
+                        'ORDER BY id').fetchall()
+    assert rows[0][:6] == ('/Sudoku/0001.a.x-janko',1,4,4,4,'Otto Janko')
+    assert json.loads(rows[0][6]) == {'moves':'Z2;'}
+    assert rows[1][:6] == ('/Sudoku/0002.a.x-janko',2,2,3,None,'B')
+    cells = conn.execute('SELECT g.cells FROM grids g JOIN puzzles p ON g.puzzle = p.id '
+                         'WHERE p.number = 2 AND g.prop = ?',('problem',)).fetchone()[0]
+    assert export_sqlite.decodeGrid(cells) == objs[1]['data']['problem']
+    # inserting a type again replaces its puzzles
+    export_sqlite.insertPuzzles(conn,'/Sudoku',objs[:1])
+    assert conn.execute('SELECT COUNT(*) FROM puzzles').fetchone()[0] == 1
+    assert conn.execute('SELECT COUNT(*) FROM grids').fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,32 @@
+import grid_codecs
+from grid_codecs import C_INT, C_LIST, C_ROWS
+
+def testEncodeGridFallbacks():
+    digits = [['1','-'],['-','4']]
+    assert grid_codecs.encodeGrid(digits,C_INT) == ([[1,None],[None,4]],C_INT)
+    assert grid_codecs.encodeGrid(digits,C_ROWS) == (['1-','-4'],C_ROWS)
+    # not exact as integers (leading zero, sign) or wider than one character
+    assert grid_codecs.encodeGrid([['01','2']],C_INT) == ([['01','2']],C_LIST)
+    assert grid_codecs.encodeGrid([['+1']],C_INT) == ([['+1']],C_LIST)
+    assert grid_codecs.encodeGrid([['a','b']],C_INT) == (['ab'],C_ROWS)
+    assert grid_codecs.encodeGrid([['10','-']],C_ROWS) == ([['10','-']],C_LIST)
+    assert grid_codecs.encodeGrid([['a']],C_LIST) == ([['a']],C_LIST)
+
+def testResultRoundTrip():
+    data = {'size':3,'author':'Otto Janko','problem':[['1','-','12'],['-','-','3']],
+            'solution':[['a','b'],['c','d']],'areas':[['x1','x2']],'solution_':[['5']],
+            'moves':'Z2;aa,1;'}
+    declared = {'problem':C_INT,'solution':C_ROWS,'areas':C_ROWS,'moves':C_ROWS}
+    encoded,codecs = grid_codecs.encodeResult(data,declared)
+    # solution_ (a duplicate property) uses the codec of solution
+    assert codecs == {'problem':C_INT,'solution':C_ROWS,'solution_':C_ROWS}
+    assert encoded['moves'] == 'Z2;aa,1;' # not a grid
+    assert encoded['areas'] == [['x1','x2']]
+    assert grid_codecs.decodeResult(encoded,codecs) == data
+    obj = {'file':'/Sudoku/0001.a.x-janko','data':encoded,'codecs':codecs}
+    assert grid_codecs.decodeObject(obj) == {'file':obj['file'],'data':data}
+
+def testEmptyGrid():
+    for codec in [C_INT,C_ROWS,C_LIST]:
+        value,used = grid_codecs.encodeGrid([],codec)
+        assert grid_codecs.decodeGrid(value,used) == []
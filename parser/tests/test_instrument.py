@@ -0,0 +1,43 @@
+import json
+import os
+
+import instrument
+
+def runType(instr: instrument.Instrument, puzzle: str):
+    instr.begin(puzzle)
+    with instr.phase('read'):
+        pass
+    with instr.phase('parse'):
+        pass
+    instr.failedAttempt()
+    instr.addFile(100)
+    instr.addFile(50,True)
+    instr.setOutput(30)
+    instr.end(puzzle)
+
+def testReport(tmp_path):
+    instr = instrument.Instrument()
+    runType(instr,'/Sudoku')
+    runType(instr,'/Heyawake/AYE')
+    stats = instr.types['/Sudoku']
+    assert (stats['files'],stats['failed_files'],stats['failed_attempts']) == (2,1,1)
+    assert (stats['bytes_in'],stats['bytes_out']) == (150,30)
+    assert stats['failed_wall'] == stats['wall']['parse']
+    assert stats['wall']['total'] >= stats['wall']['read']
+    path = str(tmp_path/'report.json')
+    instr.write(path)
+    report = json.load(open(path,'r'))
+    assert (report['total']['files'],report['total']['bytes_in']) == (4,300)
+    assert list(report['types']) == ['/Sudoku','/Heyawake/AYE']
+    lines = instrument.formatReport(report,'parse',top=1)
+    assert len(lines) == 3 and lines[-1].startswith('total')
+
+def testPruneProfiles(tmp_path):
+    instr = instrument.Instrument(str(tmp_path/'prof'),profile_top=1)
+    runType(instr,'/Sudoku')
+    runType(instr,'/Akari')
+    assert sorted(os.listdir(tmp_path/'prof')) == ['Akari.prof','Sudoku.prof']
+    instr.types['/Sudoku']['wall']['total'] = 10.0
+    instr.pruneProfiles()
+    assert os.listdir(tmp_path/'prof') == ['Sudoku.prof']
+    assert instrument.profileName('/') == 'root.prof'
@@ -0,0 +1,46 @@
+import json
+import os
+
+import block_jsonl
+import jobs
+import parse_data
+
+def _sudoku(n: int) -> str:
+    return 'begin\npuzzle sudoku\nauthor A%d\nsize 4\npatternx 2\npatterny 2\nproblem\n' \
+        '- - 3 1\n- - - -\n- - - -\n1 4 - -\nend\n'%n
+
+def testPlanWorkMerge(tmp_path, monkeypatch):
+    os.mkdir(tmp_path/'Sudoku')
+    for i in range(1,6):
+        open(tmp_path/'Sudoku'/('%04d.a.x-janko'%i),'w').write(_sudoku(i))
+    monkeypatch.setattr(parse_data,'base_dir',str(tmp_path))
+    monkeypatch.setattr(parse_data,'edits_file',None)
+    monkeypatch.setattr(parse_data,'_edits',None)
+    job_dir = str(tmp_path/'job')
+    manifest = jobs.plan(job_dir,['/Sudoku'],unit_size=2)
+    assert [(u['start'],u['stop']) for u in manifest['units']] == [(0,2),(2,4),(4,5)]
+    # a unit claimed by another worker is left alone until its lock is reset
+    assert jobs.claim(job_dir,manifest['units'][1])
+    assert jobs.work(job_dir) == 2
+    assert jobs.status(job_dir) == {'done':['00000','00002'],'claimed':['00001'],'open':[]}
+    assert jobs.reset(job_dir) == ['00001']
+    assert jobs.work(job_dir) == 1
+    out_dir = str(tmp_path/'out')
+    os.mkdir(out_dir)
+    jobs.merge(job_dir,out_dir)
+    objs = [json.loads(line) for line in block_jsonl.readLines(os.path.join(out_dir,'Sudoku.jsonl'))]
+    assert [obj['file'] for obj in objs] == ['/Sudoku/%04d.a.x-janko'%i for i in range(1,6)]
+    assert [obj['data']['author'] for obj in objs] == ['A%d'%i for i in range(1,6)]
+
+def testRunUnitChangedFiles(tmp_path, monkeypatch):
+    os.mkdir(tmp_path/'Sudoku')
+    for i in range(1,3):
+        open(tmp_path/'Sudoku'/('%04d.a.x-janko'%i),'w').write(_sudoku(i))
+    monkeypatch.setattr(parse_data,'base_dir',str(tmp_path))
+    monkeypatch.setattr(parse_data,'edits_file',None)
+    monkeypatch.setattr(parse_data,'_edits',None)
+    job_dir = str(tmp_path/'job')
+    jobs.plan(job_dir,['/Sudoku'])
+    open(tmp_path/'Sudoku'/'0000.a.x-janko','w').write(_sudoku(0)) # shifts the unit's files
+    assert jobs.work(job_dir) == 0
+    assert jobs.status(job_dir)['open'] == ['00000']
@@ -0,0 +1,41 @@
+import json
+import random
+
+import block_jsonl
+import export_npz
+from loader import BatchLoader, shuffled
+
+def writeType(data_dir, puzzle: str, datas):
+    lines = [json.dumps({'file':'%s/%03d.a.x-janko'%(puzzle,i+1),'data':data})
+             for i,data in enumerate(datas)]
+    block_jsonl.writeBlocks(str(data_dir/(puzzle[1:]+'.jsonl.bz2')),lines,0)
+
+def testShuffledKeepsItems():
+    items = list(range(100))
+    out = list(shuffled(items,10,random.Random(1)))
+    assert sorted(out) == items and out != items
+
+def testBatchesRoundTrip(tmp_path):
+    datas = [{'size':2+i%3,'problem':[[str(i)]*(2+i%3)]*(2+i%3)} for i in range(10)]
+    writeType(tmp_path,'/Sudoku',datas)
+    loader = BatchLoader('/Sudoku',batch_size=4,shuffle_buffer=1,data_dir=str(tmp_path))
+    batches = list(loader)
+    assert [len(batch['files']) for batch in batches] == [4,4,2]
+    vocab = loader.vocab
+    problems = [export_npz.decodeGrid(batch,'problem',i,vocab)
+                for batch in batches for i in range(len(batch['files']))]
+    assert problems == [data['problem'] for data in datas]
+
+def testFixedShapeAndStringProps(tmp_path):
+    datas = [{'size':2,'problem':'? + ? = 3','solution':[['1','2'],['2','1']]},
+             {'size':3,'problem':'? + ? = 5','solution':[['1']*3]*3},
+             {'size':2,'problem':[['1','-'],['-','-']],'solution':[['1','2'],['2','1']]}]
+    writeType(tmp_path,'/Rechengitter',datas)
+    loader = BatchLoader('/Rechengitter',batch_size=8,shape=(2,2),shuffle_buffer=1,
+                         data_dir=str(tmp_path))
+    batch, = list(loader)
+    # the 3x3 solution does not fit, the string problems are not grids
+    assert batch['files'].tolist() == ['/Rechengitter/001.a.x-janko','/Rechengitter/003.a.x-janko']
+    assert loader.skipped == 1
+    assert batch['problem_shape'].tolist() == [[0,0],[2,2]]
+    assert batch['problem'].shape == (2,2,2)
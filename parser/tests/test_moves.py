@@ -0,0 +1,34 @@
+import pytest
+np = pytest.importorskip('numpy')
+
+import moves
+
+MOVES_375 = 'Z2;ba,2;aa,4;ab,3;bb,1;ac,2;bc,3;cd,2;dd,3;dc,4;cc,1;cb,4;db,2;'
+PROBLEM = [['-','-','3','1'],['-','-','-','-'],['-','-','-','-'],['1','4','-','-']]
+SOLUTION = [['4','2','3','1'],['3','1','4','2'],['2','3','1','4'],['1','4','2','3']]
+
+def testDecodeMoves():
+    steps = moves.decodeMoves([MOVES_375,None,'H0102,1;cc,-,,24;x!;'])
+    assert len(steps) == 3
+    assert steps.headers == [{'Z':2},{},{}]
+    first = steps.puzzleSteps(0)
+    assert len(first) == 12 and len(steps.puzzleSteps(1)) == 0
+    assert (first['row'][0],first['col'][0]) == (0,1)
+    assert steps.vocab.token(int(first['value'][0])) == '2'
+    edge,clear = steps.puzzleSteps(2)
+    assert (edge['op'],edge['row'],edge['col']) == (moves.OP_HEDGE,2,1)
+    assert steps.vocab.token(int(clear['value'])) == '-'
+    assert clear['state'] == moves.NONE
+    assert steps.note_strings[clear['notes']] == '24'
+    assert steps.unknown == ['x!;']
+    assert steps.puzzleIndex().tolist() == [0]*12+[2,2]
+
+def testReplayObjects():
+    objs = [{'file':'/Sudoku/0375.a.x-janko',
+             'data':{'problem':PROBLEM,'solution':SOLUTION,'moves':MOVES_375}},
+            {'file':'/Sudoku/0376.a.x-janko',
+             'data':{'problem':PROBLEM,'solution':SOLUTION,'moves':MOVES_375[:-5]}},
+            {'file':'/Sudoku/0377.a.x-janko','data':{'problem':PROBLEM,'solution':SOLUTION}}]
+    has,solved = moves.replayObjects(objs)
+    assert has.tolist() == [True,True,False]
+    assert solved.tolist() == [True,False,False]
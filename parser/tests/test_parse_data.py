@@ -0,0 +1,13 @@
+import grid_codecs
+import parse_data
+from PuzzleParser import PuzzleParser
+
+def testOutputObject():
+    parser = PuzzleParser()
+    parser.addInt('size')
+    parser.addGrid('problem','size','size',codec=grid_codecs.C_ROWS)
+    result = {'size':2,'problem':[['1','-'],['-','2']]}
+    assert parse_data.outputObject('/Sudoku/1',result,parser) == {'file':'/Sudoku/1','data':result}
+    obj = parse_data.outputObject('/Sudoku/1',result,parser,compact=True)
+    assert obj['codecs'] == {'problem':grid_codecs.C_ROWS}
+    assert grid_codecs.decodeObject(obj) == {'file':'/Sudoku/1','data':result}
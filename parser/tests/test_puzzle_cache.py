@@ -0,0 +1,67 @@
+import json
+import threading
+import pytest
+
+import block_jsonl
+import corpus
+import puzzle_cache
+
+def writeSudoku(tmp_path, n: int, block_size: int):
+    lines = [json.dumps({'file':'/Sudoku/%04d.a.x-janko'%(i+1),'data':{'size':4,'i':i}},
+                        separators=(',',':')).encode() for i in range(n)]
+    block_jsonl.writeBlocks(str(tmp_path/'Sudoku.jsonl.bz2'),lines,block_size=block_size)
+
+@pytest.mark.parametrize('block_size',[0,4])
+def testNumberAndKeyShareEntry(tmp_path, block_size):
+    writeSudoku(tmp_path,10,block_size)
+    cache = puzzle_cache.PuzzleCache(data_dir=str(tmp_path))
+    obj = cache.get('/Sudoku',3)
+    assert obj['data']['i'] == 2
+    assert cache.get('/Sudoku','/Sudoku/0003.a.x-janko') is obj
+    assert cache.get('/Sudoku',3) is obj
+    stats = cache.stats()
+    assert (stats['hits'],stats['misses'],stats['entries']) == (2,1,1)
+    assert stats['bytes'] == puzzle_cache.sizeOf(obj)
+    with pytest.raises(KeyError):
+        cache.get('/Sudoku',99)
+
+def testBudgetEviction(tmp_path):
+    writeSudoku(tmp_path,10,4)
+    size = puzzle_cache.sizeOf(puzzle_cache.PuzzleCache(data_dir=str(tmp_path)).get('/Sudoku',1))
+    cache = puzzle_cache.PuzzleCache(budget=2*size,data_dir=str(tmp_path))
+    for i in [1,2,1,3]:
+        cache.get('/Sudoku',i)
+    assert cache.stats()['evictions'] == 1
+    cache.get('/Sudoku',1) # 2 was least recently used
+    assert cache.stats()['hits'] == 2
+    cache.get('/Sudoku',2)
+    assert cache.stats()['misses'] == 4
+
+def testScanIsCached(tmp_path, monkeypatch):
+    writeSudoku(tmp_path,10,0)
+    scans = []
+    readLines = corpus.readLines
+    monkeypatch.setattr(corpus,'readLines',lambda path: scans.append(path) or readLines(path))
+    cache = puzzle_cache.PuzzleCache(data_dir=str(tmp_path))
+    assert [cache.get('/Sudoku',i)['data']['i'] for i in [2,7,'/Sudoku/0010.a.x-janko']] == [1,6,9]
+    assert len(scans) == 1
+    cache.clear()
+    cache.get('/Sudoku',2)
+    assert len(scans) == 2
+
+def testThreads(tmp_path):
+    writeSudoku(tmp_path,20,4)
+    cache = puzzle_cache.PuzzleCache(data_dir=str(tmp_path))
+    errors = []
+    def work():
+        for i in range(1,21):
+            if cache.get('/Sudoku',i)['data']['i'] != i-1:
+                errors.append(i)
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    stats = cache.stats()
+    assert (stats['misses'],stats['hits'],stats['entries']) == (20,60,20)
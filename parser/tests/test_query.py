@@ -0,0 +1,50 @@
+import json
+import pytest
+
+import block_jsonl
+import query
+
+def testParseCondition():
+    assert query.parseCondition('size=9') == ('size','=','9')
+    assert query.parseCondition('author~Janko') == ('author','~','Janko')
+    assert query.parseCondition('solver!=Otto Janko') == ('solver','!=','Otto Janko')
+    assert query.parseCondition('rows<=-1') == ('rows','<=','-1')
+    for bad in ['size','=9','author<abc','size>=1.5','size>']:
+        with pytest.raises(ValueError):
+            query.parseCondition(bad)
+
+PUZZLES = [
+    {'file':'/Sudoku/001.a.x-janko','data':{'size':4,'author':'Otto Janko','solver':'Otto Janko'}},
+    {'file':'/Sudoku/002.a.x-janko','data':{'size':9,'author':'Otto Janko'}},
+    {'file':'/Sudoku/003.a.x-janko','data':{'size':9,'author':'A "quoted" name','solver':'B'}},
+    {'file':'/Sudoku/004.a.x-janko','data':{'size':6,'author':'C','solver':'B',
+                                            'problem':[['1','-']]}},
+]
+
+def select(tmp_path, *conds):
+    ''' File keys of the matching puzzles, checked against matches() on each object. '''
+    path = tmp_path/'Sudoku.jsonl.bz2'
+    if not path.exists():
+        block_jsonl.writeBlocks(str(path),[json.dumps(obj,separators=(',',':')) for obj in PUZZLES],0)
+    parsed = [query.parseCondition(c) for c in conds]
+    result = [json.loads(line)['file'] for line in
+              query.query(['/Sudoku'],parsed,['file'],1,str(tmp_path))]
+    assert result == [obj['file'] for obj in PUZZLES if query.matches(obj,parsed)]
+    return [int(file[8:11]) for file in result]
+
+def testPredicates(tmp_path):
+    assert select(tmp_path,'size=9') == [2,3]
+    assert select(tmp_path,'size!=9') == [1,4]
+    assert select(tmp_path,'size>4','size<9') == [4]
+    assert select(tmp_path,'size>=9') == [2,3]
+    assert select(tmp_path,'author~Janko') == [1,2]
+    assert select(tmp_path,'author~"quoted"') == [3]
+    assert select(tmp_path,'file~002') == [2]
+    assert select(tmp_path,'author<5') == [] # not an integer property
+
+def testMissingProperty(tmp_path):
+    # puzzles without the property match != and nothing else
+    assert select(tmp_path,'solver!=Otto Janko') == [2,3,4]
+    assert select(tmp_path,'solver=B') == [3,4]
+    assert select(tmp_path,'solver~') == [1,3,4]
+    assert select(tmp_path,'problem=x') == [] # grids never match
@@ -0,0 +1,78 @@
+import json
+import os
+import pytest
+
+import block_jsonl
+import corpus
+import parse_data
+import shards
+
+def puzzleLines(n: int, changed: int = -1):
+    return [json.dumps({'file':'/Nonograms/%04d.a.x-janko'%(i+1),
+                        'data':{'rows':i,'author':'B' if i == changed else 'A'}},
+                       separators=(',',':')) for i in range(n)]
+
+def testRoundTrip(tmp_path):
+    out_file = str(tmp_path/'Nonograms.jsonl.bz2')
+    assert shards.writeShards(out_file,puzzleLines(25),shard_size=10,block_size=4) == [0,1,2]
+    manifest_file = str(tmp_path/'Nonograms.manifest.json')
+    manifest = shards.readManifest(manifest_file)
+    assert [s['file'] for s in manifest['shards']] == \
+        ['Nonograms.%04d.jsonl.bz2'%i for i in range(3)]
+    assert [(s['start'],s['count']) for s in manifest['shards']] == [(0,10),(10,10),(20,5)]
+    assert manifest['shards'][1]['first'] == '/Nonograms/0011.a.x-janko'
+    assert [line.decode() for line in shards.readLines(manifest_file)] == puzzleLines(25)
+    assert shards.checkShards(manifest_file) == []
+    assert corpus.listTypes(str(tmp_path)) == ['/Nonograms']
+    assert len(list(corpus.iterPuzzles('/Nonograms',str(tmp_path),parallel=True,processes=2))) == 25
+    open(shards.shardPaths(manifest_file)[2],'ab').write(b'x')
+    assert shards.checkShards(manifest_file) == ['Nonograms.0002.jsonl.bz2: checksum mismatch']
+
+def testShardBytes():
+    lines = [b'x'*9]*10 # 10 bytes with the newline
+    assert [len(shard) for shard in shards.splitShards(lines,shard_bytes=25)] == [3,3,3,1]
+
+def testRewriteChanged(tmp_path):
+    out_file = str(tmp_path/'Nonograms.jsonl.bz2')
+    shards.writeShards(out_file,puzzleLines(25),shard_size=10)
+    assert shards.writeShards(out_file,puzzleLines(25),shard_size=10) == []
+    assert shards.writeShards(out_file,puzzleLines(25,changed=12),shard_size=10) == [1]
+    assert shards.writeShards(out_file,puzzleLines(25,changed=12),shard_size=10,block_size=5) \
+        == [0,1,2]
+
+def testRemoveStale(tmp_path):
+    out_file = str(tmp_path/'Nonograms.jsonl.bz2')
+    shards.writeShards(out_file,puzzleLines(25),shard_size=10,block_size=4)
+    shards.writeShards(out_file,puzzleLines(15),shard_size=10)
+    assert sorted(os.listdir(tmp_path)) == ['Nonograms.0000.jsonl.bz2','Nonograms.0001.jsonl.bz2',
+                                            'Nonograms.manifest.json']
+    shards.writeShards(str(tmp_path/'Nonograms.jsonl'),puzzleLines(15),shard_size=10)
+    assert sorted(os.listdir(tmp_path)) == ['Nonograms.0000.jsonl','Nonograms.0001.jsonl',
+                                            'Nonograms.manifest.json']
+
+def testManifestBeforeSingleFile(tmp_path):
+    single = str(tmp_path/'Nonograms.jsonl.bz2')
+    block_jsonl.writeBlocks(single,puzzleLines(3))
+    shards.writeShards(single,puzzleLines(5),shard_size=2)
+    assert corpus.dataFile('/Nonograms',str(tmp_path)) == str(tmp_path/'Nonograms.manifest.json')
+    assert len(list(corpus.iterPuzzles('/Nonograms',str(tmp_path)))) == 5
+    # writing a single file again removes the shards
+    parse_data.writeLines(single,puzzleLines(4))
+    assert sorted(os.listdir(tmp_path)) == ['Nonograms.jsonl.bz2']
+    assert len(list(corpus.iterPuzzles('/Nonograms',str(tmp_path)))) == 4
+
+def testDictionaryContents(tmp_path):
+    pytest.importorskip('zstandard')
+    samples = str(tmp_path/'samples.jsonl')
+    open(samples,'w').write(''.join(line+'\n' for line in puzzleLines(2000)))
+    zdict = str(tmp_path/'corpus.zdict')
+    out_file = str(tmp_path/'Nonograms.jsonl.zst')
+    open(zdict,'wb').write(block_jsonl.trainDictionary([samples],dict_size=4096))
+    shards.writeShards(out_file,puzzleLines(25),shard_size=10,block_size=5,zdict=zdict)
+    assert shards.writeShards(out_file,puzzleLines(25),shard_size=10,block_size=5,zdict=zdict) == []
+    # a retrained dictionary under the same name
+    open(zdict,'wb').write(block_jsonl.trainDictionary([samples],dict_size=2048))
+    assert shards.writeShards(out_file,puzzleLines(25),shard_size=10,block_size=5,zdict=zdict) \
+        == [0,1,2]
+    assert [line.decode() for line in corpus.iterLines('/Nonograms',str(tmp_path))] == \
+        puzzleLines(25)
@@ -0,0 +1,39 @@
+import pytest
+np = pytest.importorskip('numpy')
+
+import similar
+
+GRID = [['1','-','-','4','-','-'],['-','2','-','-','5','-'],['-','-','3','-','-','6'],
+        ['4','-','-','1','-','-'],['-','5','-','-','2','-'],['-','-','6','-','-','3']]
+
+def testVariants():
+    grids = similar.variants([['1','2','3'],['4','5','6']])
+    assert len(grids) == 8
+    assert grids[1].tolist() == [['3','6'],['2','5'],['1','4']]
+    assert grids[4].tolist() == [['3','2','1'],['6','5','4']]
+    assert len(similar.variants([['1','2'],['3']])) == 1
+
+def testLike():
+    index = similar.SimilarityIndex()
+    rotated = np.rot90(np.array(GRID,dtype=object)).tolist()
+    changed = [row[:] for row in GRID]
+    changed[0][0] = '6'
+    other = [['-']*6 for _ in range(5)]+[['1','2','3','4','5','6']]
+    for i,grid in enumerate([GRID,rotated,changed,other]):
+        assert index.add('/Kakuro/%d'%i,'/Kakuro',{'problem':grid})
+    assert not index.add('/Kakuro/9','/Kakuro',{'problem':[['-','-']]})
+    assert not index.add('/Kakuro/9','/Kakuro',{'size':6})
+    found = {index.files[j]:(sim,name) for j,sim,name in index.like('/Kakuro',{'problem':GRID},0.5)}
+    assert found['/Kakuro/0'] == (1.0,'identity')
+    assert found['/Kakuro/1'] == (1.0,'rot90')
+    assert 0.5 <= found['/Kakuro/2'][0] < 1.0
+    assert '/Kakuro/3' not in found
+
+def testRelabel():
+    index = similar.SimilarityIndex()
+    digits = {'1':'2','2':'3','3':'1','4':'5','5':'6','6':'4'}
+    permuted = [[digits.get(cell,cell) for cell in row] for row in GRID]
+    index.add('/Sudoku/1','/Sudoku',{'problem':permuted})
+    index.add('/Kakuro/1','/Kakuro',{'problem':permuted})
+    assert [index.files[j] for j,_,_ in index.like('/Sudoku',{'problem':GRID})] == ['/Sudoku/1']
+    assert index.like('/Kakuro',{'problem':GRID}) == []
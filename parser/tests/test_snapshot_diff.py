@@ -0,0 +1,41 @@
+import json
+
+import block_jsonl
+import grid_codecs
+import snapshot_diff
+
+def writeSnapshot(data_dir, puzzles):
+    data_dir.mkdir()
+    lines = [json.dumps(obj,separators=(',',':')) for obj in puzzles]
+    block_jsonl.writeBlocks(str(data_dir/'Sudoku.jsonl.bz2'),lines)
+    return str(data_dir)
+
+def sudoku(i: int, author: str = 'A'):
+    return {'file':'/Sudoku/%04d.a.x-janko'%i,
+            'data':{'author':author,'size':2,'problem':[['1','-'],['-','%d'%i]]}}
+
+def testDiffAndDelta(tmp_path):
+    old_dir = writeSnapshot(tmp_path/'old',[sudoku(1),sudoku(2),sudoku(3)])
+    # compact lines hash the same as the default ones
+    compact = []
+    for i in (1,2):
+        data,codecs = grid_codecs.encodeResult(sudoku(i)['data'],{'problem':grid_codecs.C_ROWS})
+        compact.append({'file':sudoku(i)['file'],'data':data,'codecs':codecs})
+    assert compact[0] != sudoku(1)
+    new_dir = writeSnapshot(tmp_path/'new',compact+[sudoku(4,'B')])
+    diffs = list(snapshot_diff.diffSnapshots(old_dir,new_dir))
+    assert diffs == [('/Sudoku',(['/Sudoku/0004.a.x-janko'],['/Sudoku/0003.a.x-janko'],[]))]
+    for ext in ['.jsonl','.jsonl.bz2']:
+        out_file = str(tmp_path/('delta'+ext))
+        snapshot_diff.writeDelta(out_file,snapshot_diff.deltaLines(diffs,new_dir))
+        assert [json.loads(line) for line in block_jsonl.readLines(out_file)] == \
+            [{'op':'add','file':'/Sudoku/0004.a.x-janko','data':sudoku(4,'B')['data']},
+             {'op':'remove','file':'/Sudoku/0003.a.x-janko'}]
+
+def testModified(tmp_path):
+    old_dir = writeSnapshot(tmp_path/'old',[sudoku(1),sudoku(2)])
+    new_dir = writeSnapshot(tmp_path/'new',[sudoku(1),sudoku(2,'B')])
+    assert snapshot_diff.diffType(('/Sudoku',old_dir,new_dir)) == \
+        ([],[],['/Sudoku/0002.a.x-janko'])
+    assert snapshot_diff.diffType(('/Sudoku',old_dir,str(tmp_path/'none'))) == \
+        ([],['/Sudoku/0001.a.x-janko','/Sudoku/0002.a.x-janko'],[])
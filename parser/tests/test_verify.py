@@ -0,0 +1,24 @@
+import grid_codecs
+import verify
+
+def obj(**data):
+    return {'file':'/Sudoku/0001.a.x-janko','data':data}
+
+def testFirstDifference():
+    grid = [['1','-'],['-','2']]
+    other = [['1','-'],['-','3']]
+    assert verify.firstDifference(obj(size=2,problem=grid),obj(size=2,problem=other)) \
+        == 'data.problem[1][1]: "2" != "3"'
+    assert verify.firstDifference(obj(size=2,author='A'),obj(size=2)) == 'data.author missing'
+    assert verify.firstDifference(obj(size=2),obj(size=2,author='A')) == 'data.author added'
+    assert verify.firstDifference(obj(size=2,author='A'),obj(author='A',size=2)) \
+        == 'data property order'
+    assert verify.firstDifference(obj(problem=grid),obj(problem=grid[:1])) \
+        == 'data.problem length 2 != 1'
+
+def testCompactIsDecoded():
+    grid = [['1','-'],['-','2']]
+    data,codecs = grid_codecs.encodeResult({'size':2,'problem':grid},{'problem':grid_codecs.C_ROWS})
+    compact = {'file':'/Sudoku/0001.a.x-janko','data':data,'codecs':codecs}
+    assert verify.firstDifference(compact,obj(size=2,problem=[['1','-'],['2','2']])) \
+        == 'data.problem[1][0]: "-" != "2"'
@@ -0,0 +1,16 @@
+import os
+
+import watch
+
+def testPollWatcher(tmp_path):
+    dirs = [str(tmp_path/'a'),str(tmp_path/'b')]
+    for d in dirs:
+        os.mkdir(d)
+    open(os.path.join(dirs[0],'1.x-janko'),'w').write('begin\n')
+    watcher = watch.PollWatcher(dirs,interval=0.01)
+    open(os.path.join(dirs[0],'1.x-janko'),'w').write('begin\nend\n')
+    open(os.path.join(dirs[1],'edits.json'),'w').write('{}')
+    assert watcher.changes() == {os.path.join(dirs[0],'1.x-janko'),
+                                 os.path.join(dirs[1],'edits.json')}
+    os.remove(os.path.join(dirs[0],'1.x-janko'))
+    assert watcher.changes() == {os.path.join(dirs[0],'1.x-janko')}
@@ -0,0 +1,32 @@
+import json
+import pytest
+
+import block_jsonl
+
+pytest.importorskip('zstandard')
+
+def puzzleLines(n: int):
+    return [json.dumps({'file':'/Nonograms/%04d.a.x-janko'%(i+1),
+                        'data':{'author':'Otto Janko','rows':i%20,'problem':[['-']*(i%7)]*3}},
+                       separators=(',',':')).encode() for i in range(n)]
+
+def testZstdRoundTrip(tmp_path):
+    path = str(tmp_path/'Nonograms.jsonl.zst')
+    lines = puzzleLines(50)
+    block_jsonl.writeBlocks(path,lines,0,codec='zst')
+    assert list(block_jsonl.readLines(path)) == lines
+    block_jsonl.writeBlocks(path,lines,8,codec='zst')
+    assert list(block_jsonl.readLines(path)) == lines
+    assert block_jsonl.getPuzzle(path,42)['file'] == '/Nonograms/0042.a.x-janko'
+
+def testZstdDictionary(tmp_path):
+    lines = puzzleLines(2000)
+    src = str(tmp_path/'train.jsonl')
+    open(src,'wb').write(b''.join(line+b'\n' for line in lines))
+    zdict = str(tmp_path/('corpus'+block_jsonl.ZDICT_EXT))
+    open(zdict,'wb').write(block_jsonl.trainDictionary([src],dict_size=4096))
+    path = str(tmp_path/'Nonograms.jsonl.zst')
+    block_jsonl.writeBlocks(path,lines,100,codec='zst',zdict=zdict)
+    # the dictionary is found next to the data file by its ID
+    assert list(block_jsonl.readLines(path)) == lines
+    assert block_jsonl.getPuzzle(path,1500)['data']['rows'] == 1499%20
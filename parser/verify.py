@@ -0,0 +1,139 @@
+'''
+Verification of the parser against the published data: the source files of each
+type are parsed again and the output is compared, puzzle by puzzle, with the
+file of the type in /data, so changes to the parsers or the writer that change
+the output are found without writing and diffing all the files.
+
+Usage: verify.py [puzzle ...] [--processes N] [--data-dir DIR]
+Verifies the given types (default all types with a parser, a source directory
+and a data file) with one task per type in a process pool, and prints for each
+type the number of puzzles and, if any differ, the number of differences and
+the first one (the file and the first property that differs). The exit status is
+1 if there are differences.
+
+A puzzle is written as a line the same way as parse_data.py (without --compact)
+and compared with the published line as bytes. Only if they are different are
+the hashes of the decoded puzzles compared (see snapshot_diff.lineHash, so
+published files in the compact encoding can be verified), and only if those are
+different are both lines decoded to find the property that differs. Files that
+fail to parse are missing from the output like with parse_data.py.
+'''
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import block_jsonl
+import corpus
+import grid_codecs
+import parse_data
+import snapshot_diff
+
+# puzzles, differences, first difference
+TypeResult = Tuple[int,int,Optional[str]]
+
+def _differ(old: Any, new: Any) -> bool:
+    ''' True if the values are different or have their properties in another order. '''
+    return old != new or json.dumps(old) != json.dumps(new)
+
+def _firstDifference(old: Any, new: Any, path: str) -> str:
+    if isinstance(old,dict) and isinstance(new,dict):
+        for key in old:
+            if key not in new:
+                return '%s.%s missing'%(path,key)
+            if _differ(old[key],new[key]):
+                return _firstDifference(old[key],new[key],path+'.'+key)
+        for key in new:
+            if key not in old:
+                return '%s.%s added'%(path,key)
+        if list(old) != list(new):
+            return path+' property order'
+    if isinstance(old,list) and isinstance(new,list):
+        if len(old) != len(new):
+            return '%s length %d != %d'%(path,len(old),len(new))
+        for i,(a,b) in enumerate(zip(old,new)):
+            if _differ(a,b):
+                return _firstDifference(a,b,'%s[%d]'%(path,i))
+    return '%s: %s != %s'%(path,json.dumps(old),json.dumps(new))
+
+def firstDifference(old: Dict[str,Any], new: Dict[str,Any]) -> str:
+    ''' Description of the first difference of two puzzle objects. '''
+    return _firstDifference(grid_codecs.decodeObject(old),grid_codecs.decodeObject(new),'')[1:]
+
+def parsedLines(puzzle: str) -> Iterator[Tuple[str,str]]:
+    ''' (file key,JSONL line) for the puzzles of a type as parse_data.py writes them. '''
+    for file in parse_data.sourceFiles(puzzle):
+        result,_,_ = parse_data.parseFile(puzzle,file)
+        if result is not None:
+            file_rel = puzzle+'/'+os.path.split(file)[1]
+            yield file_rel,json.dumps({'file':file_rel,'data':result},separators=(',',':'))
+
+def verifyType(args: Tuple[str,str]) -> TypeResult:
+    puzzle,data_dir = args
+    # both are in the order of the file names, merged by file key so a missing
+    # puzzle is one difference
+    parsed = parsedLines(puzzle)
+    golden = corpus.readLines(corpus.dataFile(puzzle,data_dir))
+    new = next(parsed,None)
+    old = next(golden,None)
+    count = 0
+    diffs: List[str] = []
+    while new is not None or old is not None:
+        count += 1
+        old_file = block_jsonl.fileKey(old) if old is not None else None
+        if old_file is None or (new is not None and new[0] < old_file):
+            diffs.append(new[0]+': not in the published data')
+            new = next(parsed,None)
+            continue
+        if new is None or old_file < new[0]:
+            diffs.append(old_file+': not in the output')
+            old = next(golden,None)
+            continue
+        line = new[1].encode()
+        if line != old and snapshot_diff.lineHash(line) != snapshot_diff.lineHash(old):
+            diffs.append(old_file+': '+firstDifference(json.loads(old),json.loads(line)))
+        new = next(parsed,None)
+        old = next(golden,None)
+    return count,len(diffs),diffs[0] if diffs else None
+
+def _init():
+    for parsers in parse_data.parsermap.values():
+        for parser in parsers:
+            parser.setErrPrint(lambda s: None)
+
+def verifyTypes(puzzles: List[str], data_dir: str = corpus.data_dir,
+        processes: int = 1) -> Iterator[Tuple[str,TypeResult]]:
+    ''' (type,(puzzles,differences,first difference)) for each type, in order. '''
+    tasks = [(puzzle,data_dir) for puzzle in puzzles]
+    if processes > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(processes,_init) as pool:
+            yield from zip(puzzles,pool.imap(verifyType,tasks))
+    else:
+        _init()
+        yield from zip(puzzles,map(verifyType,tasks))
+
+def verifiableTypes(data_dir: str = corpus.data_dir) -> List[str]:
+    ''' Types with a parser, a source directory and a data file. '''
+    return [puzzle for puzzle in corpus.listTypes(data_dir) if puzzle in parse_data.parsermap
+            and os.path.isdir(parse_data.base_dir+('' if puzzle == '/' else puzzle))]
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='compare parser output with the published data')
+    ap.add_argument('puzzles',nargs='*',help='puzzle types (default all)')
+    ap.add_argument('--processes',type=int,default=os.cpu_count() or 1)
+    ap.add_argument('--data-dir',default=corpus.data_dir)
+    args = ap.parse_args()
+    puzzles = args.puzzles or verifiableTypes(args.data_dir)
+    failed = 0
+    for puzzle,(count,diffs,first) in verifyTypes(puzzles,args.data_dir,args.processes):
+        if diffs == 0:
+            print('%s: %d puzzles, ok'%(puzzle,count))
+        else:
+            failed += 1
+            print('%s: %d puzzles, %d differ, first %s'%(puzzle,count,diffs,first))
+    print('%d types verified, %d with differences'%(len(puzzles),failed))
+    if failed > 0:
+        sys.exit(1)
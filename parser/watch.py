@@ -0,0 +1,234 @@
+'''
+Watch mode for fixing parse failures: the files of a puzzle type are parsed once,
+then the directory is watched and only the files that change are parsed again,
+with the output file (and failure list) updated after each change. The parsers
+are created once, so an edit shows up in the output within milliseconds.
+
+Usage: watch.py <puzzle> <out_file> [--poll] [--interval SECONDS]
+           [--block-size N] [--shard-size N] [--failed FILE]
+The output is written like parse_data.py (see its options), with the statistics
+sidecar. With --shard-size, only the shards with changed puzzles are written
+again (see shards.py). After each update, the changed files are printed with the
+errors for the ones that failed, and --failed writes the file keys of all
+failed files to FILE. Stop with Ctrl-C.
+
+Changes are detected with inotify (through ctypes, on Linux) or, if that is not
+available or with --poll, by comparing the modification times and sizes of the
+files every interval seconds. Files created, written, renamed or deleted are
+handled (editors that save by writing a new file and renaming it are seen as a
+rename). Events that arrive within DEBOUNCE seconds are handled together.
+
+The edits file (edits.json, see edits.py) is watched too. When it changes, it
+is loaded again (see parse_data.fileEdits) and the files of the type whose edits
+changed are parsed again. While it is invalid, changes are kept until it is
+fixed.
+'''
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import corpus_stats
+import edits
+import parse_data
+
+DEBOUNCE = 0.05
+POLL_INTERVAL = 0.5
+
+# inotify event masks (sys/inotify.h)
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+
+class InotifyWatcher:
+    ''' Paths of changed files in some directories, from inotify. '''
+    _fd: int
+    _dirs: Dict[int,str] # watch descriptor -> directory
+    def __init__(self, dir_paths: List[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'),use_errno=True)
+        self._fd = libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(),'inotify_init1 failed')
+        self._dirs = dict()
+        mask = IN_CLOSE_WRITE|IN_MOVED_FROM|IN_MOVED_TO|IN_DELETE
+        for dir_path in dir_paths:
+            wd = libc.inotify_add_watch(self._fd,os.fsencode(dir_path),mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(),'inotify_add_watch failed: '+dir_path)
+            self._dirs[wd] = dir_path
+    def _read(self, names: Set[str]):
+        buf = os.read(self._fd,65536)
+        off = 0
+        while off < len(buf):
+            wd,_,_,length = struct.unpack_from('iIII',buf,off)
+            name = buf[off+16:off+16+length].rstrip(b'\0')
+            if name and wd in self._dirs:
+                names.add(os.path.join(self._dirs[wd],os.fsdecode(name)))
+            off += 16+length
+    def changes(self) -> Set[str]:
+        ''' Wait for changes and return the paths of the changed files. '''
+        names: Set[str] = set()
+        select.select([self._fd],[],[])
+        self._read(names)
+        while select.select([self._fd],[],[],DEBOUNCE)[0]:
+            self._read(names)
+        return names
+
+class PollWatcher:
+    ''' Paths of changed files in some directories, by comparing file stats. '''
+    dir_paths: List[str]
+    interval: float
+    _stats: Dict[str,Tuple[int,int]]
+    def __init__(self, dir_paths: List[str], interval: float = POLL_INTERVAL):
+        self.dir_paths = dir_paths
+        self.interval = interval
+        self._stats = self._scan()
+    def _scan(self) -> Dict[str,Tuple[int,int]]:
+        return {os.path.join(dir_path,e.name):(e.stat().st_mtime_ns,e.stat().st_size)
+                for dir_path in self.dir_paths for e in os.scandir(dir_path) if e.is_file()}
+    def changes(self) -> Set[str]:
+        while True:
+            time.sleep(self.interval)
+            stats = self._scan()
+            names = {name for name in stats.keys()|self._stats.keys()
+                     if stats.get(name) != self._stats.get(name)}
+            self._stats = stats
+            if names:
+                return names
+
+class TypeState:
+    '''
+    Parse results of the files of a type, updated file by file. lines has the
+    JSONL line of each parsed file and errors the parser errors of each failed
+    one, both by file name.
+    '''
+    puzzle: str
+    dir_path: str
+    objs: Dict[str,Dict[str,Any]]
+    lines: Dict[str,str]
+    errors: Dict[str,List[str]]
+    def __init__(self, puzzle: str):
+        self.puzzle = puzzle
+        self.dir_path = parse_data.base_dir+('' if puzzle == '/' else puzzle)
+        self.objs = dict()
+        self.lines = dict()
+        self.errors = dict()
+    def update(self, name: str):
+        ''' Parse a file again (or remove it if it no longer exists). '''
+        self.objs.pop(name,None)
+        self.lines.pop(name,None)
+        self.errors.pop(name,None)
+        file = self.dir_path+'/'+name
+        if not os.path.isfile(file) or edits.isSkipped(parse_data.fileEdits(self.puzzle+'/'+name)):
+            return
+        result,_,errors = parse_data.parseFile(self.puzzle,file)
+        if result is None:
+            self.errors[name] = errors
+        else:
+            obj = {'file':self.puzzle+'/'+name,'data':result}
+            self.objs[name] = obj
+            self.lines[name] = json.dumps(obj,separators=(',',':'))
+    def fileEdits(self) -> Dict[str,List[edits.Edit]]:
+        ''' Edits of the files of the type, by file name. '''
+        return {name:parse_data.fileEdits(self.puzzle+'/'+name)
+                for name in sorted(os.listdir(self.dir_path))}
+    def failedFiles(self) -> List[str]:
+        return [self.puzzle+'/'+name for name in sorted(self.errors)]
+    def write(self, out_file: str, block_size: int = 0, shard_size: int = 0,
+            failed_file: Optional[str] = None):
+        names = sorted(self.lines)
+        parse_data.writeLines(out_file,(self.lines[name] for name in names),block_size,
+                              shard_size=shard_size)
+        if shard_size > 0 or os.path.isfile(out_file): # not for /dev/null
+            stats = corpus_stats.computeStats(self.puzzle,[self.objs[name] for name in names],
+                                              self.failedFiles())
+            corpus_stats.writeStats(corpus_stats.statsFileName(out_file),stats)
+        if failed_file is not None:
+            outf = open(failed_file,'w')
+            outf.write(''.join(file+'\n' for file in self.failedFiles()))
+            outf.close()
+
+def watch(puzzle: str, out_file: str, poll: bool = False, interval: float = POLL_INTERVAL,
+        block_size: int = 0, shard_size: int = 0, failed_file: Optional[str] = None):
+    for parser in parse_data.parsermap[puzzle]:
+        parser.setErrPrint(lambda s: None)
+    state = TypeState(puzzle)
+    dir_paths = [state.dir_path]
+    if parse_data.edits_file is not None:
+        edits_dir = os.path.dirname(parse_data.edits_file) or '.'
+        if edits_dir != state.dir_path:
+            dir_paths.append(edits_dir)
+    watcher: Any = None
+    if not poll:
+        try:
+            watcher = InotifyWatcher(dir_paths)
+        except (OSError,AttributeError) as e: # AttributeError if libc has no inotify
+            print('inotify not available (%s), polling'%e)
+    if watcher is None:
+        watcher = PollWatcher(dir_paths,interval)
+    start = time.perf_counter()
+    for file in parse_data.sourceFiles(puzzle):
+        state.update(os.path.split(file)[1])
+    state.write(out_file,block_size,shard_size,failed_file)
+    print('%d parsed, %d failed in %.3fs, watching %s'%(len(state.lines),len(state.errors),
+          time.perf_counter()-start,state.dir_path))
+    file_edits = state.fileEdits()
+    pending: Set[str] = set() # changed files not parsed yet
+    while True:
+        paths = watcher.changes()
+        start = time.perf_counter()
+        pending |= {os.path.basename(path) for path in paths
+                    if os.path.dirname(path) == state.dir_path}
+        try:
+            new_edits = state.fileEdits() # loaded again if the edits file changed
+        except ValueError as e:
+            print('edits not loaded: %s'%e)
+            continue
+        # files whose edits changed are parsed again
+        pending |= {name for name in new_edits if new_edits[name] != file_edits.get(name)}
+        file_edits = new_edits
+        names = sorted(pending)
+        pending = set()
+        # temporary files of editors that are gone again are not reported
+        known = {name for name in names if name in state.lines or name in state.errors}
+        for name in names:
+            state.update(name)
+        names = [name for name in names
+                 if name in known or name in state.lines or name in state.errors]
+        if not names:
+            continue
+        state.write(out_file,block_size,shard_size,failed_file)
+        elapsed = time.perf_counter()-start
+        for name in names:
+            if name in state.errors:
+                print('FAILED %s/%s'%(puzzle,name))
+                print('\n'.join(state.errors[name]))
+            elif name in state.lines:
+                print('parsed %s/%s'%(puzzle,name))
+            else:
+                print('removed %s/%s'%(puzzle,name))
+        print('updated %s in %.1fms (%d failed)'%(out_file,1000*elapsed,len(state.errors)))
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='parse changed puzzle files as they are edited')
+    ap.add_argument('puzzle',help='puzzle path (such as /Sudoku)')
+    ap.add_argument('out_file')
+    ap.add_argument('--poll',action='store_true',help='poll instead of using inotify')
+    ap.add_argument('--interval',type=float,default=POLL_INTERVAL,help='seconds between polls')
+    ap.add_argument('--block-size',type=int,default=0)
+    ap.add_argument('--shard-size',type=int,default=0)
+    ap.add_argument('--failed',help='write the failed file keys to this file')
+    args = ap.parse_args()
+    try:
+        watch(args.puzzle,args.out_file,args.poll,args.interval,args.block_size,
+              args.shard_size,args.failed)
+    except KeyboardInterrupt:
+        pass